@@ -0,0 +1,296 @@
+import argparse
+import time
+
+import numpy as np
+
+from simulation import (
+    PREP_OPTIONS, ACTION_OPTIONS, EVENT_KEYS, ENDING_KEYS,
+    EFFECT_MULTIPLIER, FIRST_EVENT_ACTIONS, EVENT_DELAY_MIN, EVENT_DELAY_MAX,
+    RED_MIN, GREY_MIN, GREY_MAX, BLACK_MAX,
+    APATHY_MONEY, APATHY_GREY_CHOICES, BEST_RED_DEBT,
+    EVENT_EFFECTS, EVENT_TABLE, scale_delta,
+)
+
+# NumPy 批量模拟 - N 局同时推进，每次决策对所有局做一次向量化更新
+# 规则与 simulation.CanteenSim 相同 (连续时间模式)，用于结局分布的大规模扫描
+
+N_EVENTS = len(EVENT_KEYS)
+ENDING_INDEX = {k: i for i, k in enumerate(ENDING_KEYS)}
+
+
+class BatchSim:
+    """
+    N 局并行的向量化模拟
+    policy(batch, phase, rng) -> 长度为 N 的选择数组；phase 为 'prep' / 'action' / 'event'
+    (事件阶段 0 = Choice A, 1 = Choice B)，只有处于该阶段的局会用到对应位置的值
+    """
+    def __init__(self, n, seed=None, think_time=1500, effect_multiplier=EFFECT_MULTIPLIER):
+        if not EVENT_TABLE.plain:
+            raise ValueError("BatchSim only models plain event tables (each event once a day, equal weights, "
+                             "no preconditions or chains); use CanteenSim / montecarlo.py instead")
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.think_time = think_time
+        self.effect_multiplier = effect_multiplier
+        self._build_tables()
+        self.reset()
+
+    def _build_tables(self):
+        mult = self.effect_multiplier
+        self.prep_h = np.array([o[1] for o in PREP_OPTIONS], dtype=np.int32)
+        self.prep_m = np.array([o[2] for o in PREP_OPTIONS], dtype=np.int32)
+        self.act_h = np.array([scale_delta(o[1], mult) for o in ACTION_OPTIONS], dtype=np.int32)
+        self.act_m = np.array([scale_delta(o[2], mult) for o in ACTION_OPTIONS], dtype=np.int32)
+        shape = (N_EVENTS, 2)
+        self.ev_h = np.zeros(shape, dtype=np.int32)
+        self.ev_m = np.zeros(shape, dtype=np.int32)
+        self.ev_neg = np.zeros(shape, dtype=bool)
+        self.ev_pos = np.zeros(shape, dtype=bool)
+        self.ev_reset = np.zeros(shape, dtype=bool)
+        for e, key in enumerate(EVENT_KEYS):
+            for c, (h, m, neg, pos, reset) in enumerate(EVENT_EFFECTS[key]):
+                self.ev_h[e, c] = scale_delta(h, mult)
+                self.ev_m[e, c] = scale_delta(m, mult)
+                self.ev_neg[e, c] = neg
+                self.ev_pos[e, c] = pos
+                self.ev_reset[e, c] = reset
+
+    def reset(self):
+        n = self.n
+        # int32 keeps the working set small; money and counters stay far below 2**31
+        i32 = np.int32
+        self.hearts = np.full(n, 10, dtype=i32)
+        self.money = np.zeros(n, dtype=i32)
+        self.step = np.zeros(n, dtype=i32)
+        self.clicks = np.zeros(n, dtype=i32)
+        # history
+        self.had_grey = np.zeros(n, dtype=bool)
+        self.had_red_again = np.zeros(n, dtype=bool)
+        self.ended_black = np.zeros(n, dtype=bool)
+        self.chose_positive_event = np.zeros(n, dtype=bool)
+        self.had_negative_money = np.zeros(n, dtype=bool)
+        self.post_black_increased = np.zeros(n, dtype=bool)
+        self.grey_choice_count = np.zeros(n, dtype=i32)
+        self.grey_step = np.zeros(n, dtype=i32)
+        self.black_step = np.zeros(n, dtype=i32)
+        self.post_black_decrease_count = np.zeros(n, dtype=i32)
+        self.post_black_negative_consec = np.zeros(n, dtype=i32)
+        self.last_negative_choice_money = np.zeros(n, dtype=i32)
+        # event queue: one shuffled permutation of the 5 events per run
+        self.event_queue = self.rng.permuted(np.tile(np.arange(N_EVENTS, dtype=np.int8), (n, 1)), axis=1)
+        self.queue_pos = np.zeros(n, dtype=i32)
+        self.current_event = np.full(n, -1, dtype=i32)
+        self.event_timer = np.zeros(n, dtype=i32)
+        self.next_event_delay = self.rng.integers(EVENT_DELAY_MIN, EVENT_DELAY_MAX + 1, n, dtype=i32)
+        self.actions_done = np.zeros(n, dtype=i32)
+        self.first_event_triggered = np.zeros(n, dtype=bool)
+        # run state
+        self.in_business = np.zeros(n, dtype=bool)
+        self.done = np.zeros(n, dtype=bool)
+        self.ending = np.full(n, -1, dtype=i32)
+
+    # ---------------- 向量化的 Game 状态变化 ----------------
+    # 所有方法都作用在索引数组 idx 指定的局上，只读写这些局的数据
+    def _change_hearts(self, idx, delta):
+        self.step[idx] += 1
+        step = self.step[idx]
+        hearts = np.where(delta == -999, 0, np.clip(self.hearts[idx] + delta, 0, 10))
+        self.hearts[idx] = hearts
+        had_grey = self.had_grey[idx]
+        entered_grey = ~had_grey & (hearts >= GREY_MIN) & (hearts <= GREY_MAX)
+        had_grey |= entered_grey
+        self.had_grey[idx] = had_grey
+        self.grey_step[idx[entered_grey]] = step[entered_grey]
+        self.had_red_again[idx[(hearts >= RED_MIN) & had_grey]] = True
+        black = self.ended_black[idx]
+        entered_black = ~black & (hearts <= BLACK_MAX)
+        black |= entered_black
+        self.ended_black[idx] = black
+        self.black_step[idx[entered_black]] = step[entered_black]
+        self.post_black_decrease_count[idx[black & (delta < 0)]] += 1
+        self.post_black_increased[idx[black & (delta > 0)]] = True
+
+    def _change_money(self, idx, delta):
+        money = self.money[idx] + delta
+        self.money[idx] = money
+        self.had_negative_money[idx[money < 0]] = True
+
+    def _grey(self, idx):
+        hearts = self.hearts[idx]
+        return (hearts >= GREY_MIN) & (hearts <= GREY_MAX)
+
+    def _apathy(self, idx):
+        return ((self.money[idx] >= APATHY_MONEY) &
+                (self.grey_choice_count[idx] >= APATHY_GREY_CHOICES) & self._grey(idx))
+
+    def _finish(self, idx):
+        """结束这些局并按 select_ending 的规则记录结局"""
+        idx = idx[~self.done[idx]]
+        if not idx.size:
+            return
+        v = self.hearts[idx]
+        spiral = (self.had_grey[idx] & self.chose_positive_event[idx] & self.ended_black[idx] &
+                  (self.post_black_negative_consec[idx] >= 4) &
+                  (self.last_negative_choice_money[idx] > 900))
+        key = np.where(v <= BLACK_MAX,
+                       np.where(spiral, ENDING_INDEX['spiral'], ENDING_INDEX['1A']),
+                       np.where(v >= RED_MIN,
+                                np.where(self.money[idx] < BEST_RED_DEBT,
+                                         ENDING_INDEX['best_red'], ENDING_INDEX['1B']),
+                                ENDING_INDEX['apathy']))
+        self.ending[idx] = np.where(self._apathy(idx), ENDING_INDEX['apathy'], key)
+        self.done[idx] = True
+        self.in_business[idx] = False
+        self.current_event[idx] = -1
+
+    def _pop_event(self, idx):
+        pos = self.queue_pos[idx]
+        self.current_event[idx] = self.event_queue[idx, pos]
+        self.queue_pos[idx] = pos + 1
+
+    def _update(self, idx, dt):
+        """BusinessScene.update 的向量化版本 (连续时间)"""
+        before = self.event_timer[idx]
+        timer = before + dt
+        delay = self.next_event_delay[idx]
+        fire = ((self.current_event[idx] < 0) & (self.queue_pos[idx] < N_EVENTS) &
+                self.first_event_triggered[idx] & (timer > delay))
+        timer = np.where(fire, timer - np.maximum(delay, before), timer)
+        self.event_timer[idx] = timer
+        fired = idx[fire]
+        if fired.size:
+            self._pop_event(fired)
+            self.next_event_delay[fired] = self.rng.integers(EVENT_DELAY_MIN, EVENT_DELAY_MAX + 1,
+                                                             fired.size)
+        hearts = self.hearts[idx]
+        money = self.money[idx]
+        red = hearts >= RED_MIN
+        # immediate forced ending, then end of day unless still red and solvent
+        forced = red & (money < BEST_RED_DEBT)
+        end_of_day = ((self.queue_pos[idx] >= N_EVENTS) & (self.current_event[idx] < 0) &
+                      ~(red & (money >= BEST_RED_DEBT)))
+        self._finish(idx[forced | end_of_day])
+
+    # ---------------- 决策 ----------------
+    def _prep(self, choice):
+        idx = np.flatnonzero(~self.done & ~self.in_business)
+        c = choice[idx]
+        self.clicks[idx] += 1
+        # prep choices always go through change_hearts, even with a zero delta
+        self._change_hearts(idx, self.prep_h[c])
+        self._change_money(idx, self.prep_m[c])
+        self.in_business[idx] = True
+
+    def _actions(self, idx, choice):
+        c = choice[idx]
+        self.clicks[idx] += 1
+        h = self.act_h[c]
+        m = self.act_m[c]
+        nz = h != 0
+        self._change_hearts(idx[nz], h[nz])
+        nz = m != 0
+        self._change_money(idx[nz], m[nz])
+        self.actions_done[idx] += 1
+        self.grey_choice_count[idx[self._grey(idx)]] += 1
+        apathy = self._apathy(idx)
+        self._finish(idx[apathy])
+        idx = idx[~apathy]
+        first = (~self.first_event_triggered[idx] & (self.actions_done[idx] >= FIRST_EVENT_ACTIONS) &
+                 (self.queue_pos[idx] < N_EVENTS))
+        first = idx[first]
+        self._pop_event(first)
+        self.first_event_triggered[first] = True
+        self._update(idx, 0)
+
+    def _events(self, idx, choice):
+        # flat index into the (event, choice) tables
+        k = self.current_event[idx] * 2 + np.clip(choice[idx], 0, 1)
+        self.clicks[idx] += 1
+        h = self.ev_h.ravel()[k]
+        m = self.ev_m.ravel()[k]
+        nz = h != 0
+        self._change_hearts(idx[nz], h[nz])
+        nz = m != 0
+        self._change_money(idx[nz], m[nz])
+        black = self.hearts[idx] <= BLACK_MAX
+        neg = idx[self.ev_neg.ravel()[k] & black]
+        self.post_black_negative_consec[neg] += 1
+        self.last_negative_choice_money[neg] = self.money[neg]
+        self.chose_positive_event[idx[self.ev_pos.ravel()[k]]] = True
+        self.post_black_negative_consec[idx[self.ev_reset.ravel()[k] & black]] = 0
+        # generic post-event bookkeeping
+        self.grey_choice_count[idx[self._grey(idx)]] += 1
+        apathy = self._apathy(idx)
+        self._finish(idx[apathy])
+        idx = idx[~apathy]
+        self.current_event[idx] = -1
+        self._update(idx, 0)
+
+    def run(self, policy, max_decisions=10000):
+        """跑完所有局，返回结局直方图"""
+        self._prep(np.asarray(policy(self, 'prep', self.rng)))
+        for _ in range(max_decisions):
+            active = np.flatnonzero(self.in_business)
+            if not active.size:
+                break
+            self._update(active, self.think_time)
+            active = active[self.in_business[active]]
+            pending = self.current_event[active] >= 0
+            in_event = active[pending]
+            in_action = active[~pending]
+            if in_event.size:
+                self._events(in_event, np.asarray(policy(self, 'event', self.rng)))
+            if in_action.size:
+                self._actions(in_action, np.asarray(policy(self, 'action', self.rng)))
+        return self.ending_histogram()
+
+    def ending_histogram(self):
+        counts = np.bincount(self.ending[self.done], minlength=len(ENDING_KEYS))
+        return {key: int(counts[i]) for i, key in enumerate(ENDING_KEYS)}
+
+
+def random_policy(prep_p=None, action_p=None, event_b=0.5):
+    """按给定概率随机选择的向量化策略 (默认均匀)"""
+    def policy(batch, phase, rng):
+        if phase == 'prep':
+            return rng.choice(len(PREP_OPTIONS), size=batch.n, p=prep_p)
+        if phase == 'action':
+            return rng.choice(len(ACTION_OPTIONS), size=batch.n, p=action_p)
+        return (rng.random(batch.n) < event_b).astype(np.int32)
+    return policy
+
+
+def sweep_multiplier(values, n, seed=None, policy=None, think_time=1500):
+    """对 effect_multiplier 做扫描，返回 {multiplier: 结局直方图}"""
+    policy = policy or random_policy()
+    results = {}
+    for mult in values:
+        results[mult] = BatchSim(n, seed=seed, think_time=think_time, effect_multiplier=mult).run(policy)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized ending-distribution sweep")
+    parser.add_argument('-n', '--runs', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--think-time', type=int, default=1500, help="ms before each decision")
+    parser.add_argument('--multiplier', type=float, nargs='*', default=[EFFECT_MULTIPLIER],
+                        help="effect_multiplier values to sweep")
+    parser.add_argument('--event-b', type=float, default=0.5, help="probability of choosing B in events")
+    args = parser.parse_args()
+
+    policy = random_policy(event_b=args.event_b)
+    for mult in args.multiplier:
+        start = time.perf_counter()
+        batch = BatchSim(args.runs, seed=args.seed, think_time=args.think_time, effect_multiplier=mult)
+        hist = batch.run(policy)
+        elapsed = time.perf_counter() - start
+        total = max(1, sum(hist.values()))
+        print(f"effect_multiplier={mult:g}  runs={args.runs}  {elapsed:.2f}s  "
+              f"({args.runs / max(elapsed, 1e-9):,.0f} runs/sec)")
+        for key in ENDING_KEYS:
+            print(f"  {key:>9}: {hist[key]:>9}  {hist[key] / total:6.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,6 @@
 import pygame
+from utils.layout import layout_text
+from utils.text_cache import render_text
 
 class DialogBox:
     def __init__(self, font, width=1000, height=180):
@@ -25,20 +27,7 @@ class DialogBox:
         pygame.draw.rect(screen, (200, 200, 200), self.rect, 2, border_radius=8)
         screen.blit(box_surface, self.rect)
 
-        words = self.text.split(" ")
-        lines, current = [], ""
-        for w in words:
-            test = current + w + " "
-            if self.font.size(test)[0] < self.rect.width - 40:
-                current = test
-            else:
-                lines.append(current)
-                current = w + " "
-        lines.append(current)
-
-        y = self.rect.y + 20
-        for line in lines:
-            surf = self.font.render(line, True, (255,255,255))
-            screen.blit(surf, (self.rect.x + 20, y))
-            y += 30
+        for run in layout_text(self.font, self.text, self.rect.width - 40, 30):
+            surf = render_text(self.font, run.text, True, (255,255,255))
+            screen.blit(surf, (self.rect.x + 20 + run.x, self.rect.y + 20 + run.y))
 
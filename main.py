@@ -1,14 +1,45 @@
 import os
-import sys
-import random
 import math
+import time
 import pygame
+from collections import OrderedDict
+
+from utils.fonts import get_font, font_cache_stats, FONT_REGULAR, FONT_PLUS
+from utils.surface_cache import cached_smoothscale, quantize_scale, scale_cache_stats
+from utils.noise import StaticNoiseBank
+from utils.save_store import SaveStore
+from utils.damage import DamageTracker
+from utils.scheduler import FrameScheduler
+from utils.text_cache import render_text, text_cache_stats, TypewriterText
+from utils.layout import layout_text, wrap_lines, layout_stats
+from utils.assets import AssetStore
+from utils.sound import SfxEngine
+from utils.music import MusicEngine
+from utils.profiler import profiler, profile_section
+from utils.rng import rng
+from utils.replay import ReplayRecorder, ReplayCursor, normalize
+from utils.events import event_table, apply_effect
+from utils.event_scheduler import EventScheduler
+from utils.campaign import CampaignLog, day_seed
+from simulation import select_ending
 
 # Evil Canteen Simulator - Mr.TomatoS风格版本
 # 整合了main.py的游戏流程和mr_canteen.py的Mr.TomatoS风格视觉效果
 
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280, 720
 FPS = 60
+# 空闲节流：1秒没有输入/画面变化后降到 IDLE_FPS，静态画面阻塞等待事件
+IDLE_FPS = 10
+IDLE_AFTER_MS = 1000
+STATIC_WAIT_MS = 1000
+# 帧耗时分析器：F3 开关，环境变量 ECS_PROFILE=1 启动时就打开；退出时把记录写到 ECS_PROFILE_TRACE (.csv/.json)
+PROFILE_KEY = pygame.K_F3
+PROFILE_TRACE = 'profile_trace.csv'
+# 主循环各阶段，场景渲染再细分 (面板和 CSV 按这个顺序列出)
+# 随机种子和录像：ECS_SEED 固定这一局的主种子；ECS_RECORD=1 把输入录到 REPLAY_DIR (也可以直接给 .jsonl 路径)
+REPLAY_DIR = 'replays'
+PROFILE_SECTIONS = ['events', 'handle_events', 'update', 'damage', 'render', 'render.background',
+                    'render.boss', 'render.buttons', 'render.overlays', 'hud', 'logs', 'flip']
 
 # ==================== Mr.TomatoS风格颜色定义 ====================
 COLOR_BG_WARM = (255, 245, 220)      # 温馨背景 - 奶油色
@@ -30,20 +61,25 @@ def lerp_color(c1, c2, t):
     return tuple(int(lerp(c1[i], c2[i], t)) for i in range(min(len(c1), len(c2))))
 
 
+# 启动时在后台加载的资源清单 (图片按显示尺寸预缩放、所有字号、音效)
+ASSET_MANIFEST = os.path.join('assets', 'manifest.json')
+# 加载画面每帧最多花多少毫秒把解码好的资源提交到主线程
+LOADING_BUDGET_MS = 8
+
+# process-wide asset store; scenes pull their handles from it on demand
+assets = AssetStore({'window': (WINDOW_WIDTH, WINDOW_HEIGHT)})
+
+
 def load_font(path, size):
-    try:
-        return pygame.font.Font(path, size)
-    except Exception:
-        return pygame.font.SysFont("arial", size)
+    """从进程级字体缓存取字体，渲染路径上不再重复读取TTF"""
+    return get_font(path, size)
 
 
 def load_image(path, size=None):
     """Try to load an image; if missing, return a placeholder surface with the filename text."""
     try:
-        img = pygame.image.load(path).convert_alpha()
-        if size:
-            img = pygame.transform.smoothscale(img, size)
-        return img
+        # preloaded images are a dict lookup; anything else is loaded (and kept) right now
+        return assets.image(path, size)
     except Exception:
         w, h = size if size else (200, 80)
         surf = pygame.Surface((w, h), pygame.SRCALPHA)
@@ -59,9 +95,10 @@ def load_image(path, size=None):
 
 
 # ==================== 存档管理系统 ====================
-import json
-
 SAVE_FILE = "save_data.json"
+# 多日经营 (Campaign)：诚信、金钱和 history 跨天保留，每天结束往 CAMPAIGN_FILE 追加一行
+CAMPAIGN_FILE = "campaign.jsonl"
+CAMPAIGN_DAYS = 7
 
 # 所有结局定义
 ALL_ENDINGS = {
@@ -92,35 +129,44 @@ ALL_ENDINGS = {
     }
 }
 
-def load_save_data():
-    """加载存档数据"""
-    try:
-        if os.path.exists(SAVE_FILE):
-            with open(SAVE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except Exception:
-        pass
+SAVE_SCHEMA_VERSION = 1
+
+
+def _default_save():
     return {'unlocked_endings': []}
 
+
+def _migrate_save(data, version):
+    """升级旧存档 - v0 (无版本号) 只有 unlocked_endings"""
+    if version == 0:
+        data = {'unlocked_endings': list(data.get('unlocked_endings', []))}
+    return data
+
+
+# 存档只在启动时读一次，之后的修改由后台线程合并写盘
+save_store = SaveStore(SAVE_FILE, _default_save, SAVE_SCHEMA_VERSION, migrate=_migrate_save)
+# 战役存档只追加写，继续游戏时从最近的完整快照读起
+campaign_store = CampaignLog(CAMPAIGN_FILE)
+
+
+def load_save_data():
+    """加载存档数据 (内存中的拷贝)"""
+    return save_store.snapshot()
+
 def save_data(data):
-    """保存存档数据"""
-    try:
-        with open(SAVE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
+    """保存存档数据 (后台写盘)"""
+    save_store.replace(data)
 
 def unlock_ending(ending_key):
     """解锁一个结局"""
-    data = load_save_data()
-    if ending_key not in data['unlocked_endings']:
+    if ending_key in save_store.get('unlocked_endings', []):
+        return
+    with save_store.edit() as data:
         data['unlocked_endings'].append(ending_key)
-        save_data(data)
 
 def get_unlocked_endings():
     """获取已解锁的结局列表"""
-    data = load_save_data()
-    return data.get('unlocked_endings', [])
+    return save_store.get('unlocked_endings', [])
 
 
 # ==================== 食堂老板角色 (Mr.TomatoS风格) ====================
@@ -216,10 +262,22 @@ class CanteenBoss:
     食堂老板 - 类似Mr.TomatoS的角色
     眼睛跟随鼠标、会变大、瞳孔变红
     """
+    # 静态图层缓存 (诡异等级, 心情, 是否眨眼) -> surface，所有老板实例共享
+    # 身体/脸/眼白/嘴/帽子只随这三个值变化；瞳孔、血丝和抖动每帧单独绘制
+    SPRITE_ORIGIN = (80, 145)   # 老板中心点在图层里的位置
+    SPRITE_SIZE = (160, 380)
+    SPRITE_CACHE_MAX = 32
+    SPEECH_CACHE_MAX = 16
+    _sprite_cache = OrderedDict()
+    _speech_cache = OrderedDict()
+
     def __init__(self, x, y, size=250):
         self.x = x
         self.y = y
         self.size = size
+        # cosmetic streams: how often the boss blinks or what he says never changes the run
+        self.rng = rng.stream('boss')
+        self.talk = rng.stream('dialogue')
         
         # 状态
         self.mood = "neutral"  # neutral, happy, angry, creepy
@@ -227,6 +285,8 @@ class CanteenBoss:
         
         # 动画
         self.eye_offset = [0, 0]
+        # 上一个模拟步的眼睛偏移，渲染时在两步之间插值
+        self.prev_eye_offset = [0, 0]
         self.mouth_open = 0.0
         self.shake_amount = 0
         self.pulse = 0
@@ -273,24 +333,24 @@ class CanteenBoss:
         """说随机对话"""
         if self.creepy_level > 0.6:
             # 高诡异程度时说邪恶对话
-            dialogue = random.choice(BOSS_DIALOGUES['creepy'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['creepy'])
             self.set_mood("creepy", dialogue)
         else:
             # 正常时说闲聊
-            dialogue = random.choice(BOSS_DIALOGUES['idle'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['idle'])
             self.set_mood("neutral", dialogue)
     
     def react_to_choice(self, heart_delta, money_delta):
         """对玩家选择做出反应"""
         if heart_delta < 0:
             # 负面选择 - 开心
-            dialogue = random.choice(BOSS_DIALOGUES['happy_negative'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['happy_negative'])
             if money_delta > 30:
                 dialogue = f"{dialogue}\n+${money_delta}!"
             self.set_mood("happy", dialogue)
         elif heart_delta > 0:
             # 正面选择 - 生气
-            dialogue = random.choice(BOSS_DIALOGUES['angry_positive'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['angry_positive'])
             self.set_mood("angry", dialogue)
         else:
             # 中性选择
@@ -299,11 +359,11 @@ class CanteenBoss:
     def react_to_event(self, event_type):
         """对事件做出反应"""
         if 'complaint' in event_type:
-            dialogue = random.choice(BOSS_DIALOGUES['complaint'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['complaint'])
         elif 'inspection' in event_type:
-            dialogue = random.choice(BOSS_DIALOGUES['inspector'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['inspector'])
         elif 'warning' in event_type:
-            dialogue = random.choice(BOSS_DIALOGUES['warning'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['warning'])
         else:
             dialogue = "Handle this quickly!"
         self.set_mood("neutral", dialogue)
@@ -325,7 +385,7 @@ class CanteenBoss:
         # 检测诚信变化并做出反应
         if hearts > self.last_hearts and self.last_hearts <= 5:
             # 诚信恢复了，老板不满
-            dialogue = random.choice(BOSS_DIALOGUES['upset_recovery'])
+            dialogue = self.talk.choice(BOSS_DIALOGUES['upset_recovery'])
             self.set_mood("angry", dialogue)
         self.last_hearts = hearts
         
@@ -333,6 +393,7 @@ class CanteenBoss:
         self.creepy_level = max(0.0, min(1.0, 1.0 - (hearts / max_hearts)))
         
         # 眼睛跟随鼠标
+        self.prev_eye_offset = list(self.eye_offset)
         mx, my = pygame.mouse.get_pos()
         dx = mx - self.x
         dy = my - self.y
@@ -343,7 +404,7 @@ class CanteenBoss:
         
         # 眨眼
         self.blink_timer += dt
-        if self.blink_timer > random.randint(2000, 5000):
+        if self.blink_timer > self.rng.randint(2000, 5000):
             self.is_blinking = True
             self.blink_timer = 0
         if self.is_blinking:
@@ -354,7 +415,7 @@ class CanteenBoss:
         
         # 诡异状态下的抖动
         if self.creepy_level > 0.5:
-            self.shake_amount = random.randint(0, int(5 * self.creepy_level))
+            self.shake_amount = self.rng.randint(0, int(5 * self.creepy_level))
         else:
             self.shake_amount = 0
         
@@ -389,10 +450,96 @@ class CanteenBoss:
             self.current_text = text
             self.text_timer = 3000
     
-    def draw(self, surf, font=None):
-        """绘制食堂老板"""
-        x = self.x + random.randint(-self.shake_amount, self.shake_amount)
-        y = self.y + random.randint(-self.shake_amount, self.shake_amount)
+    def eye_at(self, alpha=1.0):
+        """上一步和当前步之间插值的眼睛偏移 (alpha 来自固定步长调度器)"""
+        return (round(lerp(self.prev_eye_offset[0], self.eye_offset[0], alpha), 1),
+                round(lerp(self.prev_eye_offset[1], self.eye_offset[1], alpha), 1))
+
+    def draw(self, surf, font=None, alpha=1.0):
+        """绘制食堂老板 - 缓存的静态图层 + 每帧的瞳孔/血丝"""
+        x = self.x + self.rng.randint(-self.shake_amount, self.shake_amount)
+        y = self.y + self.rng.randint(-self.shake_amount, self.shake_amount)
+        try:
+            ox, oy = self.SPRITE_ORIGIN
+            surf.blit(self._static_layer(), (x - ox, y - oy))
+            if not self.is_blinking:
+                self._draw_pupils(surf, x, y, self.eye_at(alpha))
+            if self.text_timer > 0 and font:
+                bubble, bx, by = self._speech_layer(font)
+                surf.blit(bubble, (x + bx, y + by))
+        except Exception:
+            self.draw_immediate(surf, font, x, y)
+
+    def damage(self, damage, font=None, alpha=1.0):
+        """报告老板 (含对话气泡和抖动范围) 占用的区域；诡异时抖动和血丝每帧随机，总是脏"""
+        jitter = int(5 * self.creepy_level) if self.creepy_level > 0.5 else 0
+        ox, oy = self.SPRITE_ORIGIN
+        rect = pygame.Rect(self.x - ox, self.y - oy, *self.SPRITE_SIZE)
+        speech = None
+        if self.text_timer > 0 and font:
+            try:
+                bubble, bx, by = self._speech_layer(font)
+                rect.union_ip(pygame.Rect(self.x + bx, self.y + by, *bubble.get_size()))
+                speech = self.current_text
+            except Exception:
+                pass
+        state = (self._sprite_level(), self.mood, self.is_blinking, self.eye_at(alpha), speech,
+                 self.pulse if jitter else None)
+        damage.track(('boss', id(self)), rect.inflate(jitter * 2, jitter * 2), state)
+
+    def _sprite_level(self):
+        # hearts are integers, so creepy_level moves in 0.1 steps; 0.05 buckets are exact
+        return int(round(self.creepy_level * 20))
+
+    def _static_layer(self):
+        key = (self._sprite_level(), self.mood, self.is_blinking)
+        cache = CanteenBoss._sprite_cache
+        layer = cache.get(key)
+        if layer is not None:
+            cache.move_to_end(key)
+            return layer
+
+        ox, oy = self.SPRITE_ORIGIN
+        layer = pygame.Surface(self.SPRITE_SIZE, pygame.SRCALPHA)
+        self._draw_body(layer, ox, oy)
+        self._draw_face(layer, ox, oy)
+        self._draw_eye_whites(layer, ox, oy)
+        self._draw_mouth(layer, ox, oy)
+        self._draw_chef_hat(layer, ox, oy)
+        cache[key] = layer
+        while len(cache) > self.SPRITE_CACHE_MAX:
+            cache.popitem(last=False)
+        return layer
+
+    def _speech_layer(self, font):
+        """对话气泡图层，返回 (surface, 相对老板中心的x偏移, y偏移)"""
+        key = (self.current_text, self._sprite_level(), id(font))
+        cache = CanteenBoss._speech_cache
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+            return entry[1]
+
+        text_lines = self.current_text.split('\n')
+        max_width = max(font.size(line)[0] for line in text_lines) + 30
+        height = len(text_lines) * 28 + 20
+        # bubble plus the 15px tail (and its 2px outline) below it
+        bubble = pygame.Surface((max_width, height + 17), pygame.SRCALPHA)
+        # _draw_speech places the bubble at (x - max_width//2, y - 180 - height)
+        self._draw_speech(bubble, max_width // 2, 180 + height, font)
+        result = (bubble, -(max_width // 2), -180 - height)
+        # keep the font referenced so its id() stays unique while cached
+        cache[key] = (font, result)
+        while len(cache) > self.SPEECH_CACHE_MAX:
+            cache.popitem(last=False)
+        return result
+
+    def draw_immediate(self, surf, font=None, x=None, y=None):
+        """不使用缓存，逐个图元直接绘制（缓存失败时的后备路径，也用于基准对比）"""
+        if x is None:
+            x = self.x + self.rng.randint(-self.shake_amount, self.shake_amount)
+        if y is None:
+            y = self.y + self.rng.randint(-self.shake_amount, self.shake_amount)
         
         # 身体/围裙
         self._draw_body(surf, x, y)
@@ -445,44 +592,56 @@ class CanteenBoss:
     
     def _draw_eyes(self, surf, x, y):
         """绘制眼睛 - 核心的Mr.TomatoS风格效果"""
+        self._draw_eye_whites(surf, x, y)
+        if not self.is_blinking:
+            self._draw_pupils(surf, x, y)
+
+    def _draw_eye_whites(self, surf, x, y):
+        """眼白或闭眼线 - 只随诡异等级和眨眼变化，可以缓存"""
         eye_y = y - 20
-        left_eye_x = x - 30
-        right_eye_x = x + 30
         
         # 眼睛大小随诡异程度增大
         eye_size = int(self.eye_size * (1 + self.creepy_level * 0.5))
-        pupil_size = int(self.pupil_size * (1 + self.creepy_level * 0.3))
         
         outline_color = lerp_color((200, 150, 120), (100, 80, 90), self.creepy_level)
         
-        for ex in [left_eye_x, right_eye_x]:
-            # 眼白
+        for ex in [x - 30, x + 30]:
             if not self.is_blinking:
+                # 眼白
                 pygame.draw.ellipse(surf, self.eye_color, 
                                    (ex - eye_size//2, eye_y - eye_size//2, eye_size, eye_size))
-                
-                # 诡异时添加血丝
-                if self.creepy_level > 0.5:
-                    for _ in range(int(self.creepy_level * 5)):
-                        angle = random.random() * math.pi * 2
-                        length = random.randint(5, eye_size//2 - 5)
-                        ex2 = ex + math.cos(angle) * length
-                        ey2 = eye_y + math.sin(angle) * length
-                        pygame.draw.line(surf, (200, 100, 100), (ex, eye_y), (int(ex2), int(ey2)), 1)
-                
-                # 瞳孔 - 跟随鼠标移动
-                px = ex + self.eye_offset[0]
-                py = eye_y + self.eye_offset[1]
-                pygame.draw.circle(surf, self.pupil_color, (int(px), int(py)), pupil_size)
-                
-                # 高光
-                pygame.draw.circle(surf, (255, 255, 255), 
-                                  (int(px - pupil_size//3), int(py - pupil_size//3)), 
-                                  pupil_size//3)
             else:
                 # 闭眼
                 pygame.draw.line(surf, outline_color,
                                (ex - eye_size//2, eye_y), (ex + eye_size//2, eye_y), 3)
+
+    def _draw_pupils(self, surf, x, y, eye=None):
+        """血丝、瞳孔和高光 - 跟随鼠标，每帧绘制"""
+        if eye is None:
+            eye = self.eye_offset
+        eye_y = y - 20
+        eye_size = int(self.eye_size * (1 + self.creepy_level * 0.5))
+        pupil_size = int(self.pupil_size * (1 + self.creepy_level * 0.3))
+        
+        for ex in [x - 30, x + 30]:
+            # 诡异时添加血丝
+            if self.creepy_level > 0.5:
+                for _ in range(int(self.creepy_level * 5)):
+                    angle = self.rng.random() * math.pi * 2
+                    length = self.rng.randint(5, eye_size//2 - 5)
+                    ex2 = ex + math.cos(angle) * length
+                    ey2 = eye_y + math.sin(angle) * length
+                    pygame.draw.line(surf, (200, 100, 100), (ex, eye_y), (int(ex2), int(ey2)), 1)
+            
+            # 瞳孔 - 跟随鼠标移动
+            px = ex + eye[0]
+            py = eye_y + eye[1]
+            pygame.draw.circle(surf, self.pupil_color, (int(px), int(py)), pupil_size)
+            
+            # 高光
+            pygame.draw.circle(surf, (255, 255, 255), 
+                              (int(px - pupil_size//3), int(py - pupil_size//3)), 
+                              pupil_size//3)
     
     def _draw_mouth(self, surf, x, y):
         """绘制嘴巴"""
@@ -558,45 +717,45 @@ class CanteenBoss:
         
         # 文字
         for i, line in enumerate(text_lines):
-            txt_surf = font.render(line, True, text_color)
+            txt_surf = render_text(font, line, True, text_color)
             surf.blit(txt_surf, (bubble_x + 15, bubble_y + 10 + i * 28))
 
 
 def wrap_text(text, font, max_width):
-    """Simple word-wrap: return list of lines that fit within max_width using font.size()."""
-    words = text.split(' ')
-    lines = []
-    cur = ''
-    for w in words:
-        test = (cur + ' ' + w).strip()
-        if font.size(test)[0] <= max_width:
-            cur = test
-        else:
-            if cur:
-                lines.append(cur)
-            # if single word longer than max_width, force-break
-            if font.size(w)[0] > max_width:
-                # break the word into characters
-                part = ''
-                for ch in w:
-                    if font.size(part + ch)[0] <= max_width:
-                        part += ch
-                    else:
-                        if part:
-                            lines.append(part)
-                        part = ch
-                if part:
-                    cur = part
-                else:
-                    cur = ''
-            else:
-                cur = w
-    if cur:
-        lines.append(cur)
-    return lines
+    """deprecated: wrapping lives in utils.layout (kept for compatibility)"""
+    return wrap_lines(font, text, max_width)
 
 
 # --- Sound helper -------------------------------------------------
+# 每类音效按顺序尝试的文件名 (assets/sounds/ 下第一个存在的)
+SFX_FILES = {
+    # 点击音效 - 优先使用 Videogame Menu BUTTON CLICK
+    'click': ['Videogame Menu BUTTON CLICK.wav', 'Button Click 1.wav', 'Tic Toc Click.wav',
+              'click.wav', 'click.ogg', 'select.wav', 'select.ogg'],
+    # 选择音效 - 使用 Tic Toc Click
+    'select': ['Tic Toc Click.wav', 'Button Click 1.wav', 'select.wav', 'select.ogg'],
+    # 收银机音效 - 用于老板开心时（赚钱了！）
+    'cash': ['Cash Register Purchase.wav', 'old cash register.wav', 'cash.wav', 'money.wav'],
+}
+BGM_FILES = ['bgm_warm.ogg', 'bgm.ogg', 'bgm.mp3', 'bgm.wav', 'music.ogg', 'music.mp3']
+# 每类音效预留的声道数、优先级 (高的可以借用低的空闲声道) 和同类重复触发的最短间隔
+SFX_CATEGORIES = {
+    'click': {'channels': 2, 'priority': 1, 'min_interval_ms': 40},
+    'select': {'channels': 2, 'priority': 1, 'min_interval_ms': 40},
+    'cash': {'channels': 1, 'priority': 2, 'min_interval_ms': 150},
+}
+# 分层 BGM: (名字, 源文件, 减速倍数)，按诡异程度从低到高排列，由 MusicEngine 交叉淡化
+# 还没有单独的诡异配乐，先用温馨配乐的半速版本 (低一个八度) 充当
+MUSIC_STEMS = [
+    ('warm', os.path.join('assets', 'sounds', 'bgm_warm.ogg'), 1),
+    ('creepy', os.path.join('assets', 'sounds', 'bgm_warm.ogg'), 2),
+]
+# compressed stems are converted to streamable WAV here (tools/build_music.py, or on first use; not tracked by git)
+MUSIC_CACHE_DIR = 'music_cache'
+# mixer buffer in samples (~11.6 ms at 44.1 kHz); part of the click-to-audio latency
+MIXER_BUFFER = 512
+
+
 class SoundManager:
     def __init__(self):
         self.available = False
@@ -604,117 +763,95 @@ class SoundManager:
         self.select = None
         self.cash_register = None
         self.bgm_path = None
+        self.sfx = None
+        self.music = None
         try:
             # initialize mixer with reasonable defaults; ignore failures
-            pygame.mixer.init(frequency=44100)
+            pygame.mixer.init(frequency=44100, buffer=MIXER_BUFFER)
             self.available = True
         except Exception:
             print("[SoundManager] audio mixer unavailable; continuing without sound")
             self.available = False
             return
 
-        # try load common sfx names from assets/sounds
         sfx_dir = os.path.join('assets', 'sounds')
         try:
-            # 点击音效 - 优先使用 Videogame Menu BUTTON CLICK
-            click_candidates = [
-                'Videogame Menu BUTTON CLICK.wav',
-                'Button Click 1.wav',
-                'Tic Toc Click.wav',
-                'click.wav', 'click.ogg', 'select.wav', 'select.ogg'
-            ]
-            for fn in click_candidates:
-                p = os.path.join(sfx_dir, fn)
-                if os.path.exists(p):
-                    try:
-                        self.click = pygame.mixer.Sound(p)
-                        print(f"[SoundManager] Loaded click sound: {fn}")
-                        break
-                    except Exception:
-                        self.click = None
-            
-            # 选择音效 - 使用 Tic Toc Click
-            select_candidates = [
-                'Tic Toc Click.wav',
-                'Button Click 1.wav',
-                'select.wav', 'select.ogg'
-            ]
-            for fn in select_candidates:
-                p = os.path.join(sfx_dir, fn)
-                if os.path.exists(p):
-                    try:
-                        self.select = pygame.mixer.Sound(p)
-                        print(f"[SoundManager] Loaded select sound: {fn}")
-                        break
-                    except Exception:
-                        self.select = None
-            
-            # 收银机音效 - 用于老板开心时（赚钱了！）
-            cash_candidates = [
-                'Cash Register Purchase.wav',
-                'old cash register.wav',
-                'cash.wav', 'money.wav'
-            ]
-            for fn in cash_candidates:
-                p = os.path.join(sfx_dir, fn)
-                if os.path.exists(p):
-                    try:
-                        self.cash_register = pygame.mixer.Sound(p)
-                        print(f"[SoundManager] Loaded cash register sound: {fn}")
-                        break
-                    except Exception:
-                        self.cash_register = None
-
-            # background music: try common names
-            bgm_candidates = [
-                'bgm_warm.ogg', 'bgm.ogg', 'bgm.mp3', 'bgm.wav', 
-                'music.ogg', 'music.mp3'
-            ]
-            for name in bgm_candidates:
-                p = os.path.join(sfx_dir, name)
-                if os.path.exists(p):
-                    try:
-                        self.bgm_path = p
-                        print(f"[SoundManager] Found BGM: {name}")
-                        break
-                    except Exception:
-                        self.bgm_path = None
+            # one directory listing instead of an exists() probe per candidate
+            present = set(os.listdir(sfx_dir))
         except Exception:
-            pass
+            present = set()
+        try:
+            self.sfx = SfxEngine(SFX_CATEGORIES, buffer_samples=MIXER_BUFFER)
+        except Exception as e:
+            print(f"[SoundManager] channel pool unavailable ({e}); continuing without sound effects")
+        for name, candidates in SFX_FILES.items():
+            for fn in candidates:
+                if fn not in present:
+                    continue
+                try:
+                    # decoded ahead of time by the asset store
+                    sound = assets.sound(os.path.join(sfx_dir, fn))
+                except Exception:
+                    continue
+                if self.sfx:
+                    self.sfx.register(name, sound)
+                setattr(self, 'cash_register' if name == 'cash' else name, sound)
+                print(f"[SoundManager] Loaded {name} sound: {fn}")
+                break
+        for fn in BGM_FILES:
+            if fn in present:
+                self.bgm_path = os.path.join(sfx_dir, fn)
+                print(f"[SoundManager] Found BGM: {fn}")
+                break
 
-    def play_click(self):
+    def _play(self, name):
         try:
-            if not self.available:
-                return
-            if self.click:
-                self.click.play()
+            if self.available and self.sfx:
+                self.sfx.play(name)
         except Exception:
             pass
 
+    def mark_input(self):
+        """输入事件到达时调用，用来测量点击到出声的延迟"""
+        if self.sfx:
+            self.sfx.mark_input()
+
+    def end_input(self):
+        if self.sfx:
+            self.sfx.end_input()
+
+    def play_click(self):
+        self._play('click')
+
     def play_select(self):
-        try:
-            if not self.available:
-                return
-            if self.select:
-                self.select.play()
-            elif self.click:
-                self.click.play()
-        except Exception:
-            pass
-    
+        if self.sfx and not self.sfx.has('select'):
+            self._play('click')
+        else:
+            self._play('select')
+
     def play_cash_register(self):
         """播放收银机音效 - 老板开心时播放"""
-        try:
-            if not self.available:
-                return
-            if self.cash_register:
-                self.cash_register.play()
-        except Exception:
-            pass
+        self._play('cash')
+
+    def stats(self):
+        stats = self.sfx.stats() if self.sfx else {}
+        if self.music:
+            stats['music'] = self.music.stats()
+        return stats
 
     def play_bgm(self, loop=True):
         try:
-            if not self.available or not self.bgm_path:
+            if not self.available:
+                return
+            # layered BGM that follows the creepiness level; falls back to the single track below
+            if loop and self.music is None and all(os.path.exists(path) for _, path, _ in MUSIC_STEMS):
+                try:
+                    self.music = MusicEngine(MUSIC_STEMS, volume=0.5, cache_dir=MUSIC_CACHE_DIR).start()
+                    return
+                except Exception as e:
+                    print(f"[SoundManager] music engine unavailable ({e}); playing {self.bgm_path}")
+                    self.music = None
+            if not self.bgm_path:
                 return
             # use mixer.music for streaming bgm
             try:
@@ -726,10 +863,18 @@ class SoundManager:
         except Exception:
             pass
 
+    def set_mood(self, creepy_level):
+        """BGM 的交叉淡化目标 (老板的诡异程度 0-1)"""
+        if self.music:
+            self.music.set_level(creepy_level)
+
     def stop_bgm(self):
         try:
             if not self.available:
                 return
+            if self.music:
+                self.music.stop()
+                self.music = None
             pygame.mixer.music.stop()
         except Exception:
             pass
@@ -747,9 +892,13 @@ class Button:
         mpos = pygame.mouse.get_pos()
         c = self.hover if self.rect.collidepoint(mpos) else self.color
         pygame.draw.rect(surf, c, self.rect, border_radius=8)
-        txt = self.font.render(self.text, True, (255, 255, 255))
+        txt = render_text(self.font, self.text, True, (255, 255, 255))
         surf.blit(txt, txt.get_rect(center=self.rect.center))
 
+    def damage(self, damage):
+        """悬停状态变化时报告按钮区域"""
+        damage.track(('button', id(self)), self.rect, (self.rect.collidepoint(pygame.mouse.get_pos()), self.text))
+
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             if self.rect.collidepoint(event.pos):
@@ -783,13 +932,19 @@ class AnimatedButton(Button):
             self.hover_color = (130, 130, 150)
             self.icon = "~"
 
-    def draw(self, surf):
-        mpos = pygame.mouse.get_pos()
-        hovered = self.rect.collidepoint(mpos)
+    def reset(self):
+        """回到刚创建时的动画状态 (场景复用时调用)"""
+        self.scale = 1.0
+        self.target_scale = 1.0
+        self.pressed = False
+        self.pulse = 0
+
+    def animate(self):
+        """推进脉冲和缩放动画 (每帧一次，由场景的 update 调用)"""
+        hovered = self.rect.collidepoint(pygame.mouse.get_pos())
         
         # 脉冲动画
         self.pulse += 0.1
-        pulse_offset = math.sin(self.pulse) * 2 if hovered else 0
         
         if hovered:
             self.target_scale = 1.05
@@ -801,18 +956,32 @@ class AnimatedButton(Button):
             self.scale = min(self.scale + 0.04, self.target_scale)
         elif self.scale > self.target_scale:
             self.scale = max(self.scale - 0.04, self.target_scale)
+        # keep the number of distinct sizes small so scaled art stays cached
+        self.scale = quantize_scale(self.scale)
 
+    def _draw_rect(self, hovered):
         # compute scaled rect centered on original rect center
+        pulse_offset = math.sin(self.pulse) * 2 if hovered else 0
         w = int(self.rect.width * self.scale)
         h = int(self.rect.height * self.scale)
         cx, cy = self.rect.center
         draw_rect = pygame.Rect(0, 0, w, h)
         draw_rect.center = (cx, int(cy + pulse_offset))
+        return draw_rect
+
+    def damage(self, damage):
+        hovered = self.rect.collidepoint(pygame.mouse.get_pos())
+        damage.track(('button', id(self)), self._draw_rect(hovered), (hovered, self.text))
+
+    def draw(self, surf):
+        mpos = pygame.mouse.get_pos()
+        hovered = self.rect.collidepoint(mpos)
+        draw_rect = self._draw_rect(hovered)
 
         # 绘制按钮背景
         if getattr(self, 'bg_image', None):
             try:
-                bi = pygame.transform.smoothscale(self.bg_image, (draw_rect.width, draw_rect.height))
+                bi = cached_smoothscale(self.bg_image, (draw_rect.width, draw_rect.height))
                 surf.blit(bi, draw_rect.topleft)
             except Exception:
                 c = self.hover_color if hovered else self.base_color
@@ -833,7 +1002,7 @@ class AnimatedButton(Button):
             # 使用图标图片
             icon_size = min(draw_rect.height - 8, 48)
             try:
-                scaled_icon = pygame.transform.smoothscale(self.icon_image, (icon_size, icon_size))
+                scaled_icon = cached_smoothscale(self.icon_image, (icon_size, icon_size))
                 surf.blit(scaled_icon, (icon_x, icon_y - icon_size // 2))
                 icon_x += icon_size + 4
             except Exception:
@@ -851,7 +1020,7 @@ class AnimatedButton(Button):
                 icon_color = (200, 200, 200)
                 icon_text = "~"
             
-            icon_surf = icon_font.render(icon_text, True, icon_color)
+            icon_surf = render_text(icon_font, icon_text, True, icon_color)
             surf.blit(icon_surf, (icon_x, icon_y - icon_surf.get_height() // 2))
             icon_x += icon_surf.get_width() + 4
 
@@ -862,7 +1031,7 @@ class AnimatedButton(Button):
             text_color = (20, 60, 20)  # 深绿色
         else:
             text_color = (40, 40, 40)  # 深灰色
-        txt = self.font.render(self.text, True, text_color)
+        txt = render_text(self.font, self.text, True, text_color)
         text_x = icon_x + (draw_rect.right - icon_x) // 2
         text_y = draw_rect.centery
         surf.blit(txt, txt.get_rect(center=(text_x, text_y)))
@@ -911,7 +1080,7 @@ class HeartBar:
                     is_empty = (i >= value)
                     if img:
                         try:
-                            img_s = pygame.transform.smoothscale(img, (size, size))
+                            img_s = cached_smoothscale(img, (size, size))
                             surf.blit(img_s, (xi, yi))
                         except Exception:
                             # if scaling/blit fails, draw a simple polygon placeholder for full hearts
@@ -939,7 +1108,7 @@ class HeartBar:
                 is_empty = (i >= value)
                 if img:
                     try:
-                        img_s = pygame.transform.smoothscale(img, (size, size))
+                        img_s = cached_smoothscale(img, (size, size))
                         surf.blit(img_s, (xi, yi))
                     except Exception:
                         if not is_empty:
@@ -955,6 +1124,46 @@ class HeartBar:
         pass
 
 
+class BackgroundCompositor:
+    """
+    背景图层合成器 - 条纹+背景图只在 (场景, 诡异等级) 第一次出现时合成一次
+    之后每帧只需一次blit；窗口尺寸变化时全部重建
+    """
+    def __init__(self, max_layers=12):
+        self.max_layers = max_layers
+        self._layers = OrderedDict()
+        self._size = None
+        self.builds = 0
+
+    def get(self, scene_key, creepy_level, size, build):
+        """build(layer, creepy_level) draws the background into a blank layer"""
+        if size != self._size:
+            self._layers.clear()
+            self._size = size
+        # creepy_level comes from integer hearts (0-10), so 11 levels cover every case
+        level = int(round(creepy_level * 10))
+        key = (scene_key, level)
+        layer = self._layers.get(key)
+        if layer is not None:
+            self._layers.move_to_end(key)
+            return layer
+
+        layer = pygame.Surface(size)
+        build(layer, level / 10.0)
+        try:
+            layer = layer.convert()
+        except Exception:
+            pass
+        self.builds += 1
+        self._layers[key] = layer
+        while len(self._layers) > self.max_layers:
+            self._layers.popitem(last=False)
+        return layer
+
+    def clear(self):
+        self._layers.clear()
+
+
 class SceneBase:
     def __init__(self, game):
         self.game = game
@@ -971,6 +1180,71 @@ class SceneBase:
     def render(self, surf):
         pass
 
+    def damage(self, damage):
+        """报告这一帧变化的区域；没有实现的场景每帧整屏重绘"""
+        damage.full()
+
+    def is_static(self):
+        """没有动画也没有计时器，只会因为输入而变化 (调度器可以一直阻塞等事件)"""
+        return False
+
+    def _damage_instruction(self, damage):
+        # 说明弹窗出现/消失会改变整屏的遮罩，打字机推进只影响弹窗本身
+        show = getattr(self, 'show_instruction', False)
+        screen = damage.screen_rect
+        damage.track(('overlay', id(self)), screen if show else None)
+        box = pygame.Rect(0, 0, 760, 160)
+        box.center = screen.center
+        damage.track(('instruction', id(self)), box if show else None, int(getattr(self, 'instruction_progress', 0)))
+
+    def _instruction_typewriter(self, font):
+        # 说明弹窗的打字机文本，字体或文本变化时重建
+        typed = getattr(self, '_instruction_typed', None)
+        text = getattr(self, 'instruction_text', '')
+        if typed is None or typed.font is not font or typed.text != text:
+            typed = TypewriterText(font, text, (240, 240, 240))
+            self._instruction_typed = typed
+        return typed
+
+
+class LoadingScene(SceneBase):
+    """
+    加载画面 - 后台线程解码资源时显示进度条；每帧在预算内把解码好的资源提交到主线程，
+    全部提交后由 Game 创建各个场景
+    """
+    def __init__(self, game):
+        super().__init__(game)
+        # the only font loaded synchronously: the loading screen needs it for its first frame
+        self.font = load_font(FONT_REGULAR, 24)
+        self.title_font = load_font(FONT_PLUS, 48)
+        self.bar = pygame.Rect(0, 0, 480, 18)
+        self.bar.center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 20)
+
+    def update(self, dt):
+        assets.commit(LOADING_BUDGET_MS)
+        if assets.done:
+            self.game.finish_loading()
+
+    def damage(self, damage):
+        # 只有进度条和下面的文件名会变
+        area = self.bar.inflate(200, 80)
+        damage.track('loading', area, (assets.committed, assets.current))
+
+    def render(self, surf):
+        surf.fill(COLOR_BG_CREEPY)
+        title = render_text(self.title_font, 'Loading...', True, COLOR_BG_WARM)
+        surf.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, self.bar.y - 90))
+        pygame.draw.rect(surf, COLOR_PANEL_DARK, self.bar, border_radius=4)
+        fill = self.bar.copy()
+        fill.width = int(self.bar.width * assets.progress())
+        if fill.width > 0:
+            pygame.draw.rect(surf, COLOR_ACCENT, fill, border_radius=4)
+        pct = render_text(self.font, f"{int(assets.progress() * 100)}%", True, COLOR_BG_WARM)
+        surf.blit(pct, (self.bar.right + 12, self.bar.centery - pct.get_height() // 2))
+        if assets.current:
+            name = render_text(self.font, assets.current, True, (160, 140, 140))
+            surf.blit(name, (WINDOW_WIDTH // 2 - name.get_width() // 2, self.bar.bottom + 12))
+
 
 class TitleScene(SceneBase):
     def __init__(self, game):
@@ -985,10 +1259,12 @@ class TitleScene(SceneBase):
         btn_color = (229, 0, 43)
         btn_hover = (255, 60, 80)
         # button rects - 右侧区域，不与老板重叠
-        start_rect = (WINDOW_WIDTH//2 + 80, 350, 320, 60)
-        archive_rect = (WINDOW_WIDTH//2 + 80, 430, 320, 60)  # 档案馆按钮
-        quit_rect = (WINDOW_WIDTH//2 + 80, 510, 320, 60)
+        start_rect = (WINDOW_WIDTH//2 + 80, 310, 320, 60)
+        campaign_rect = (WINDOW_WIDTH//2 + 80, 385, 320, 60)  # 多日经营 (有存档时继续)
+        archive_rect = (WINDOW_WIDTH//2 + 80, 460, 320, 60)  # 档案馆按钮
+        quit_rect = (WINDOW_WIDTH//2 + 80, 535, 320, 60)
         self.start_btn = Button(start_rect, "Start Game", self.btn_font, color=btn_color, hover=btn_hover)
+        self.campaign_btn = Button(campaign_rect, "Campaign", self.btn_font, color=btn_color, hover=btn_hover)
         self.archive_btn = Button(archive_rect, "Archive", self.btn_font, color=btn_color, hover=btn_hover)
         self.quit_btn = Button(quit_rect, "Quit", self.btn_font, color=btn_color, hover=btn_hover)
         
@@ -1016,6 +1292,13 @@ class TitleScene(SceneBase):
                 except Exception:
                     pass
                 self.game.start_new_run()
+            if self.campaign_btn.handle_event(e):
+                try:
+                    if getattr(self.game, 'sound', None):
+                        self.game.sound.play_click()
+                except Exception:
+                    pass
+                self.game.start_campaign()
             if self.archive_btn.handle_event(e):
                 try:
                     if getattr(self.game, 'sound', None):
@@ -1029,9 +1312,18 @@ class TitleScene(SceneBase):
                         self.game.sound.play_click()
                 except Exception:
                     pass
-                pygame.quit(); sys.exit()
+                # leave through the main loop so the save, profiler trace and replay are closed properly
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
 
-    def render(self, surf):
+    def update(self, dt):
+        self.preview_boss.update(dt, 10, 10)  # 温馨状态
+
+    def damage(self, damage):
+        self.preview_boss.damage(damage, load_font("assets/fonts/m6x11.ttf", 20), self.game.frame_alpha)
+        for btn in (self.start_btn, self.campaign_btn, self.archive_btn, self.quit_btn):
+            btn.damage(damage)
+
+    def _draw_background(self, surf, creepy_level):
         # ==================== Mr.TomatoS风格: 温馨背景 ====================
         surf.fill(COLOR_BG_WARM)
         
@@ -1049,48 +1341,65 @@ class TitleScene(SceneBase):
                 surf.blit(self.bg, (0, 0))
         except Exception:
             pass
+
+    def render(self, surf):
+        # 标题界面始终是温馨状态，背景图层只合成一次
+        with profile_section('render.background'):
+            surf.blit(self.game.backgrounds.get('title', 0.0, surf.get_size(), self._draw_background), (0, 0))
         
         # ==================== Mr.TomatoS风格: 绘制预览老板 ====================
-        self.preview_boss.update(16, 10, 10)  # 温馨状态
-        preview_font = load_font("assets/fonts/m6x11.ttf", 20)
-        self.preview_boss.draw(surf, preview_font)
+        with profile_section('render.boss'):
+            preview_font = load_font("assets/fonts/m6x11.ttf", 20)
+            self.preview_boss.draw(surf, preview_font, self.game.frame_alpha)
         
         # 标题已删除 - 只保留老板和按钮
+        with profile_section('render.buttons'):
+            self._draw_buttons(surf)
         
+        # 风格说明
+        style_font = load_font("assets/fonts/m6x11.ttf", 18)
+        style_text = "Inspired by Mr.TomatoS"
+        style_surf = render_text(style_font, style_text, True, (150, 150, 150))
+        surf.blit(style_surf, (20, WINDOW_HEIGHT - 30))
+
+    def _draw_buttons(self, surf):
         # draw Start/Archive/Quit buttons
         if getattr(self, 'start_img', None):
             surf.blit(self.start_img, self.start_btn.rect.topleft)
-            txt = self.btn_font.render(self.start_btn.text, True, (185,12,12))
+            txt = render_text(self.btn_font, self.start_btn.text, True, (185,12,12))
             surf.blit(txt, txt.get_rect(center=self.start_btn.rect.center))
         else:
             self.start_btn.draw(surf)
-            txt = self.btn_font.render(self.start_btn.text, True, (185,12,12))
+            txt = render_text(self.btn_font, self.start_btn.text, True, (185,12,12))
             surf.blit(txt, txt.get_rect(center=self.start_btn.rect.center))
 
-        # Archive button - 与Start统一风格
+        # Campaign / Archive buttons - 与Start统一风格
+        if getattr(self, 'start_img', None):
+            surf.blit(self.start_img, self.campaign_btn.rect.topleft)
+            txt = render_text(self.btn_font, self.campaign_btn.text, True, (185,12,12))
+            surf.blit(txt, txt.get_rect(center=self.campaign_btn.rect.center))
+        else:
+            self.campaign_btn.draw(surf)
+            txt = render_text(self.btn_font, self.campaign_btn.text, True, (185,12,12))
+            surf.blit(txt, txt.get_rect(center=self.campaign_btn.rect.center))
+
         if getattr(self, 'start_img', None):
             surf.blit(self.start_img, self.archive_btn.rect.topleft)
-            txt = self.btn_font.render(self.archive_btn.text, True, (185,12,12))
+            txt = render_text(self.btn_font, self.archive_btn.text, True, (185,12,12))
             surf.blit(txt, txt.get_rect(center=self.archive_btn.rect.center))
         else:
             self.archive_btn.draw(surf)
-            txt = self.btn_font.render(self.archive_btn.text, True, (185,12,12))
+            txt = render_text(self.btn_font, self.archive_btn.text, True, (185,12,12))
             surf.blit(txt, txt.get_rect(center=self.archive_btn.rect.center))
 
         if getattr(self, 'quit_img', None):
             surf.blit(self.quit_img, self.quit_btn.rect.topleft)
-            txt = self.btn_font.render(self.quit_btn.text, True, (255,255,255))
+            txt = render_text(self.btn_font, self.quit_btn.text, True, (255,255,255))
             surf.blit(txt, txt.get_rect(center=self.quit_btn.rect.center))
         else:
             self.quit_btn.draw(surf)
-            txt = self.btn_font.render(self.quit_btn.text, True, (255,255,255))
+            txt = render_text(self.btn_font, self.quit_btn.text, True, (255,255,255))
             surf.blit(txt, txt.get_rect(center=self.quit_btn.rect.center))
-        
-        # 风格说明
-        style_font = load_font("assets/fonts/m6x11.ttf", 18)
-        style_text = "Inspired by Mr.TomatoS"
-        style_surf = style_font.render(style_text, True, (150, 150, 150))
-        surf.blit(style_surf, (20, WINDOW_HEIGHT - 30))
 
 
 class ArchiveScene(SceneBase):
@@ -1124,6 +1433,13 @@ class ArchiveScene(SceneBase):
                 except Exception:
                     pass
                 self.game.change_scene('title')
+
+    def damage(self, damage):
+        # 卡片只在进入时变化 (切场景会整屏重绘)，之后只有返回按钮的悬停
+        self.back_btn.damage(damage)
+
+    def is_static(self):
+        return True
                 
     def render(self, surf):
         # 深色背景
@@ -1131,19 +1447,19 @@ class ArchiveScene(SceneBase):
         
         # 标题
         title_text = "ARCHIVE"
-        title_surf = self.title_font.render(title_text, True, (200, 180, 220))
+        title_surf = render_text(self.title_font, title_text, True, (200, 180, 220))
         surf.blit(title_surf, title_surf.get_rect(center=(WINDOW_WIDTH // 2, 60)))
         
         # 副标题
         sub_text = "Endings Collection"
-        sub_surf = self.font.render(sub_text, True, (150, 140, 160))
+        sub_surf = render_text(self.font, sub_text, True, (150, 140, 160))
         surf.blit(sub_surf, sub_surf.get_rect(center=(WINDOW_WIDTH // 2, 100)))
         
         # 已解锁数量
         unlocked_count = len(self.unlocked) if hasattr(self, 'unlocked') else 0
         total_count = len(ALL_ENDINGS)
         count_text = f"Unlocked: {unlocked_count}/{total_count}"
-        count_surf = self.small_font.render(count_text, True, (120, 110, 130))
+        count_surf = render_text(self.small_font, count_text, True, (120, 110, 130))
         surf.blit(count_surf, count_surf.get_rect(center=(WINDOW_WIDTH // 2, 130)))
         
         # 绘制结局卡片
@@ -1160,7 +1476,7 @@ class ArchiveScene(SceneBase):
         
         # 返回按钮
         self.back_btn.draw(surf)
-        txt = self.font.render(self.back_btn.text, True, (220, 200, 255))
+        txt = render_text(self.font, self.back_btn.text, True, (220, 200, 255))
         surf.blit(txt, txt.get_rect(center=self.back_btn.rect.center))
         
     def _draw_ending_card(self, surf, x, y, key, info, is_unlocked):
@@ -1198,49 +1514,19 @@ class ArchiveScene(SceneBase):
             else:
                 pygame.draw.rect(surf, (40, 35, 50), img_rect, border_radius=8)
             
-            # 结局名称
-            name_text = info['name']
-            # 自动换行
-            words = name_text.split()
-            lines = []
-            current_line = ""
-            for word in words:
-                test_line = current_line + " " + word if current_line else word
-                if self.small_font.size(test_line)[0] <= self.card_width - 20:
-                    current_line = test_line
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                    current_line = word
-            if current_line:
-                lines.append(current_line)
-            
+            # 结局名称 - 自动换行，居中
+            text_x = x + 10
+            text_w = self.card_width - 20
             name_y = y + 140
-            for line in lines[:2]:  # 最多2行
-                name_surf = self.small_font.render(line, True, info['color'])
-                surf.blit(name_surf, name_surf.get_rect(center=(x + self.card_width // 2, name_y)))
-                name_y += 22
+            for run in layout_text(self.small_font, info['name'], text_w, 22, 'center')[:2]:  # 最多2行
+                name_surf = render_text(self.small_font, run.text, True, info['color'])
+                surf.blit(name_surf, (text_x + run.x, name_y + run.y - name_surf.get_height() // 2))
             
             # 描述
-            desc_text = info['description']
-            desc_lines = []
-            current_line = ""
-            for word in desc_text.split():
-                test_line = current_line + " " + word if current_line else word
-                if self.small_font.size(test_line)[0] <= self.card_width - 20:
-                    current_line = test_line
-                else:
-                    if current_line:
-                        desc_lines.append(current_line)
-                    current_line = word
-            if current_line:
-                desc_lines.append(current_line)
-            
             desc_y = y + 195
-            for line in desc_lines[:3]:  # 最多3行
-                desc_surf = self.small_font.render(line, True, (160, 150, 170))
-                surf.blit(desc_surf, desc_surf.get_rect(center=(x + self.card_width // 2, desc_y)))
-                desc_y += 20
+            for run in layout_text(self.small_font, info['description'], text_w, 20, 'center')[:3]:  # 最多3行
+                desc_surf = render_text(self.small_font, run.text, True, (160, 150, 170))
+                surf.blit(desc_surf, (text_x + run.x, desc_y + run.y - desc_surf.get_height() // 2))
                 
         else:
             # 未解锁 - 显示灰色问号
@@ -1253,17 +1539,17 @@ class ArchiveScene(SceneBase):
             
             # 大问号
             question_font = load_font("assets/fonts/m6x11plus.ttf", 80)
-            question_surf = question_font.render("?", True, (70, 65, 80))
+            question_surf = render_text(question_font, "?", True, (70, 65, 80))
             surf.blit(question_surf, question_surf.get_rect(center=(x + self.card_width // 2, y + 100)))
             
             # 锁定文本
             locked_text = "LOCKED"
-            locked_surf = self.font.render(locked_text, True, (90, 85, 100))
+            locked_surf = render_text(self.font, locked_text, True, (90, 85, 100))
             surf.blit(locked_surf, locked_surf.get_rect(center=(x + self.card_width // 2, y + 200)))
             
             # 提示
             hint_text = "Play to unlock"
-            hint_surf = self.small_font.render(hint_text, True, (70, 65, 80))
+            hint_surf = render_text(self.small_font, hint_text, True, (70, 65, 80))
             surf.blit(hint_surf, hint_surf.get_rect(center=(x + self.card_width // 2, y + 240)))
 
 
@@ -1277,13 +1563,8 @@ class PrepScene(SceneBase):
         btn_w = 320
         btn_h = 80
         spacing = 20
-        # (text, heart_delta, money_delta, icon_name)
-        self.options = [
-            ("Use expired ingredients", -2, +50, "opt_expired.png"),
-            ("Ignore insect bodies", -1, +30, "opt_insect.png"),
-            ("Ignore dirty utensils", -1, +20, "opt_dirty_utensils.png"),
-            ("Clean thoroughly", 0, -80, "opt_clean.png"),
-        ]
+        # (text, heart_delta, money_delta, icon_name) - 定义在 assets/events.json
+        self.options = list(event_table().prep)
         self.buttons = []
         grid_w = btn_w * 2 + spacing
         grid_h = btn_h * 2 + spacing
@@ -1387,9 +1668,8 @@ class PrepScene(SceneBase):
                     # proceed to business after a choice
                     self.game.change_scene('business')
 
-    def render(self, surf):
+    def _draw_background(self, surf, creepy_level):
         # ==================== Mr.TomatoS风格: 渐变背景 ====================
-        creepy_level = max(0.0, min(1.0, 1.0 - (self.game.hearts / 10)))
         bg_color = lerp_color(COLOR_BG_WARM, COLOR_BG_CREEPY, creepy_level)
         surf.fill(bg_color)
         
@@ -1409,58 +1689,85 @@ class PrepScene(SceneBase):
                 surf.blit(self.bg, (0, 0))
         except Exception:
             pass
+
+    def render(self, surf):
+        creepy_level = max(0.0, min(1.0, 1.0 - (self.game.hearts / 10)))
+        # 背景图层按诡异等级缓存，只在诚信值或窗口尺寸变化时重建
+        with profile_section('render.background'):
+            surf.blit(self.game.backgrounds.get('prep', creepy_level, surf.get_size(), self._draw_background), (0, 0))
         
         # ==================== Mr.TomatoS风格: 绘制食堂老板 ====================
-        # 老板固定在左侧
         if hasattr(self.game, 'boss'):
-            self.game.boss.x = 200
-            self.game.boss.y = WINDOW_HEIGHT // 2 + 50
-            self.game.boss.update(16, self.game.hearts, 10)
-            boss_font = load_font("assets/fonts/m6x11.ttf", 20)
-            self.game.boss.draw(surf, boss_font)
+            with profile_section('render.boss'):
+                boss_font = load_font("assets/fonts/m6x11.ttf", 20)
+                self.game.boss.draw(surf, boss_font, self.game.frame_alpha)
         
         # 标题在右上方
         title_text = 'Preparation Phase'
         title_pos = (750, 80)
         pink = (253, 105, 253)
         # draw simple outline by stamping the pink text slightly offset in four directions
-        outline_s = self.title_font.render(title_text, True, pink)
+        outline_s = render_text(self.title_font, title_text, True, pink)
         for ox, oy in ((-2, -2), (2, -2), (-2, 2), (2, 2)):
             surf.blit(outline_s, outline_s.get_rect(center=(title_pos[0] + ox, title_pos[1] + oy)))
-        title_s = self.title_font.render(title_text, True, (185,12,12))
+        title_s = render_text(self.title_font, title_text, True, (185,12,12))
         surf.blit(title_s, title_s.get_rect(center=title_pos))
         # keep focus on four-grid buttons
-        for b in self.buttons:
-            b.draw(surf)
+        with profile_section('render.buttons'):
+            for b in self.buttons:
+                b.draw(surf)
         # draw instruction modal on top if needed (typewriter effect)
         if getattr(self, 'show_instruction', False):
-            # dim the underlying scene so the modal becomes the primary focus
-            try:
-                overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 160))
-                surf.blit(overlay, (0, 0))
-            except Exception:
-                pass
+            with profile_section('render.overlays'):
+                self._draw_instruction(surf)
+
+    def _draw_instruction(self, surf):
+        # dim the underlying scene so the modal becomes the primary focus
+        try:
+            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 160))
+            surf.blit(overlay, (0, 0))
+        except Exception:
+            pass
 
-            box_w, box_h = 760, 160
-            bx = (WINDOW_WIDTH - box_w)//2
-            by = (WINDOW_HEIGHT - box_h)//2
-            panel = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
-            # instruction modal color: #64d591 with 80% opacity (alpha=204)
-            panel.fill((100, 213, 145, 204))
-            # pink outline #fd69fd for the panel border
-            pygame.draw.rect(panel, (253,105,253), (0,0,box_w,box_h), width=2, border_radius=8)
-            f = load_font("assets/fonts/m6x11.ttf", 24)
-            # compute visible text according to progress
-            visible = self.instruction_text[:int(self.instruction_progress)]
-            lines = visible.split('\n')
-            for i, ln in enumerate(lines):
-                panel.blit(f.render(ln, True, (240,240,240)), (18, 18 + i*28))
-            hint = f.render('Click to continue', True, (200,200,200))
-            panel.blit(hint, (box_w - hint.get_width() - 12, box_h - hint.get_height() - 12))
-            surf.blit(panel, (bx, by))
+        box_w, box_h = 760, 160
+        bx = (WINDOW_WIDTH - box_w)//2
+        by = (WINDOW_HEIGHT - box_h)//2
+        panel = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
+        # instruction modal color: #64d591 with 80% opacity (alpha=204)
+        panel.fill((100, 213, 145, 204))
+        # pink outline #fd69fd for the panel border
+        pygame.draw.rect(panel, (253,105,253), (0,0,box_w,box_h), width=2, border_radius=8)
+        f = load_font("assets/fonts/m6x11.ttf", 24)
+        # compute visible text according to progress; only newly revealed characters get rendered
+        typed = self._instruction_typewriter(f)
+        for i, ln_surf in enumerate(typed.lines(self.instruction_progress)):
+            if ln_surf is not None:
+                panel.blit(ln_surf, (18, 18 + i*28))
+        hint = render_text(f, 'Click to continue', True, (200,200,200))
+        panel.blit(hint, (box_w - hint.get_width() - 12, box_h - hint.get_height() - 12))
+        surf.blit(panel, (bx, by))
+
+    def _update_boss(self, dt):
+        # 老板固定在左侧
+        if hasattr(self.game, 'boss'):
+            self.game.boss.x = 200
+            self.game.boss.y = WINDOW_HEIGHT // 2 + 50
+            self.game.boss.update(dt, self.game.hearts, 10)
+
+    def damage(self, damage):
+        creepy_level = max(0.0, min(1.0, 1.0 - (self.game.hearts / 10)))
+        damage.track(('background', id(self)), damage.screen_rect, int(round(creepy_level * 10)))
+        if hasattr(self.game, 'boss'):
+            self.game.boss.damage(damage, load_font("assets/fonts/m6x11.ttf", 20), self.game.frame_alpha)
+        for b in self.buttons:
+            b.damage(damage)
+        self._damage_instruction(damage)
 
     def update(self, dt):
+        self._update_boss(dt)
+        for b in self.buttons:
+            b.animate()
         # advance typewriter for instruction modal
         if getattr(self, 'show_instruction', False) and int(self.instruction_progress) < len(self.instruction_text):
             self.instruction_progress += (dt * self.instruction_speed) / 1000.0
@@ -1471,18 +1778,19 @@ class PrepScene(SceneBase):
 class BusinessScene(SceneBase):
     def __init__(self, game):
         super().__init__(game)
+        # 字体、按钮和图片只在第一次进入时创建，之后每一天都复用，新的一天只调用 reset()
+        self._build_resources()
+        self.reset()
+
+    def _build_resources(self):
         # 字体 - 适当缩小以适应按钮
         self.font = load_font("assets/fonts/m6x11.ttf", 20)
         # centered title font
         self.title_font = load_font("assets/fonts/m6x11plus.ttf", 36)
-        # (text, heart_delta, money_delta, icon_name) - 简化文本
-        self.action_opts = [
-            ("Ignore cockroaches", -1, +30, "opt_cockroach.png"),
-            ("Use dirty plates", -1, +40, "opt_dirty_plate.png"),
-            ("Small portions", -1, +20, "opt_small_portion.png"),
-            ("Serve wrong dish", 0, -10, "opt_wrong_dish.png"),
-            ("Serve quality food", 0, -10, "opt_quality.png"),
-        ]
+        # 选项、事件和它们的效果都定义在 assets/events.json，加载时编译成分发表
+        self.events = event_table()
+        # (text, heart_delta, money_delta, icon_name)
+        self.action_opts = list(self.events.actions)
         # create 2x2 grid + 1 row for last item
         self.buttons = []
         btn_w = 280
@@ -1536,30 +1844,16 @@ class BusinessScene(SceneBase):
                 pass
             self.buttons.append(AnimatedButton(rect, t, self.font, color=(100,50,140), hover=(240,200,60), bg_image=bg, effect_type=eff_type, icon_image=icon_img))
 
-        # Event/triggers
-        self.event_queue = ["complaint1", "inspection1", "inspection2", "complaint2", "warning"]
-        random.shuffle(self.event_queue)
-        self.ticks = 0
-        self.event_timer = 0
-        self.current_event = None
-        # event timing: balanced for gameplay
-        # values in milliseconds
-        self.event_delay_min = 8000   # 8 seconds
-        self.event_delay_max = 15000  # 15 seconds
-        self.next_event_delay = random.randint(self.event_delay_min, self.event_delay_max)
+        # event timing, weights, preconditions and chains come from the event table (schedule / events)
+        self.scheduler = EventScheduler(self.events, rng.stream('gameplay'), self.game)
         # prepare two interactive buttons for event choices (stacked vertically when shown)
         # placeholders; rects will be positioned during render
         # Choice A通常是负面选择（逃避/贿赂），Choice B是正面选择（道歉/承担责任）
         self.event_buttons = [AnimatedButton((0,0,300,64), 'Choice A', self.font, color=(100,60,60), hover=(160,100,100), effect_type="negative"),
                               AnimatedButton((0,0,300,64), 'Choice B', self.font, color=(60,100,60), hover=(100,160,100), effect_type="positive")]
         # map events to (main_text, choiceA_text, choiceB_text, icon_name)
-        self.event_texts = {
-            'complaint1': ("A student is complaining loudly.", 'Brush off', 'Apologize & compensate', 'event_complaint.png'),
-            'inspection1': ("A health inspector appears.", 'Bribe', 'Accept inspection', 'event_inspector.png'),
-            'inspection2': ("Another inspector finds issues.", 'Fire temp', 'Take responsibility', 'event_inspector.png'),
-            'complaint2': ("Another complaint arrives.", 'Dodge', 'Apologize', 'event_complaint.png'),
-            'warning': ("The school sent a warning.", 'Ignore & continue', 'Fix sanitation', 'event_warning.png'),
-        }
+        self.event_texts = {ev.key: (ev.text, ev.choices[0].label, ev.choices[1].label, ev.icon)
+                            for ev in self.events.events.values()}
         # 加载事件图标
         self.event_icons = {}
         for event_key, event_data in self.event_texts.items():
@@ -1595,18 +1889,11 @@ class BusinessScene(SceneBase):
                                       load_image(bpb) if os.path.exists(bpb) else None]
         except Exception:
             self.event_button_imgs = [None, None]
-        # instruction modal before first interaction in this scene
-        self.show_instruction = True
         self.instruction_text = (
             "Business phase: pick an action to manage your canteen.\n"
             "Actions affect Integrity (hearts) and Money. Click to continue."
         )
-        # typewriter effect state for instruction modal
-        self.instruction_progress = 0.0
         self.instruction_speed = 120.0  # chars per second
-        # track how many actions the player has taken; first event appears after 3 actions
-        self.actions_done = 0
-        self.first_event_triggered = False
         # effect multiplier: scale heart/money deltas to make each choice carry more weight
         # set to 5 so a single click applies ~5x effect as requested
         self.effect_multiplier = 5.0
@@ -1617,6 +1904,22 @@ class BusinessScene(SceneBase):
         except Exception:
             self.bg = None
 
+    def reset(self):
+        """新的一天：只重置这一局的状态 (事件队列、计时器、说明弹窗)，不读盘也不重建按钮"""
+        # Event/triggers: the scheduler shuffles the deck and arms the first draw
+        self.scheduler.reset()
+        self.ticks = 0
+        self.clock = 0
+        self.current_event = None
+        # the end-of-day check runs every step; log the skipped ending only when it starts being skipped
+        self.ending_skipped = False
+        # instruction modal before first interaction in this scene
+        self.show_instruction = True
+        # typewriter effect state for instruction modal
+        self.instruction_progress = 0.0
+        for btn in self.buttons + self.event_buttons:
+            btn.reset()
+
     # helper to apply scaled heart change and return the actual applied value
     def apply_heart(self, delta):
         if delta == 0:
@@ -1662,6 +1965,8 @@ class BusinessScene(SceneBase):
             # If an event panel is active, block interaction with the underlying action buttons
             # and only allow the stacked event choice buttons to receive clicks.
             if self.current_event:
+                # place the choices first: a replay feeds clicks without rendering in between
+                self._layout_event()
                 for idx, btn in enumerate(self.event_buttons):
                     if btn.handle_event(e):
                         try:
@@ -1706,8 +2011,6 @@ class BusinessScene(SceneBase):
                         # still affect money for minor mistakes
                         applied_m = self.apply_money(money_delta)
                         self.game.add_log(f"Minor mistake chosen: {self.action_opts[i][0]} (money {applied_m:+d})")
-                    # count action and trigger first event when threshold reached
-                    self.actions_done += 1
                     # if hearts are in grey (4-7), count this choice toward apathy persistence
                     try:
                         if 4 <= self.game.hearts <= 7:
@@ -1724,154 +2027,25 @@ class BusinessScene(SceneBase):
                     except Exception:
                         pass
 
-                    # trigger the first event after 4 actions
-                    if not self.first_event_triggered and self.actions_done >= 4 and self.event_queue:
-                        self.current_event = self.event_queue.pop(0)
-                        self.first_event_triggered = True
+                    # count the action; the first event appears after schedule.first_after_actions of them
+                    key = self.scheduler.on_action()
+                    if key:
+                        self.current_event = key
                         # 让老板对事件做出反应
                         if hasattr(self, 'boss'):
-                            self.boss.react_to_event(self.current_event)
+                            self.boss.react_to_event(self.events.events[self.current_event].boss)
 
     def resolve_event(self, ev, choice):
-        # Apply heart changes according to design
-        if ev == 'complaint1':
-            if choice == 'A':
-                ah = self.apply_heart(-2)
-                self.game.add_log(f'You dodge the complaint. (hearts {ah:+d})')
-                # 老板对负面选择表示赞同
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(-2, 0)
-                # if already in black after this choice, increment consecutive negative counter
-                try:
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = self.game.history.get('post_black_negative_consec', 0) + 1
-                        self.game.history['last_negative_choice_money'] = self.game.money
-                except Exception:
-                    pass
-            else:
-                ah = self.apply_heart(+2)
-                am = self.apply_money(-50)
-                self.game.add_log(f'You apologize and compensate. (hearts {ah:+d}, money {am:+d})')
-                # 老板对正面选择表示不满
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(+2, -50)
-                # positive event choice: mark history
-                try:
-                    if ah and ah > 0:
-                        self.game.history['chose_positive_event'] = True
-                except Exception:
-                    pass
-        elif ev == 'inspection1':
-            if choice == 'A':
-                ah = self.apply_heart(-3)
-                am = self.apply_money(-200)
-                self.game.add_log(f'You bribe the inspector. (hearts {ah:+d}, money {am:+d})')
-                # 老板对行贿选择表示赞同
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(-3, -200)
-                try:
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = self.game.history.get('post_black_negative_consec', 0) + 1
-                        self.game.history['last_negative_choice_money'] = self.game.money
-                except Exception:
-                    pass
-            else:
-                ah = self.apply_heart(0)
-                am = self.apply_money(-50)
-                self.game.add_log(f'You accept the inspection (整改 notice). (money {am:+d})')
-                # 老板对接受检查表示不满
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(0, -50)
-                try:
-                    # treat accepting inspection as a non-negative / positive choice for spiral logic
-                    self.game.history['chose_positive_event'] = True
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = 0
-                except Exception:
-                    pass
-        elif ev == 'inspection2':
-            if choice == 'A':
-                ah = self.apply_heart(-2)
-                self.game.add_log(f'You fire a temp as a scapegoat. (hearts {ah:+d})')
-                # 老板对甩锅选择表示赞同
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(-2, 0)
-                try:
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = self.game.history.get('post_black_negative_consec', 0) + 1
-                        self.game.history['last_negative_choice_money'] = self.game.money
-                except Exception:
-                    pass
-            else:
-                ah = self.apply_heart(+1)
-                self.game.add_log(f'You accept responsibility. (hearts {ah:+d})')
-                # 老板对承担责任表示不满
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(+1, 0)
-                try:
-                    if ah and ah > 0:
-                        self.game.history['chose_positive_event'] = True
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = 0
-                except Exception:
-                    pass
-        elif ev == 'complaint2':
-            if choice == 'A':
-                ah = self.apply_heart(-1)
-                self.game.add_log(f'You dodge the second complaint. (hearts {ah:+d})')
-                # 老板对推卸投诉表示赞同
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(-1, 0)
-                try:
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = self.game.history.get('post_black_negative_consec', 0) + 1
-                        self.game.history['last_negative_choice_money'] = self.game.money
-                except Exception:
-                    pass
-            else:
-                ah = self.apply_heart(+1)
-                am = self.apply_money(-30)
-                self.game.add_log(f'You genuinely apologize again. (hearts {ah:+d}, money {am:+d})')
-                # 老板对道歉补偿表示不满
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(+1, -30)
-                try:
-                    if ah and ah > 0:
-                        self.game.history['chose_positive_event'] = True
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = 0
-                except Exception:
-                    pass
-        elif ev == 'warning':
-            # final key divergence
-            if choice == 'A':
-                # ignore / continue operating
-                # preserve the 'force to 0' semantic by applying a large negative value scaled
-                ah = self.apply_heart(-999)
-                self.game.add_log('You ignored the warning and kept operating.')
-                # 老板对无视警告表示赞同（虽然疯狂）
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(-999, 0)
-                try:
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = self.game.history.get('post_black_negative_consec', 0) + 1
-                        self.game.history['last_negative_choice_money'] = self.game.money
-                except Exception:
-                    pass
-            else:
-                # accept sanitation improvements
-                # stabilize in grey (no change)
-                self.game.add_log('You chose to improve sanitation.')
-                # 老板对接受整改表示不满
-                if hasattr(self, 'boss'):
-                    self.boss.react_to_choice(+1, 0)
-                try:
-                    # this is a positive choice logically
-                    self.game.history['chose_positive_event'] = True
-                    if self.game.hearts <= 3:
-                        self.game.history['post_black_negative_consec'] = 0
-                except Exception:
-                    pass
+        # 一次字典查找拿到编译好的效果记录：数值和 history 副作用由 apply_effect 执行 (和 simulation 共用)
+        effect = self.events.effect(ev, choice)
+        if effect is not None:
+            ah, am = apply_effect(effect, self.game, self.apply_heart, self.apply_money)
+            self.game.add_log(effect.log.format(hearts=ah, money=am))
+            # 老板赞同负面选择、不满正面选择
+            if hasattr(self, 'boss'):
+                self.boss.react_to_choice(effect.boss_hearts, effect.boss_money)
+        # the panel closes; a chained follow-up goes onto the scheduler's timeline
+        self.scheduler.resolve(effect)
 
         # generic post-event bookkeeping: count choices made while in grey and check apathy trigger
         try:
@@ -1892,7 +2066,39 @@ class BusinessScene(SceneBase):
         # clear current event
         self.current_event = None
 
+    def _update_boss(self, dt):
+        # 老板固定在左侧
+        if hasattr(self.game, 'boss'):
+            self.game.boss.x = 200
+            self.game.boss.y = WINDOW_HEIGHT // 2 + 50
+            self.game.boss.update(dt, self.game.hearts, 10)
+
+    def damage(self, damage):
+        creepy_level = max(0.0, min(1.0, 1.0 - (self.game.hearts / 10)))
+        damage.track(('background', id(self)), damage.screen_rect, int(round(creepy_level * 10)))
+        if creepy_level > 0.6:
+            # 噪点铺满整屏，每帧都在变
+            damage.full()
+            return
+        if hasattr(self.game, 'boss'):
+            self.game.boss.damage(damage, load_font("assets/fonts/m6x11.ttf", 20), self.game.frame_alpha)
+        for b in self.buttons:
+            b.damage(damage)
+        # 事件面板出现/消失会改变整屏的遮罩
+        damage.track(('event', id(self)), damage.screen_rect if self.current_event else None, self.current_event)
+        if self.current_event:
+            self._layout_event()
+            for b in self.event_buttons:
+                b.damage(damage)
+        self._damage_instruction(damage)
+
     def update(self, dt):
+        self._update_boss(dt)
+        for b in self.buttons:
+            b.animate()
+        if self.current_event:
+            for b in self.event_buttons:
+                b.animate()
         # periodically trigger events until queue empty
         # advance typewriter for instruction modal
         if getattr(self, 'show_instruction', False) and int(self.instruction_progress) < len(self.instruction_text):
@@ -1900,13 +2106,11 @@ class BusinessScene(SceneBase):
             if self.instruction_progress > len(self.instruction_text):
                 self.instruction_progress = float(len(self.instruction_text))
 
-        self.event_timer += dt
-        # subsequent events (after the first) are triggered by timer
-        if not self.current_event and self.event_queue and self.first_event_triggered and self.event_timer > self.next_event_delay:
-            self.current_event = self.event_queue.pop(0)
-            self.event_timer = 0
-            # pick next random delay for subsequent event
-            self.next_event_delay = random.randint(self.event_delay_min, self.event_delay_max)
+        self.clock += dt
+        # subsequent events (after the first) come from the scheduler's draw timer and chains
+        key = self.scheduler.tick(self.clock)
+        if key:
+            self.current_event = key
 
         # Immediate forced ending: if player has all red hearts AND money < -500, end immediately
         try:
@@ -1918,22 +2122,28 @@ class BusinessScene(SceneBase):
             pass
 
         # check end of day condition: once all events processed -> show ending
-        if not self.event_queue and not self.current_event:
+        if not self.current_event and self.scheduler.finished():
+            # campaign: the day is checkpointed and the next one starts with hearts, money and history kept
+            if self.game.campaign is not None:
+                self.game.end_campaign_day()
+                return
             # If the player has high Integrity (all red hearts) but hasn't gone deep into debt,
             # don't end the run automatically — continue playing instead.
             # Specifically: when hearts >= 8 and money >= -500, skip the automatic ending.
             try:
                 if self.game.hearts >= 8 and self.game.money >= -500:
-                    print(f"[BusinessScene.update] Skipping ending (hearts={self.game.hearts}, money={self.game.money}) - continuing game")
+                    if not self.ending_skipped:
+                        self.ending_skipped = True
+                        print(f"[BusinessScene.update] Skipping ending (hearts={self.game.hearts}, money={self.game.money}) - continuing game")
                     return
+                self.ending_skipped = False
             except Exception:
                 pass
             # otherwise proceed to ending
             self.game.change_scene('ending')
 
-    def render(self, surf):
+    def _draw_background(self, surf, creepy_level):
         # ==================== Mr.TomatoS风格: 渐变背景 ====================
-        creepy_level = max(0.0, min(1.0, 1.0 - (self.game.hearts / 10)))
         bg_color = lerp_color(COLOR_BG_WARM, COLOR_BG_CREEPY, creepy_level)
         surf.fill(bg_color)
         
@@ -1953,26 +2163,26 @@ class BusinessScene(SceneBase):
                 surf.blit(self.bg, (0, 0))
         except Exception:
             pass
-        
-        # 静态噪点效果 (高诡异程度时)
-        if creepy_level > 0.6:
-            static_alpha = int(30 * (creepy_level - 0.6) / 0.4)
-            static_surf = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-            for _ in range(300):
-                sx = random.randint(0, WINDOW_WIDTH)
-                sy = random.randint(0, WINDOW_HEIGHT)
-                c = random.randint(0, 255)
-                pygame.draw.rect(static_surf, (c, c, c, static_alpha), (sx, sy, 2, 2))
-            surf.blit(static_surf, (0, 0))
+
+    def render(self, surf):
+        creepy_level = max(0.0, min(1.0, 1.0 - (self.game.hearts / 10)))
+        # 背景图层按诡异等级缓存，只在诚信值或窗口尺寸变化时重建
+        with profile_section('render.background'):
+            surf.blit(self.game.backgrounds.get('business', creepy_level, surf.get_size(), self._draw_background), (0, 0))
+        
+            # 静态噪点效果 (高诡异程度时)
+            if creepy_level > 0.6:
+                static_alpha = int(30 * (creepy_level - 0.6) / 0.4)
+                # 预生成的噪点帧循环播放，避免每帧分配全屏surface
+                noise = self.game.static_noise
+                noise.resize(surf.get_size())
+                noise.draw(surf, static_alpha)
         
         # ==================== Mr.TomatoS风格: 绘制食堂老板 ====================
-        # 老板固定在左侧
         if hasattr(self.game, 'boss'):
-            self.game.boss.x = 200
-            self.game.boss.y = WINDOW_HEIGHT // 2 + 50
-            self.game.boss.update(16, self.game.hearts, 10)
-            boss_font = load_font("assets/fonts/m6x11.ttf", 20)
-            self.game.boss.draw(surf, boss_font)
+            with profile_section('render.boss'):
+                boss_font = load_font("assets/fonts/m6x11.ttf", 20)
+                self.game.boss.draw(surf, boss_font, self.game.frame_alpha)
         
         # 标题在右上方
         title_y = 80
@@ -1980,161 +2190,184 @@ class BusinessScene(SceneBase):
         title_pos = (750, title_y)
         pink = (253, 105, 253)
         # draw pink outline as a simple stroke
-        outline_s = self.title_font.render(title_text, True, pink)
+        outline_s = render_text(self.title_font, title_text, True, pink)
         for ox, oy in ((-2, -2), (2, -2), (-2, 2), (2, 2)):
             surf.blit(outline_s, outline_s.get_rect(center=(title_pos[0] + ox, title_pos[1] + oy)))
-        title_s = self.title_font.render(title_text, True, (185,12,12))
+        title_s = render_text(self.title_font, title_text, True, (185,12,12))
         surf.blit(title_s, title_s.get_rect(center=title_pos))
 
-        for b in self.buttons:
-            b.draw(surf)
+        with profile_section('render.buttons'):
+            for b in self.buttons:
+                b.draw(surf)
 
         # event box
         if self.current_event:
-            # draw a dark overlay first so the event panel will be on top
+            with profile_section('render.overlays'):
+                self._draw_event(surf)
+
+        # draw instruction modal if visible (over everything)
+        if getattr(self, 'show_instruction', False):
+            with profile_section('render.overlays'):
+                self._draw_instruction(surf)
+
+    def _event_panel_rect(self):
+        """事件面板的位置和大小 (有面板图时按比例放大并上移，没有时用默认的框)"""
+        ex, ey, ew, eh = (240, 260, 800, 200)
+        if getattr(self, 'event_panel_img', None) and getattr(self, 'event_panel_size', None):
+            orig_w, orig_h = self.event_panel_size
+            # maximum allowed panel size to fit screen comfortably; allow upscaling
+            max_w = int(WINDOW_WIDTH * 0.9)
+            max_h = int(WINDOW_HEIGHT * 0.9)
+            scale = min(max_w / orig_w, max_h / orig_h)
+            sw = max(1, int(orig_w * scale))
+            sh = max(1, int(orig_h * scale))
+            # center horizontally
+            px = (WINDOW_WIDTH - sw) // 2
+            # existing small vertical offset retained, then move the whole UI up by an additional 200px
+            # move the whole panel up by an additional 400px (200px earlier + 200px requested)
+            extra_up = 400
+            py = max(20, (WINDOW_HEIGHT - sh) // 2 - 40 - 80 - extra_up)
+            return px, py, sw, sh
+        # if no panel image, just draw the plain box but moved up by 200px as well
+        extra_up = 400
+        return ex, max(20, ey - extra_up), ew, eh
+
+    def _layout_event(self):
+        """
+        放好当前事件两个选项按钮的位置和文字，返回面板矩形
+        点击判定要用到按钮位置，所以在处理输入前也会调用 (不依赖这一帧有没有渲染)
+        """
+        ex, ey, ew, eh = self._event_panel_rect()
+        # split main event description and two choice labels (ignore 4th element if present)
+        event_data = self.event_texts.get(self.current_event, ('', 'Choice A', 'Choice B', ''))
+        a_text, b_text = event_data[1], event_data[2]
+        # compute stacked button sizes and positions (centered horizontally inside event box)
+        # use relative paddings based on panel size so buttons/text stay inside image
+        left_pad = int(ew * 0.12)
+        choice_w = ew - left_pad * 2
+        choice_h = max(48, int(eh * 0.17))
+        cx = ex + (ew - choice_w) // 2
+        # place buttons in the lower portion of the panel to leave space for wrapped text above
+        # move only the options block up by 200px (user requested). Keep main text position unchanged.
+        top_y = ey + int(eh * 0.58) - 200
+        # clamp so buttons don't go above the panel top
+        top_y = max(ey + 8, top_y)
+        gap = 16
+        bottom_y = top_y + choice_h + gap
+
+        # update button rects and texts before drawing so they respond correctly
+        self.event_buttons[0].rect = pygame.Rect(cx, top_y, choice_w, choice_h)
+        self.event_buttons[0].text = a_text
+        self.event_buttons[1].rect = pygame.Rect(cx, bottom_y, choice_w, choice_h)
+        self.event_buttons[1].text = b_text
+        return ex, ey, ew, eh
+
+    def _draw_event(self, surf):
+        # draw a dark overlay first so the event panel will be on top
+        try:
+            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 120))
+            surf.blit(overlay, (0, 0))
+        except Exception:
+            pass
+
+        ex, ey, ew, eh = self._layout_event()
+        # if the user provided a custom panel image, draw it scaled preserving aspect ratio
+        if getattr(self, 'event_panel_img', None) and getattr(self, 'event_panel_size', None):
             try:
-                overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 120))
-                surf.blit(overlay, (0, 0))
+                panel_surf = cached_smoothscale(self.event_panel_img, (ew, eh))
+                surf.blit(panel_surf, (ex, ey))
             except Exception:
-                pass
-
-            ex, ey, ew, eh = (240, 260, 800, 200)
-            # if the user provided a custom panel image, draw it scaled preserving aspect ratio
-            if getattr(self, 'event_panel_img', None) and getattr(self, 'event_panel_size', None):
-                try:
-                    orig_w, orig_h = self.event_panel_size
-                    # maximum allowed panel size to fit screen comfortably; allow upscaling
-                    max_w = int(WINDOW_WIDTH * 0.9)
-                    max_h = int(WINDOW_HEIGHT * 0.9)
-                    scale = min(max_w / orig_w, max_h / orig_h)
-                    sw = max(1, int(orig_w * scale))
-                    sh = max(1, int(orig_h * scale))
-                    panel_surf = pygame.transform.smoothscale(self.event_panel_img, (sw, sh))
-                    # center horizontally
-                    px = (WINDOW_WIDTH - sw) // 2
-                    # existing small vertical offset retained, then move the whole UI up by an additional 200px
-                    # move the whole panel up by an additional 400px (200px earlier + 200px requested)
-                    extra_up = 400
-                    py = max(20, (WINDOW_HEIGHT - sh) // 2 - 40 - 80 - extra_up)
-                    surf.blit(panel_surf, (px, py))
-                    # override ex/ey/ew/eh to the scaled panel for layout of text/buttons
-                    ex, ey, ew, eh = px, py, sw, sh
-                except Exception:
-                    pygame.draw.rect(surf, (20,20,20), (ex,ey,ew,eh), border_radius=10)
-                    pygame.draw.rect(surf, (80,80,80), (ex+8,ey+8,ew-16,eh-16), border_radius=8)
-            else:
-                # if no panel image, just draw the plain box but moved up by 200px as well
-                try:
-                    extra_up = 400
-                    ey = max(20, ey - extra_up)
-                except Exception:
-                    pass
                 pygame.draw.rect(surf, (20,20,20), (ex,ey,ew,eh), border_radius=10)
                 pygame.draw.rect(surf, (80,80,80), (ex+8,ey+8,ew-16,eh-16), border_radius=8)
-            ef = load_font("assets/fonts/m6x11.ttf", 32)
-            # split main event description and two choice labels (ignore 4th element if present)
-            event_data = self.event_texts.get(self.current_event, ('', 'Choice A', 'Choice B', ''))
-            main_text, a_text, b_text = event_data[0], event_data[1], event_data[2]
-            # compute stacked button sizes and positions (centered horizontally inside event box)
-            # use relative paddings based on panel size so buttons/text stay inside image
-            left_pad = int(ew * 0.12)
-            top_pad = int(eh * 0.12)
-            choice_w = ew - left_pad * 2
-            choice_h = max(48, int(eh * 0.17))
-            cx = ex + (ew - choice_w) // 2
-            # place buttons in the lower portion of the panel to leave space for wrapped text above
-            # move only the options block up by 200px (user requested). Keep main text position unchanged.
-            top_y = ey + int(eh * 0.58) - 200
-            # clamp so buttons don't go above the panel top
-            top_y = max(ey + 8, top_y)
-            gap = 16
-            bottom_y = top_y + choice_h + gap
-
-            # update button rects and texts before drawing so they respond correctly
-            self.event_buttons[0].rect = pygame.Rect(cx, top_y, choice_w, choice_h)
-            self.event_buttons[0].text = a_text
-            self.event_buttons[1].rect = pygame.Rect(cx, bottom_y, choice_w, choice_h)
-            self.event_buttons[1].text = b_text
-
-            # draw wrapped main text inside the upper area of the panel
-            content_x = ex + left_pad
-            content_w = ew - left_pad * 2
-            text_font = ef
-            
-            # 绘制事件图标（如果有）
-            event_icon = self.event_icons.get(self.current_event)
-            icon_offset = 0
-            if event_icon:
-                icon_size = 80
-                try:
-                    scaled_icon = pygame.transform.smoothscale(event_icon, (icon_size, icon_size))
-                    icon_x = content_x
-                    icon_y = ey + top_pad + 20
-                    surf.blit(scaled_icon, (icon_x, icon_y))
-                    icon_offset = icon_size + 15  # 文本偏移
-                except Exception:
-                    pass
-            
-            wrapped = wrap_text(main_text, text_font, content_w - icon_offset)
-            line_h = text_font.get_linesize()
-            # compute starting y so the block is above the buttons with a small margin
-            text_block_h = len(wrapped) * line_h
-            # move main event text up by 300px relative to its computed position
-            text_start_y = max(ey + top_pad, top_y - 16 - text_block_h)
-            # previously text was pulled up by 120px; move it down 100px relative to that
-            # (i.e. apply only a 20px upward shift from computed position)
-            text_start_y = max(10, text_start_y - 20)
-            for i, ln in enumerate(wrapped):
-                txt_surf = text_font.render(ln, True, (185,12,12))
-                surf.blit(txt_surf, (content_x + icon_offset, text_start_y + i * line_h))
-
-            # draw buttons stacked vertically; prefer textured button images if provided
-            for idx, btn in enumerate(self.event_buttons):
+        else:
+            pygame.draw.rect(surf, (20,20,20), (ex,ey,ew,eh), border_radius=10)
+            pygame.draw.rect(surf, (80,80,80), (ex+8,ey+8,ew-16,eh-16), border_radius=8)
+        ef = load_font("assets/fonts/m6x11.ttf", 32)
+        event_data = self.event_texts.get(self.current_event, ('', 'Choice A', 'Choice B', ''))
+        main_text = event_data[0]
+        left_pad = int(ew * 0.12)
+        top_pad = int(eh * 0.12)
+        # the option buttons were placed by _layout_event; the text block sits above them
+        top_y = self.event_buttons[0].rect.top
+
+        # draw wrapped main text inside the upper area of the panel
+        content_x = ex + left_pad
+        content_w = ew - left_pad * 2
+        text_font = ef
+        
+        # 绘制事件图标（如果有）
+        event_icon = self.event_icons.get(self.current_event)
+        icon_offset = 0
+        if event_icon:
+            icon_size = 80
+            try:
+                scaled_icon = cached_smoothscale(event_icon, (icon_size, icon_size))
+                icon_x = content_x
+                icon_y = ey + top_pad + 20
+                surf.blit(scaled_icon, (icon_x, icon_y))
+                icon_offset = icon_size + 15  # 文本偏移
+            except Exception:
+                pass
+        
+        runs = layout_text(text_font, main_text, content_w - icon_offset)
+        line_h = text_font.get_linesize()
+        # compute starting y so the block is above the buttons with a small margin
+        text_block_h = len(runs) * line_h
+        # move main event text up by 300px relative to its computed position
+        text_start_y = max(ey + top_pad, top_y - 16 - text_block_h)
+        # previously text was pulled up by 120px; move it down 100px relative to that
+        # (i.e. apply only a 20px upward shift from computed position)
+        text_start_y = max(10, text_start_y - 20)
+        for run in runs:
+            txt_surf = render_text(text_font, run.text, True, (185,12,12))
+            surf.blit(txt_surf, (content_x + icon_offset + run.x, text_start_y + run.y))
+
+        # draw buttons stacked vertically; prefer textured button images if provided
+        for idx, btn in enumerate(self.event_buttons):
+            bimg = None
+            try:
+                bimg = self.event_button_imgs[idx]
+            except Exception:
                 bimg = None
+            if bimg:
                 try:
-                    bimg = self.event_button_imgs[idx]
+                    bi = cached_smoothscale(bimg, (btn.rect.width, btn.rect.height))
+                    surf.blit(bi, btn.rect.topleft)
+                    # draw the label centered on the image
+                    lab = render_text(btn.font, btn.text, True, (255,255,255))
+                    surf.blit(lab, lab.get_rect(center=btn.rect.center))
                 except Exception:
-                    bimg = None
-                if bimg:
-                    try:
-                        bi = pygame.transform.smoothscale(bimg, (btn.rect.width, btn.rect.height))
-                        surf.blit(bi, btn.rect.topleft)
-                        # draw the label centered on the image
-                        lab = btn.font.render(btn.text, True, (255,255,255))
-                        surf.blit(lab, lab.get_rect(center=btn.rect.center))
-                    except Exception:
-                        btn.draw(surf)
-                else:
                     btn.draw(surf)
+            else:
+                btn.draw(surf)
 
-        # draw instruction modal if visible (over everything)
-        if getattr(self, 'show_instruction', False):
-            # dim the underlying scene so the modal becomes the primary focus
-            try:
-                overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-                overlay.fill((0, 0, 0, 160))
-                surf.blit(overlay, (0, 0))
-            except Exception:
-                pass
+    def _draw_instruction(self, surf):
+        # dim the underlying scene so the modal becomes the primary focus
+        try:
+            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+            overlay.fill((0, 0, 0, 160))
+            surf.blit(overlay, (0, 0))
+        except Exception:
+            pass
 
-            box_w, box_h = 760, 160
-            bx = (WINDOW_WIDTH - box_w)//2
-            by = (WINDOW_HEIGHT - box_h)//2
-            panel = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
-            # instruction modal color: #64d591 with 80% opacity (alpha=204)
-            panel.fill((100, 213, 145, 204))
-            # pink outline #fd69fd for the panel border
-            pygame.draw.rect(panel, (253,105,253), (0,0,box_w,box_h), width=2, border_radius=8)
-            f = load_font("assets/fonts/m6x11.ttf", 24)
-            # show partially-typed text according to instruction_progress
-            visible = getattr(self, 'instruction_text', '')[:int(getattr(self, 'instruction_progress', 0))]
-            lines = visible.split('\n')
-            for i, ln in enumerate(lines):
-                panel.blit(f.render(ln, True, (240,240,240)), (18, 18 + i*28))
-            hint = f.render('Click to continue', True, (200,200,200))
-            panel.blit(hint, (box_w - hint.get_width() - 12, box_h - hint.get_height() - 12))
-            surf.blit(panel, (bx, by))
+        box_w, box_h = 760, 160
+        bx = (WINDOW_WIDTH - box_w)//2
+        by = (WINDOW_HEIGHT - box_h)//2
+        panel = pygame.Surface((box_w, box_h), pygame.SRCALPHA)
+        # instruction modal color: #64d591 with 80% opacity (alpha=204)
+        panel.fill((100, 213, 145, 204))
+        # pink outline #fd69fd for the panel border
+        pygame.draw.rect(panel, (253,105,253), (0,0,box_w,box_h), width=2, border_radius=8)
+        f = load_font("assets/fonts/m6x11.ttf", 24)
+        # show partially-typed text according to instruction_progress
+        typed = self._instruction_typewriter(f)
+        for i, ln_surf in enumerate(typed.lines(getattr(self, 'instruction_progress', 0))):
+            if ln_surf is not None:
+                panel.blit(ln_surf, (18, 18 + i*28))
+        hint = render_text(f, 'Click to continue', True, (200,200,200))
+        panel.blit(hint, (box_w - hint.get_width() - 12, box_h - hint.get_height() - 12))
+        surf.blit(panel, (bx, by))
 
 
 class EndingScene(SceneBase):
@@ -2165,69 +2398,14 @@ class EndingScene(SceneBase):
             print(f"[EndingScene.start] hearts={v}, money={m}, history={g}")
         except Exception:
             pass
-        # Apathy (strict): hearts currently in grey and player made >=5 choices while in grey AND money >= 1500
+        # ending rules live in simulation.select_ending so headless runs pick the same ending:
+        # apathy (grey + >=5 grey choices + money >= 1500), spiral / 1A for black hearts,
+        # best_red / 1B for red hearts, apathy fallback for the grey range
         try:
-            if (m is not None) and (m >= 1500) and (4 <= v <= 7) and (g.get('grey_choice_count', 0) >= 5):
-                self.key = 'apathy'
-            else:
-                self.key = None
+            self.key = select_ending(v, m, g)
         except Exception:
-            self.key = None
-        if self.key != 'apathy':
-            if v <= 3:
-                # When in black-heart range, check Spiral (strict, all required) first.
-                try:
-                    spiral_ok = (
-                        g.get('had_grey') and
-                        g.get('chose_positive_event') and
-                        g.get('ended_black') and
-                        (g.get('post_black_negative_consec', 0) >= 4) and
-                        (g.get('last_negative_choice_money', 0) > 900)
-                    )
-                except Exception:
-                    spiral_ok = False
-
-                if spiral_ok:
-                    self.key = 'spiral'
-                else:
-                    # 1A triggers if ANY of these hold:
-                    # 1) grey-to-black happened quickly (few steps)
-                    # 2) never chose a positive event option
-                    # 3) after dropping to black, hearts never rose and only decreased
-                    cond_quick_grey_to_black = False
-                    cond_no_positive = False
-                    cond_only_decrease_after_black = False
-                    try:
-                        if g.get('had_grey') and g.get('black_step') and g.get('grey_step'):
-                            if (g.get('black_step') - g.get('grey_step')) <= 3:
-                                cond_quick_grey_to_black = True
-                    except Exception:
-                        cond_quick_grey_to_black = False
-                    try:
-                        if not g.get('chose_positive_event'):
-                            cond_no_positive = True
-                    except Exception:
-                        cond_no_positive = False
-                    try:
-                        if g.get('ended_black') and not g.get('post_black_increased') and g.get('post_black_decrease_count', 0) > 0:
-                            cond_only_decrease_after_black = True
-                    except Exception:
-                        cond_only_decrease_after_black = False
-
-                    if cond_quick_grey_to_black or cond_no_positive or cond_only_decrease_after_black:
-                        self.key = '1A'
-                    else:
-                        # fallback for other black-heart cases
-                        self.key = '1A'
-            elif v >= 8:
-                # red-heart branch unchanged: keep best_red/1B logic
-                if m < -500:
-                    self.key = 'best_red'
-                else:
-                    self.key = '1B'
-            else:
-                # default mid-range -> apathy fallback (if not already matched earlier)
-                self.key = 'apathy'
+            self.key = '1A'
+        print(f"[EndingScene.start] chosen ending key: {self.key}")
 
         # try to load a provided ending image for this key (prefer artist PNGs)
         try:
@@ -2342,6 +2520,18 @@ class EndingScene(SceneBase):
             if self.body_progress > len(self.body_full):
                 self.body_progress = float(len(self.body_full))
 
+    def damage(self, damage):
+        # 只有打字机正文在动：按完整正文的高度报告正文和副标题所在的横条
+        lines = [ln for ln in getattr(self, 'body_full', '').split('\n') if ln]
+        line_h = self.font.get_linesize()
+        block_h = line_h * max(1, len(lines))
+        band = pygame.Rect(0, 400 - block_h // 2 - 100, WINDOW_WIDTH, block_h + 40 + line_h)
+        damage.track(('body', id(self)), band, int(getattr(self, 'body_progress', 0)))
+
+    def is_static(self):
+        # 打字机结束后整个结局画面不再变化
+        return getattr(self, 'body_progress', 0) >= len(getattr(self, 'body_full', ''))
+
     def render(self, surf):
         # draw provided ending image if available, otherwise fall back to generic background
         try:
@@ -2356,11 +2546,6 @@ class EndingScene(SceneBase):
         # render title (moved down by 170px earlier, now shift up by 100px per request)
         title_text = getattr(self, 'title_text', 'Ending')
         title_color = tuple(getattr(self, 'title_color', (200,200,200)))
-        # debug: print chosen ending key
-        try:
-            print(f"[EndingScene.start] chosen ending key: {getattr(self, 'key', None)}")
-        except Exception:
-            pass
 
         # center title: original base y was 120; moved down by 170 then shift up overall by 100
         title_y = 120 + 170 - 100
@@ -2375,43 +2560,128 @@ class EndingScene(SceneBase):
             outline_col = (253,105,253)
 
         if outline_col is not None:
-            outline_s = self.title_font.render(title_text, True, outline_col)
+            outline_s = render_text(self.title_font, title_text, True, outline_col)
             for ox, oy in ((-2, -2), (2, -2), (-2, 2), (2, 2)):
                 surf.blit(outline_s, outline_s.get_rect(center=(WINDOW_WIDTH//2 + ox, title_y + oy)))
 
-        title_s = self.title_font.render(title_text, True, title_color)
+        title_s = render_text(self.title_font, title_text, True, title_color)
         surf.blit(title_s, title_s.get_rect(center=(WINDOW_WIDTH//2, title_y)))
 
         # render narrative body with typewriter effect. center the visible block around y=400 then shift up 100px
-        visible = getattr(self, 'body_full', '')[:int(getattr(self, 'body_progress', 0))]
-        lines = visible.split('\n') if isinstance(visible, str) else [str(visible)]
-        # remove any empty trailing lines
-        lines = [ln for ln in lines if ln]
+        # body text color: for 'apathy' ending use #b90c0c (185,12,12), otherwise default light gray
+        body_color = (185, 12, 12) if getattr(self, 'key', None) == 'apathy' else (230, 230, 230)
+        typed = getattr(self, '_body_typed', None)
+        if typed is None or typed.text != getattr(self, 'body_full', '') or typed.color != body_color:
+            typed = TypewriterText(self.font, str(getattr(self, 'body_full', '')), body_color)
+            self._body_typed = typed
+        # only the newly revealed characters are rendered; remove any empty lines
+        lines = [ln for ln in typed.lines(getattr(self, 'body_progress', 0)) if ln is not None]
         line_h = self.font.get_linesize()
         block_h = line_h * max(1, len(lines))
         start_y = 400 - block_h // 2 - 100
-        # body text color: for 'apathy' ending use #b90c0c (185,12,12), otherwise default light gray
-        body_color = (185, 12, 12) if getattr(self, 'key', None) == 'apathy' else (230, 230, 230)
-        for i, ln in enumerate(lines):
-            txt_surf = self.font.render(ln, True, body_color)
+        for i, txt_surf in enumerate(lines):
             surf.blit(txt_surf, txt_surf.get_rect(center=(WINDOW_WIDTH//2, start_y + i * line_h + line_h//2)))
 
         # subtitle (single line) below the body
         sub_color = (185, 12, 12) if getattr(self, 'key', None) == 'apathy' else (255, 255, 255)
-        sub_surf = self.font.render(getattr(self, 'sub_text', ''), True, sub_color)
+        sub_surf = render_text(self.font, getattr(self, 'sub_text', ''), True, sub_color)
         surf.blit(sub_surf, sub_surf.get_rect(center=(WINDOW_WIDTH//2, start_y + block_h + 40)))
         # move hint to bottom-right; hint color matches body for apathy to keep consistent
         hint_color = (185, 12, 12) if getattr(self, 'key', None) == 'apathy' else (200, 200, 200)
-        hint = self.font.render('Click anywhere to return to title and start a new day.', True, hint_color)
+        hint = render_text(self.font, 'Click anywhere to return to title and start a new day.', True, hint_color)
         surf.blit(hint, (WINDOW_WIDTH - 20 - hint.get_width(), WINDOW_HEIGHT - 20 - hint.get_height()))
 
 
 class Game:
     def __init__(self):
+        # the mixer buffer has to be chosen before pygame.init() opens the audio device
+        pygame.mixer.pre_init(frequency=44100, buffer=MIXER_BUFFER)
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption('Evil Canteen Simulator - 黑心食堂模拟器')
-        self.clock = pygame.time.Clock()
+        self._load_start = time.perf_counter()
+        # images/fonts/sounds are decoded on a worker thread while the loading screen runs
+        try:
+            assets.load_manifest(ASSET_MANIFEST)
+        except Exception as e:
+            print(f"[Game] asset manifest unavailable ({e}); assets will load on demand")
+        assets.start()
+        # read the save once at startup; scenes only touch the in-memory copy
+        save_store.load()
+        # fixed-timestep simulation; rendering and idle throttling are paced separately
+        self.scheduler = FrameScheduler(FPS, idle_fps=IDLE_FPS, idle_after_ms=IDLE_AFTER_MS,
+                                        static_wait_ms=STATIC_WAIT_MS)
+        # how far the render falls between two simulation steps (0-1), used to interpolate motion
+        self.frame_alpha = 1.0
+        # prerendered stripe/background layers shared by title, prep and business
+        self.backgrounds = BackgroundCompositor()
+        # ring of pregenerated static-noise frames for the high-creepiness overlay
+        self.static_noise = StaticNoiseBank((WINDOW_WIDTH, WINDOW_HEIGHT), rng=rng.stream('noise'))
+        # dirty rectangles: only the regions that changed are redrawn and pushed to the display
+        self.damage = DamageTracker((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.pixels_updated = 0
+        # ms from a scene switch (or the Start click, 'new_run') until its first frame is pushed
+        self.switch_ms = {}
+        self._pending_switch = None
+        # frame-time profiler overlay (F3); its panel text is rebuilt a few times per second
+        profiler.sources.update({'text': text_cache_stats, 'layout': layout_stats,
+                                 'scale': scale_cache_stats, 'font': font_cache_stats})
+        profiler.declare(PROFILE_SECTIONS)
+        profiler.enable(os.environ.get('ECS_PROFILE', '') not in ('', '0'))
+        self._profile_panel = None
+        self._profile_panel_at = 0.0
+        self._profile_version = 0
+        # one master seed per session; gameplay and cosmetic randomness come from separate named streams
+        seed = os.environ.get('ECS_SEED')
+        self.seed = int(seed) if seed else rng.new_seed()
+        # fixed simulation steps since the session started; replays are timed in these, not in wall time
+        self.sim_steps = 0
+        self.endings_reached = []
+        self.recorder = None
+        # while replaying: the recording's campaign records, used instead of campaign.jsonl
+        self.replay_campaigns = None
+        self._reset_state()
+
+        # scenes are built once the assets are in; until then the loading screen is shown
+        self.scenes = {}
+        self.loaded = False
+        self.current = LoadingScene(self)
+        # first pixels go out now, before any asset has been decoded
+        self.render_frame()
+
+    def _reset_state(self):
+        """一局会话开始时的状态 (启动时和每次重放开始时)"""
+        # HUD visibility flag: hide top-left/right values until Start is clicked
+        self.show_hud = False
+        # core state
+        self.hearts = 10
+        self.money = 0  # financial counter (profit positive, loss negative)
+        self.history = {'had_grey': False, 'had_red_again': False, 'ended_black': False, 'chose_positive_event': False}
+        # count how many player choices happened while hearts were in grey (4-7)
+        self.history['grey_choice_count'] = 0
+        # additional history / tracing for complex ending logic
+        # steps track approximate action/event sequence indices
+        self.step = 0
+        # record when grey/black first happened (step number)
+        self.history['grey_step'] = None
+        self.history['black_step'] = None
+        # after black tracking
+        self.history['post_black_decrease_count'] = 0
+        
+        self.history['post_black_increased'] = False
+        # consecutive negative event choices after black
+        self.history['post_black_negative_consec'] = 0
+        # record last money value when a negative event choice occurred after black
+        self.history['last_negative_choice_money'] = 0
+        self.logs = []
+        # {'seed', 'days', 'day'} while a multi-day campaign is running, None for a single run
+        self.campaign = None
+
+    def finish_loading(self):
+        """资源提交完后创建音效、HUD、老板和各个场景，然后进入标题画面"""
+        if self.loaded:
+            return
+        self.loaded = True
         # sound manager: loads optional SFX/BGM from assets/sounds/
         try:
             self.sound = SoundManager()
@@ -2453,54 +2723,160 @@ class Game:
             self.money_icon = None
 
         self.heart_bar = HeartBar(10, images=heart_images)
-        # HUD visibility flag: hide top-left/right values until Start is clicked
-        self.show_hud = False
-        # core state
-        self.hearts = 10
-        self.money = 0  # financial counter (profit positive, loss negative)
-        self.history = {'had_grey': False, 'had_red_again': False, 'ended_black': False, 'chose_positive_event': False}
-        # count how many player choices happened while hearts were in grey (4-7)
-        self.history['grey_choice_count'] = 0
-        # additional history / tracing for complex ending logic
-        # steps track approximate action/event sequence indices
-        self.step = 0
-        # record when grey/black first happened (step number)
-        self.history['grey_step'] = None
-        self.history['black_step'] = None
-        # after black tracking
-        self.history['post_black_decrease_count'] = 0
-        
+
+        # scenes are created the first time they are entered and reused after that
+        self.scene_types = {
+            'title': TitleScene,
+            'archive': ArchiveScene,
+            'prep': PrepScene,
+            'business': BusinessScene,
+            'ending': EndingScene,
+        }
+        self.start_session(self.seed)
+        record = os.environ.get('ECS_RECORD', '')
+        if record not in ('', '0'):
+            path = record if record.endswith('.jsonl') else os.path.join(REPLAY_DIR, time.strftime('session_%Y%m%d_%H%M%S.jsonl'))
+            try:
+                self.recorder = ReplayRecorder(path, self.seed, self.scheduler.step_ms,
+                                               {'cursor': list(pygame.mouse.get_pos())})
+                print(f"[Game] recording inputs to {path} (seed {self.seed})")
+            except OSError as e:
+                print(f"[Game] could not start replay recording: {e}")
+        load_ms = (time.perf_counter() - self._load_start) * 1000.0
+        print(f"[Game] loaded in {load_ms:.0f} ms: {assets.stats()}")
+
+    def start_session(self, seed):
+        """
+        会话从标题画面开始：重新播种所有随机流，老板和场景都重新创建
+        同样的种子 + 在同样的模拟步送入同样的输入 = 同样的结局和 history
+        """
+        self.seed = seed
+        rng.seed(seed)
+        self.sim_steps = 0
+        self.endings_reached = []
+        self._reset_state()
         # ==================== Mr.TomatoS风格: 食堂老板角色 ====================
         self.boss = CanteenBoss(WINDOW_WIDTH // 4, WINDOW_HEIGHT // 2 + 30)
-        self.history['post_black_increased'] = False
-        # consecutive negative event choices after black
-        self.history['post_black_negative_consec'] = 0
-        # record last money value when a negative event choice occurred after black
-        self.history['last_negative_choice_money'] = 0
-        self.logs = []
+        self.scenes = {}
+        self.change_scene('title')
 
-        # scenes
-        self.scenes = {
-            'title': TitleScene(self),
-            'archive': ArchiveScene(self),
-            'prep': PrepScene(self),
-            'business': BusinessScene(self),
-            'ending': EndingScene(self),
-        }
-        self.current = self.scenes['title']
+    def play_replay(self, replay):
+        """
+        无头重放一份录像：用录像的种子重开会话，在记录的步数送入同样的输入，中间只跑模拟不渲染
+        返回这次到达的结局列表，和 replay.endings 相同就说明重放完全一致
+        """
+        self.wait_until_loaded()
+        recorder, self.recorder = self.recorder, None
+        self.replay_campaigns = list(replay.campaigns)
+        cursor = ReplayCursor(replay.cursor)
+        cursor.install()
+        try:
+            self.start_session(replay.seed)
+            for step, events in replay.batches:
+                self._advance(step, replay.step_ms)
+                cursor.follow(events)
+                self.current.handle_events(events)
+            self._advance(replay.end_step, replay.step_ms)
+        finally:
+            cursor.uninstall()
+            self.recorder = recorder
+            self.replay_campaigns = None
+        return self.endings_reached
+
+    def _advance(self, step, dt):
+        while self.sim_steps < step:
+            try:
+                self.current.update(dt)
+            except Exception:
+                pass
+            self.sim_steps += 1
+
+    def _record_ending(self):
+        """到达结局时记下结局、数值和 history (录像里也写一行，重放时拿来对照)"""
+        result = normalize({'step': self.sim_steps, 'key': getattr(self.current, 'key', None),
+                            'hearts': self.hearts, 'money': self.money, 'history': self.history})
+        self.endings_reached.append(result)
+        if self.recorder is not None:
+            self.recorder.mark_ending(result)
+
+    def wait_until_loaded(self):
+        """阻塞到资源全部加载、场景建好 (无头运行和测试用，不经过加载画面)"""
+        assets.wait()
+        self.finish_loading()
 
     def start_new_run(self):
+        started = time.perf_counter()
         # reset state
+        self.campaign = None
         self.hearts = 10
         self.money = 0
         self.history = {'had_grey': False, 'had_red_again': False, 'ended_black': False, 'chose_positive_event': False, 'grey_choice_count': 0}
+        self._begin_day(started)
+
+    def _begin_day(self, started):
         self.logs = []
-        # recreate business scene for fresh event queue
-        self.scenes['business'] = BusinessScene(self)
-        self.scenes['ending'] = EndingScene(self)
+        # scenes are kept between days; only their per-run state is reset (no disk I/O, no rebuilt buttons)
+        for scene in self.scenes.values():
+            if hasattr(scene, 'reset'):
+                scene.reset()
         # show HUD from now on
         self.show_hud = True
         self.change_scene('prep')
+        self._pending_switch = ('new_run', started)
+
+    # ---------------- 多日经营 ----------------
+    def _campaign_state(self):
+        return {'day': self.campaign['day'], 'hearts': self.hearts, 'money': self.money,
+                'step': self.step, 'history': self.history}
+
+    def start_campaign(self):
+        """继续上次没打完的战役 (从存档最近一天结束时的状态开始下一天)，没有就开一个新的"""
+        # replaying: follow the recording, not whatever campaign file is on this machine
+        replayed = self.replay_campaigns.pop(0) if self.replay_campaigns else None
+        if replayed is not None and replayed.get('resumed'):
+            # rebuild the campaign file the recording resumed from
+            campaign_store.start(replayed['seed'], replayed['days'], replayed['state'])
+        state = None if replayed is not None and not replayed.get('resumed') else campaign_store.load()
+        if state is None or state.get('ended'):
+            seed = rng.stream('campaign').getrandbits(32)
+            self.campaign = {'seed': seed, 'days': CAMPAIGN_DAYS, 'day': 0}
+            self.hearts = 10
+            self.money = 0
+            self.step = 0
+            self.history = {'had_grey': False, 'had_red_again': False, 'ended_black': False, 'chose_positive_event': False, 'grey_choice_count': 0}
+            campaign_store.start(seed, CAMPAIGN_DAYS, self._campaign_state())
+        else:
+            header = campaign_store.header
+            self.campaign = {'seed': header['seed'], 'days': header['days'], 'day': state['day']}
+            self.hearts = state['hearts']
+            self.money = state['money']
+            self.step = state['step']
+            self.history = state['history']
+            print(f"[Game] resumed campaign after day {state['day']}: {campaign_store.stats()}")
+        if self.recorder is not None:
+            record = {'step': self.sim_steps, 'seed': self.campaign['seed'], 'days': self.campaign['days'],
+                      'resumed': state is not None and not state.get('ended')}
+            if record['resumed']:
+                record['state'] = self._campaign_state()
+            self.recorder.mark_campaign(record)
+        self._start_campaign_day()
+
+    def _start_campaign_day(self):
+        started = time.perf_counter()
+        campaign = self.campaign
+        campaign['day'] += 1
+        # each day's events depend only on the campaign seed and the day, not on how the player got here
+        rng.stream('gameplay').seed(day_seed(campaign['seed'], campaign['day']))
+        self._begin_day(started)
+        self.add_log(f"Day {campaign['day']} of {campaign['days']}")
+
+    def end_campaign_day(self):
+        """营业阶段的事件结束：记下这一天，然后进入下一天；黑心或最后一天结束时进入结局"""
+        campaign_store.append_day(self._campaign_state())
+        if self.campaign['day'] >= self.campaign['days'] or self.hearts <= 3:
+            self.change_scene('ending')
+        else:
+            self._start_campaign_day()
 
     def change_money(self, delta):
         self.money += delta
@@ -2508,13 +2884,27 @@ class Game:
         if self.money < 0:
             self.history['had_negative_money'] = True
 
+    def get_scene(self, key):
+        scene = self.scenes.get(key)
+        if scene is None:
+            scene = self.scene_types[key](self)
+            self.scenes[key] = scene
+        return scene
+
     def change_scene(self, key):
-        self.current = self.scenes[key]
+        self._pending_switch = (key, time.perf_counter())
+        self.current = self.get_scene(key)
+        self.damage.reset()
         if hasattr(self.current, 'start'):
             try:
                 self.current.start()
             except Exception:
                 pass
+        if key == 'ending':
+            self._record_ending()
+            if self.campaign is not None:
+                campaign_store.finish(getattr(self.current, 'key', None))
+                self.campaign = None
 
     def change_hearts(self, delta):
         # increment step so we can reason about sequence/timing
@@ -2580,6 +2970,20 @@ class Game:
     def add_log(self, text):
         self.logs.append(text)
 
+    def _log_rect(self):
+        if not self.logs:
+            return None
+        padding = 6
+        line_h = 18
+        box_h = padding*2 + line_h * len(self.logs[-3:])
+        return pygame.Rect(10, WINDOW_HEIGHT - box_h - 10, 400, box_h)
+
+    def _hud_rect(self):
+        # standalone heart bar (top-right, right-to-left) plus the status panel under it
+        hearts_w = (self.heart_bar.max - 1) * 20 + 16
+        hearts = pygame.Rect(WINDOW_WIDTH - 20 - hearts_w, 20, hearts_w, 16 + 6)
+        return hearts.union(pygame.Rect(WINDOW_WIDTH - 280 - 15, 15, 280, 80))
+
     def draw_logs(self, surf):
         # show last 3 logs in bottom-left (simplified)
         if not self.logs:
@@ -2597,13 +3001,52 @@ class Game:
         for i, l in enumerate(lines):
             # 截断过长的文本
             display_text = l[:50] + "..." if len(l) > 50 else l
-            txt = font.render(display_text, True, (220, 220, 220))
+            txt = render_text(font, display_text, True, (220, 220, 220))
             box.blit(txt, (padding, padding + i * line_h))
         surf.blit(box, (x, y))
 
+    def _profile_rect(self):
+        if not (profiler.enabled and profiler.overlay) or self._profile_panel is None:
+            return None
+        return self._profile_panel.get_rect(topleft=(10, 10))
+
+    def _update_profile_panel(self):
+        """分析器面板每 0.25 秒重建一次；直接用 font.render，不经过文字缓存，免得影响它的命中率"""
+        now = time.perf_counter()
+        if self._profile_panel is not None and now - self._profile_panel_at < 0.25:
+            return
+        self._profile_panel_at = now
+        self._profile_version += 1
+        summary = profiler.summary()
+        lines = []
+        if summary.get('frames'):
+            lines.append(f"FPS {summary['fps']:.1f}   frame p50/p95/p99 {summary['frame_p50_ms']:.1f} / "
+                         f"{summary['frame_p95_ms']:.1f} / {summary['frame_p99_ms']:.1f} ms")
+            lines.append(f"work p50/p95/p99 {summary['work_p50_ms']:.2f} / {summary['work_p95_ms']:.2f} / "
+                         f"{summary['work_p99_ms']:.2f} ms")
+            lines.append(f"alloc {summary['alloc_blocks_mean']:+.0f} blocks/frame   gc0 {summary['gc0_per_sec']:.1f}/s")
+            for name, sec in summary['sections'].items():
+                indent = '    ' if '.' in name else ''
+                lines.append(f"{indent}{name:<20} {sec['mean_ms']:6.2f}  p95 {sec['p95_ms']:6.2f} ms")
+            caches = '  '.join(f"{name} {c['hit_rate'] * 100:.0f}% ({c['recent_misses']})"
+                               for name, c in summary['caches'].items())
+            lines.append(f"hit {caches}")
+        else:
+            lines.append('profiler: collecting...')
+        font = load_font("assets/fonts/m6x11.ttf", 16)
+        line_h = 16
+        width = max(font.size(ln)[0] for ln in lines) + 16
+        panel = pygame.Surface((width, line_h * len(lines) + 12), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 190))
+        for i, ln in enumerate(lines):
+            panel.blit(font.render(ln, True, (120, 255, 140)), (8, 6 + i * line_h))
+        self._profile_panel = panel
+
     def draw_debug(self, surf):
-        # 移除debug面板 - 简化UI
-        pass
+        # F3 帧耗时分析面板 (关闭时什么都不画)
+        rect = self._profile_rect()
+        if rect is not None:
+            surf.blit(self._profile_panel, rect)
     
     def draw_money(self, surf):
         # deprecated: draw_money replaced by draw_status (kept for compatibility)
@@ -2636,7 +3079,7 @@ class Game:
         font = load_font("assets/fonts/m6x11.ttf", 28)
         money_text = f"${self.money:+d}"
         color = (80, 220, 100) if self.money >= 0 else (220, 80, 80)
-        txt = font.render(money_text, True, color)
+        txt = render_text(font, money_text, True, color)
         money_x = (box_w - txt.get_width()) // 2
         money_y = heart_y + heart_size + 10
         panel.blit(txt, (money_x, money_y))
@@ -2644,36 +3087,120 @@ class Game:
         # blit panel onto surface
         surf.blit(panel, (x, y))
 
+    def draw_frame(self, surf):
+        with profile_section('render'):
+            self.current.render(surf)
+        # draw HUD elements only after Start has been clicked
+        if self.show_hud:
+            with profile_section('hud'):
+                # heart bar (standalone) and status panel
+                self.heart_bar.draw(surf, self.hearts)
+                # draw status box (hearts + money) at top-right
+                self.draw_status(surf)
+
+        # draw logs (keep visible regardless of HUD state)
+        with profile_section('logs'):
+            self.draw_logs(surf)
+        # profiler panel on top of everything
+        self.draw_debug(surf)
+
+    def render_frame(self):
+        """只重绘并推送这一帧变化的矩形，返回推送的矩形列表 (画面没变时为空)"""
+        if profiler.enabled and profiler.overlay:
+            self._update_profile_panel()
+        with profile_section('damage'):
+            try:
+                self.current.damage(self.damage)
+            except Exception:
+                self.damage.full()
+            self.damage.track('hud', self._hud_rect() if self.show_hud else None, (self.hearts, self.money))
+            self.damage.track('logs', self._log_rect(), tuple(self.logs[-3:]))
+            self.damage.track('profiler', self._profile_rect(), self._profile_version)
+            rects = self.damage.collect()
+        self.pixels_updated = self.damage.pixels_updated
+        for rect in rects:
+            # the clip keeps the full-screen background blits down to the damaged pixels
+            self.screen.set_clip(rect)
+            try:
+                self.draw_frame(self.screen)
+            finally:
+                self.screen.set_clip(None)
+        if rects:
+            with profile_section('flip'):
+                pygame.display.update(rects)
+        if self._pending_switch is not None:
+            key, started = self._pending_switch
+            self._pending_switch = None
+            self.switch_ms[key] = (time.perf_counter() - started) * 1000.0
+        return rects
+
     def run(self):
         running = True
+        scheduler = self.scheduler
         while running:
-            dt = self.clock.tick(FPS)
-            events = pygame.event.get()
+            # 空闲时这里会阻塞在 pygame.event.wait 上
+            events = scheduler.wait_events(static=self.current.is_static())
+            profiler.begin_frame()
+            profiler.add('events', scheduler.pump_ms)
             for e in events:
                 if e.type == pygame.QUIT:
                     running = False
+                elif e.type == pygame.KEYDOWN and e.key == PROFILE_KEY:
+                    profiler.toggle()
+                    self._profile_panel = None
+                    self.damage.full()
+                elif e.type == pygame.MOUSEBUTTONDOWN and getattr(self, 'sound', None):
+                    self.sound.mark_input()
+                elif e.type in (pygame.VIDEOEXPOSE, getattr(pygame, 'WINDOWEXPOSED', pygame.VIDEOEXPOSE)):
+                    # the window contents were lost (uncovered / restored)
+                    self.damage.full()
                 # (removed quick-play E-key shortcut per user request)
+            if self.recorder is not None and self.loaded:
+                self.recorder.record(self.sim_steps, events)
             # delegate
-            self.current.handle_events(events)
-            try:
-                self.current.update(dt)
-            except Exception:
-                pass
+            with profile_section('handle_events'):
+                self.current.handle_events(events)
+            if getattr(self, 'sound', None):
+                self.sound.end_input()
+            # simulation advances in fixed steps, independent of how often we render
+            with profile_section('update'):
+                for dt in scheduler.steps():
+                    # steps are counted from the end of loading (the step that finishes it does not count)
+                    counted = self.loaded
+                    try:
+                        self.current.update(dt)
+                    except Exception:
+                        pass
+                    if counted:
+                        self.sim_steps += 1
+            self.frame_alpha = scheduler.alpha
+            # the BGM crossfades towards the boss's creepiness on the music thread
+            if self.loaded and getattr(self, 'sound', None):
+                self.sound.set_mood(self.boss.creepy_level)
             # render
-            self.current.render(self.screen)
-            # draw HUD elements only after Start has been clicked
-            if self.show_hud:
-                # heart bar (standalone) and status/debug panels
-                self.heart_bar.draw(self.screen, self.hearts)
-                # draw debug panel
-                self.draw_debug(self.screen)
-                # draw status box (hearts + money) at top-right
-                self.draw_status(self.screen)
-
-            # draw logs (keep visible regardless of HUD state)
-            self.draw_logs(self.screen)
-            pygame.display.flip()
-
+            rects = self.render_frame()
+            profiler.end_frame(scheduler.frame_ms)
+            scheduler.frame_done(bool(events) or bool(rects))
+
+        print(f"[Game] render stats: {self.damage.stats()}")
+        print(f"[Game] scheduler stats: {scheduler.stats()}")
+        print(f"[Game] text cache stats: {text_cache_stats()}")
+        if getattr(self, 'sound', None):
+            print(f"[Game] sound stats: {self.sound.stats()}")
+            self.sound.stop_bgm()
+        print(f"[Game] scene switch ms: { {k: round(v, 2) for k, v in self.switch_ms.items()} }")
+        if self.recorder is not None:
+            self.recorder.close(self.sim_steps)
+            print(f"[Game] replay saved: {self.recorder.stats()} (seed {self.seed}, {self.sim_steps} steps)")
+        if profiler.trace:
+            path = os.environ.get('ECS_PROFILE_TRACE') or PROFILE_TRACE
+            try:
+                print(f"[Game] profiler wrote {profiler.export(path)} frames to {path}: {profiler.summary()}")
+            except Exception as e:
+                print(f"[Game] could not write profiler trace: {e}")
+        assets.stop()
+        save_store.close()
+        campaign_store.close()
         pygame.quit()
 
 
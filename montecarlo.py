@@ -0,0 +1,199 @@
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulation import PREP_OPTIONS, ACTION_OPTIONS, ENDING_KEYS, GREY_MIN, GREY_MAX, CanteenSim
+
+# 多进程蒙特卡洛 - 把模拟局切成固定大小的分片，分给进程池里的每个核心跑
+# 每个分片有自己的随机流 (由 seed 和分片编号决定)，所以结果与 worker 数量无关
+
+MONEY_BIN = 100  # 金钱直方图的桶宽
+# 跑到 max_decisions 还没到结局的局 (比如一直红心又不欠债) 单独计数，保证各行加起来等于总局数
+UNFINISHED = 'unfinished'
+
+
+# ---------------- 策略 ----------------
+# 策略用名字描述，在 worker 里再构造，避免把闭包传过进程边界
+def _random_policy(rng, event_b):
+    def policy(sim, phase, n):
+        if phase == 'event':
+            return 1 if rng.random() < event_b else 0
+        return rng.randrange(n)
+    return policy
+
+
+def _greedy_policy(rng, event_b):
+    """总是选最赚钱的选项"""
+    best_prep = max(range(len(PREP_OPTIONS)), key=lambda i: PREP_OPTIONS[i][2])
+    best_action = max(range(len(ACTION_OPTIONS)), key=lambda i: ACTION_OPTIONS[i][2])
+
+    def policy(sim, phase, n):
+        if phase == 'prep':
+            return best_prep
+        if phase == 'action':
+            return best_action
+        return 1 if rng.random() < event_b else 0
+    return policy
+
+
+def _honest_policy(rng, event_b):
+    """总是选不伤良心的选项，事件一律选 B"""
+    def policy(sim, phase, n):
+        if phase == 'prep':
+            return 3
+        if phase == 'action':
+            return 4
+        return 1
+    return policy
+
+
+def _grey_policy(rng, event_b):
+    """在灰色区间里赚钱：心高时作恶，跌到灰色下限就收手"""
+    def policy(sim, phase, n):
+        if phase == 'prep':
+            return 0
+        if phase == 'action':
+            return rng.randrange(3) if sim.hearts > GREY_MIN else 4
+        return 0 if sim.hearts > GREY_MAX else 1
+    return policy
+
+
+POLICIES = {
+    'random': _random_policy,
+    'greedy': _greedy_policy,
+    'honest': _honest_policy,
+    'grey': _grey_policy,
+}
+
+
+def parse_script(text):
+    """
+    脚本策略 'PREP:ACTIONS:EVENTS'，例如 '0:0,1,4:ABB'
+    动作和事件按顺序循环使用
+    """
+    prep, actions, events = text.split(':')
+    return (int(prep), [int(a) for a in actions.split(',') if a != ''],
+            [0 if c.upper() == 'A' else 1 for c in events])
+
+
+def _script_policy(script):
+    prep, actions, events = script
+    counters = {'action': 0, 'event': 0}
+
+    def policy(sim, phase, n):
+        if phase == 'prep':
+            return prep
+        seq = actions if phase == 'action' else events
+        if not seq:
+            return 0
+        i = counters[phase]
+        counters[phase] = i + 1
+        return seq[i % len(seq)]
+    return policy
+
+
+def make_policy(name, rng, event_b=0.5, script=None):
+    if script is not None:
+        return _script_policy(script)
+    return POLICIES[name](rng, event_b)
+
+
+# ---------------- worker ----------------
+def run_shard(shard, runs, seed, policy_name, event_b=0.5, script=None, think_time=1500):
+    """
+    跑一个分片，返回 (shard, 结局计数, 金钱直方图, 心直方图, 耗时)
+    随机流只由 (seed, shard) 决定
+    """
+    rng = random.Random(f"{seed}:{shard}")
+    ending_counts = Counter()
+    money_hist = Counter()
+    heart_hist = Counter()
+    policy = make_policy(policy_name, rng, event_b, script)
+    start = time.perf_counter()
+    for _ in range(runs):
+        if script is not None:
+            # scripted sequences restart at the beginning of every day
+            policy = make_policy(policy_name, rng, event_b, script)
+        sim = CanteenSim(rng=rng, think_time=think_time)
+        ending, _ = sim.run(policy)
+        ending_counts[ending if ending is not None else UNFINISHED] += 1
+        money_hist[(sim.money // MONEY_BIN) * MONEY_BIN] += 1
+        heart_hist[sim.hearts] += 1
+    elapsed = time.perf_counter() - start
+    print(f"[worker {os.getpid()}] shard {shard}: {runs} runs in {elapsed:.2f}s "
+          f"({runs / max(elapsed, 1e-9):,.0f} runs/sec)", flush=True)
+    return shard, ending_counts, money_hist, heart_hist, elapsed
+
+
+def run_montecarlo(runs, seed=0, policy='random', event_b=0.5, script=None, think_time=1500,
+                   workers=None, shard_size=5000, progress=True):
+    """
+    在进程池里跑 runs 局并合并统计
+    分片大小固定，所以相同的 seed 在任何 worker 数下给出相同的结果
+    """
+    shards = [(i, min(shard_size, runs - i * shard_size))
+              for i in range((runs + shard_size - 1) // shard_size)]
+    endings = Counter({key: 0 for key in ENDING_KEYS + [UNFINISHED]})
+    money_hist = Counter()
+    heart_hist = Counter()
+    done = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_shard, i, n, seed, policy, event_b, script, think_time)
+                   for i, n in shards]
+        for future in as_completed(futures):
+            shard, e, m, h, _ = future.result()
+            endings.update(e)
+            money_hist.update(m)
+            heart_hist.update(h)
+            done += shards[shard][1]
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"[MonteCarlo] {done}/{runs} runs ({done / runs:.0%}), "
+                      f"{done / max(elapsed, 1e-9):,.0f} runs/sec overall", flush=True)
+    return {
+        'runs': runs,
+        'elapsed': time.perf_counter() - start,
+        'endings': dict(endings),
+        'money_hist': dict(sorted(money_hist.items())),
+        'heart_hist': dict(sorted(heart_hist.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-core Monte Carlo ending sweep")
+    parser.add_argument('-n', '--runs', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--script', default=None,
+                        help="scripted strategy 'PREP:ACTIONS:EVENTS', e.g. '0:0,1,4:ABB'")
+    parser.add_argument('--event-b', type=float, default=0.5, help="probability of choosing B in events")
+    parser.add_argument('--think-time', type=int, default=1500, help="ms before each decision")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--shard-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    script = parse_script(args.script) if args.script else None
+    result = run_montecarlo(args.runs, seed=args.seed, policy=args.policy, event_b=args.event_b,
+                            script=script, think_time=args.think_time, workers=args.workers,
+                            shard_size=args.shard_size)
+    runs = max(1, result['runs'])
+    print(f"\n{result['runs']} runs in {result['elapsed']:.2f}s "
+          f"({result['runs'] / max(result['elapsed'], 1e-9):,.0f} runs/sec)")
+    print("Endings:")
+    for key in ENDING_KEYS + [UNFINISHED]:
+        count = result['endings'].get(key, 0)
+        print(f"  {key:>9}: {count:>9}  {count / runs:6.2%}")
+    print("Hearts:")
+    for hearts, count in result['heart_hist'].items():
+        print(f"  {hearts:>5}: {count:>9}  {count / runs:6.2%}")
+    print(f"Money (bins of {MONEY_BIN}):")
+    for money, count in result['money_hist'].items():
+        print(f"  {money:>6}: {count:>9}  {count / runs:6.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import random
+
+from utils.events import event_table, apply_effect
+from utils.event_scheduler import EventScheduler
+
+# 无界面模拟核心 - 复刻 PrepScene / BusinessScene / Game / EndingScene 的规则
+# 不依赖 pygame 显示或音频，可用于批量跑数值平衡
+
+# 选项和事件都来自 assets/events.json (与 PrepScene / BusinessScene 共用同一份编译好的事件表)
+EVENT_TABLE = event_table()
+
+# (text, heart_delta, money_delta, icon_name) - 与 PrepScene.options 一致
+PREP_OPTIONS = [tuple(o) for o in EVENT_TABLE.prep]
+
+# (text, heart_delta, money_delta, icon_name) - 与 BusinessScene.action_opts 一致
+ACTION_OPTIONS = [tuple(o) for o in EVENT_TABLE.actions]
+
+EVENT_KEYS = list(EVENT_TABLE.keys)
+
+# 事件选择的效果表 (未缩放)，给向量化模拟和求解器用
+# (heart_delta, money_delta, negative, positive, resets_consec)
+#   negative:       黑心状态下累加 post_black_negative_consec 并记录金钱
+#   positive:       标记 chose_positive_event (有心值变化的选项只在实际加心时标记)
+#   resets_consec:  黑心状态下清零 post_black_negative_consec
+EVENT_EFFECTS = {
+    key: [(e.hearts, e.money, e.negative, e.positive, e.reset_consec) for e in EVENT_TABLE.events[key].choices]
+    for key in EVENT_KEYS
+}
+
+EFFECT_MULTIPLIER = 5.0
+FIRST_EVENT_ACTIONS = EVENT_TABLE.schedule.first_after_actions
+EVENT_DELAY_MIN = EVENT_TABLE.schedule.delay_min  # ms
+EVENT_DELAY_MAX = EVENT_TABLE.schedule.delay_max  # ms
+
+# 诚信区间
+RED_MIN = 8
+GREY_MIN, GREY_MAX = 4, 7
+BLACK_MAX = 3
+
+APATHY_MONEY = 1500
+APATHY_GREY_CHOICES = 5
+BEST_RED_DEBT = -500
+
+ENDING_KEYS = ['1A', '1B', 'spiral', 'apathy', 'best_red']
+
+
+def new_history():
+    """新一局的history - 与 Game.start_new_run 一致"""
+    return {'had_grey': False, 'had_red_again': False, 'ended_black': False,
+            'chose_positive_event': False, 'grey_choice_count': 0}
+
+
+def scale_delta(delta, multiplier=EFFECT_MULTIPLIER):
+    """BusinessScene.apply_heart / apply_money 的缩放规则"""
+    if delta == 0:
+        return 0
+    adj = int(round(delta * multiplier))
+    # ensure non-zero change for any non-zero input
+    if adj == 0:
+        adj = 1 if delta > 0 else -1
+    return adj
+
+
+def apathy_reached(hearts, money, history):
+    return (money >= APATHY_MONEY and
+            history.get('grey_choice_count', 0) >= APATHY_GREY_CHOICES and
+            GREY_MIN <= hearts <= GREY_MAX)
+
+
+def select_ending(hearts, money, history):
+    """根据诚信、金钱和history选择结局 - EndingScene.start 的判定规则"""
+    g = history
+    # Apathy (strict): grey hearts, >=5 choices made in grey and money >= 1500
+    if money is not None and apathy_reached(hearts, money, g):
+        return 'apathy'
+    if hearts <= BLACK_MAX:
+        # Spiral requires every condition; every other black-heart case is 1A
+        spiral_ok = (
+            g.get('had_grey') and
+            g.get('chose_positive_event') and
+            g.get('ended_black') and
+            (g.get('post_black_negative_consec', 0) >= 4) and
+            (g.get('last_negative_choice_money', 0) > 900)
+        )
+        return 'spiral' if spiral_ok else '1A'
+    if hearts >= RED_MIN:
+        return 'best_red' if money < BEST_RED_DEBT else '1B'
+    # mid-range falls back to apathy
+    return 'apathy'
+
+
+class CanteenSim:
+    """
+    一天的食堂经营模拟：准备阶段一次选择 + 营业阶段的行动和事件
+    时间只在 wait() 中流逝，事件计时与 BusinessScene.update 相同
+    """
+    def __init__(self, seed=None, rng=None, think_time=1500, frame_ms=None, table=None):
+        self.rng = rng if rng is not None else random.Random(seed)
+        # 默认用 assets/events.json；tools/event_check.py 传入带权重/前提/连锁的表
+        self.table = table if table is not None else EVENT_TABLE
+        # ms that pass before each decision (player reading/clicking);
+        # may be a number or a callable taking the sim
+        self.think_time = think_time
+        # None: time advances in one exact step per wait; otherwise waits are split
+        # into update() calls of frame_ms each, matching the pygame loop frame by frame
+        self.frame_ms = frame_ms
+        self.step = 0
+        self.events = EventScheduler(self.table, self.rng, self)
+        self.reset()
+
+    def reset(self):
+        self.hearts = 10
+        self.money = 0
+        self.history = new_history()
+        self.phase = 'prep'
+        self.ending = None
+        self.clicks = 0
+        # BusinessScene.reset on every new run: fresh deck and first draw delay
+        self.events.reset()
+        self.now = 0
+        self.current_event = None
+
+    # ---------------- Game 状态变化 ----------------
+    def change_money(self, delta):
+        self.money += delta
+        if self.money < 0:
+            self.history['had_negative_money'] = True
+
+    def change_hearts(self, delta):
+        self.step += 1
+        if delta == -999:
+            self.hearts = 0
+        else:
+            self.hearts = max(0, min(10, self.hearts + delta))
+        h = self.history
+        if not h.get('had_grey') and GREY_MIN <= self.hearts <= GREY_MAX:
+            h['had_grey'] = True
+            h['grey_step'] = self.step
+        if self.hearts >= RED_MIN and h.get('had_grey'):
+            h['had_red_again'] = True
+        if not h.get('ended_black') and self.hearts <= BLACK_MAX:
+            h['ended_black'] = True
+            h['black_step'] = self.step
+        if h.get('ended_black'):
+            if delta < 0:
+                h['post_black_decrease_count'] = h.get('post_black_decrease_count', 0) + 1
+            elif delta > 0:
+                h['post_black_increased'] = True
+
+    def apply_heart(self, delta):
+        adj = scale_delta(delta)
+        if adj:
+            self.change_hearts(adj)
+        return adj
+
+    def apply_money(self, delta):
+        adj = scale_delta(delta)
+        if adj:
+            self.change_money(adj)
+        return adj
+
+    def _finish(self):
+        self.phase = 'ending'
+        self.current_event = None
+        self.ending = select_ending(self.hearts, self.money, self.history)
+        return self.ending
+
+    def _count_grey_choice(self):
+        if GREY_MIN <= self.hearts <= GREY_MAX:
+            self.history['grey_choice_count'] = self.history.get('grey_choice_count', 0) + 1
+
+    # ---------------- 玩家操作 ----------------
+    def choose_prep(self, index):
+        _, heart_delta, money_delta, _ = self.table.prep[index]
+        self.clicks += 1
+        # prep choices are not scaled by effect_multiplier
+        self.change_hearts(heart_delta)
+        self.change_money(money_delta)
+        self.phase = 'business'
+
+    def choose_action(self, index):
+        _, heart_delta, money_delta, _ = self.table.actions[index]
+        self.clicks += 1
+        if heart_delta != 0:
+            self.apply_heart(heart_delta)
+            if money_delta:
+                self.apply_money(money_delta)
+        else:
+            self.apply_money(money_delta)
+        self._count_grey_choice()
+        if apathy_reached(self.hearts, self.money, self.history):
+            return self._finish()
+        key = self.events.on_action()
+        if key:
+            self.current_event = key
+        return self._update(0)
+
+    def choose_event(self, choice):
+        """choice: 'A' (通常是负面) 或 'B' (正面)"""
+        self.clicks += 1
+        effect = self.table.effect(self.current_event, choice)
+        if effect is not None:
+            apply_effect(effect, self, self.apply_heart, self.apply_money)
+        self.events.resolve(effect)
+
+        # generic post-event bookkeeping
+        self._count_grey_choice()
+        if apathy_reached(self.hearts, self.money, self.history):
+            return self._finish()
+        self.current_event = None
+        return self._update(0)
+
+    def wait(self, ms):
+        """让时间流逝 ms 毫秒 (BusinessScene.update 的计时规则)"""
+        if self.phase != 'business':
+            return self.ending
+        if not self.frame_ms:
+            return self._update(ms)
+        left = ms
+        while left > 0:
+            dt = min(self.frame_ms, left)
+            left -= dt
+            if self._update(dt) is not None:
+                return self.ending
+        return None
+
+    def _update(self, dt):
+        before = self.now
+        self.now += dt
+        # continuous mode: an event fires when its timer actually ran out (or at the start of this
+        # wait if it was already overdue), so the rest of the wait counts toward the next one
+        key = self.events.tick(self.now, since=None if self.frame_ms else before)
+        if key:
+            self.current_event = key
+        # immediate forced ending: all red hearts and deep in debt
+        if self.hearts >= RED_MIN and self.money < BEST_RED_DEBT:
+            return self._finish()
+        # end of day once every event is processed, unless still red and solvent
+        if not self.current_event and self.events.finished():
+            if self.hearts >= RED_MIN and self.money >= BEST_RED_DEBT:
+                return None
+            return self._finish()
+        return None
+
+    # ---------------- 整局运行 ----------------
+    def _think(self):
+        t = self.think_time
+        return t(self) if callable(t) else t
+
+    def run(self, policy, max_decisions=10000):
+        """
+        用策略跑完一整天，返回 (结局key, history)
+        policy(sim, phase, n_choices) -> index；phase 为 'prep' / 'action' / 'event'，
+        事件阶段 index 0 表示 Choice A，1 表示 Choice B
+        """
+        if self.phase == 'prep':
+            self.choose_prep(policy(self, 'prep', len(self.table.prep)))
+        decisions = 0
+        while self.phase == 'business' and decisions < max_decisions:
+            decisions += 1
+            if self.wait(self._think()) is not None:
+                break
+            if self.current_event:
+                self.choose_event('A' if policy(self, 'event', 2) == 0 else 'B')
+            else:
+                self.choose_action(policy(self, 'action', len(self.table.actions)))
+        return self.ending, dict(self.history)
+
+
+def random_policy(rng=None):
+    """均匀随机策略"""
+    rng = rng if rng is not None else random.Random()
+
+    def policy(sim, phase, n):
+        return rng.randrange(n)
+    return policy
+
+
+def run_day(policy, seed=None, think_time=1500, frame_ms=None, max_decisions=10000):
+    """跑一天并返回 (结局key, history)"""
+    sim = CanteenSim(seed=seed, think_time=think_time, frame_ms=frame_ms)
+    return sim.run(policy, max_decisions=max_decisions)
@@ -0,0 +1,601 @@
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from simulation import (
+    PREP_OPTIONS, ACTION_OPTIONS, EVENT_KEYS, EVENT_EFFECTS, ENDING_KEYS,
+    EFFECT_MULTIPLIER, FIRST_EVENT_ACTIONS, EVENT_DELAY_MIN, EVENT_DELAY_MAX,
+    RED_MIN, GREY_MIN, GREY_MAX, BLACK_MAX, APATHY_MONEY, APATHY_GREY_CHOICES,
+    BEST_RED_DEBT, EVENT_TABLE, scale_delta,
+)
+
+# 结局可达性精确求解 - 把一天的全部可达状态展开一次，在状态图上做动态规划
+# 回答：从任意状态能到达哪些结局、到达每个结局最少点几次、在给定随机策略下各结局的精确概率
+# (概率是对整棵博弈树的精确加权求和，不是抽样)
+#
+# 时间模型与 CanteenSim(frame_ms=think_time) 一致：每次决策前经过 think_time 毫秒，
+# 事件触发时计时器清零，于是 "还要等几次决策" 就是一个整数倒计时
+# 状态数在千万量级，所以和 batch_sim 一样用 NumPy 按批处理，状态压缩成一个 int64
+
+CACHE_DIR = 'solver_cache'
+CACHE_VERSION = 1
+
+SPIRAL_CONSEC = 4       # post_black_negative_consec 达到这个值以上都一样
+SPIRAL_MONEY = 900      # last_negative_choice_money 必须大于它
+
+# flags 位
+HAD_GREY = 1
+ENDED_BLACK = 2
+CHOSE_POSITIVE = 4
+RICH_NEGATIVE = 8       # 最后一次黑心负面选择时 money > 900
+
+PREP = -2               # pending 的特殊值：还在准备阶段
+N_EVENTS = len(EVENT_KEYS)
+ALL_EVENTS = (1 << N_EVENTS) - 1
+ENDING_INDEX = {k: i for i, k in enumerate(ENDING_KEYS)}
+NO_ENDING = -1
+UNREACHED = np.iinfo(np.int16).max
+
+# 决策点的状态 (在等待 think_time 之后、玩家点击之前)
+#   remaining: 还没出现的事件 (位掩码)；pending: 当前事件下标，-1 无事件，PREP 为准备阶段
+#   actions_done 上限 FIRST_EVENT_ACTIONS；countdown: 距下个事件还要几次等待
+SolverState = namedtuple('SolverState', [
+    'hearts', 'money', 'grey_choices', 'flags', 'consec',
+    'remaining', 'pending', 'actions_done', 'countdown',
+])
+
+# 压缩编码：(字段, 位宽, 偏移)
+_LAYOUT = [
+    ('hearts', 4, 0), ('money', 20, 1 << 19), ('grey_choices', 3, 0), ('flags', 4, 0),
+    ('consec', 3, 0), ('remaining', 5, 0), ('pending', 3, 2), ('actions_done', 3, 0),
+    ('countdown', 8, 0),
+]
+
+
+def encode(s):
+    code = np.zeros(len(s['hearts']), dtype=np.int64)
+    shift = 0
+    for name, bits, offset in _LAYOUT:
+        code |= (np.asarray(s[name], dtype=np.int64) + offset) << shift
+        shift += bits
+    return code
+
+
+def decode(code):
+    s = {}
+    shift = 0
+    for name, bits, offset in _LAYOUT:
+        s[name] = ((code >> shift) & ((1 << bits) - 1)).astype(np.int64) - offset
+        shift += bits
+    return s
+
+
+def _popcount(mask):
+    return sum((mask >> e) & 1 for e in range(N_EVENTS))
+
+
+def canonical(s):
+    """
+    清掉以后再也不会影响结局的字段，让等价状态合并 (原地修改)
+    - 没有事件会再触发时，倒计时无意义
+    - 剩下的事件不够凑出 4 次连续负面选择时，spiral 不可能，它用到的标记都无意义
+    """
+    s['countdown'] = np.where(s['remaining'] == 0, 0, s['countdown'])
+    future = _popcount(s['remaining']) + (s['pending'] >= 0)
+    dead = s['consec'] + future < SPIRAL_CONSEC
+    s['consec'] = np.where(dead, 0, s['consec'])
+    s['flags'] = np.where(dead, 0, s['flags'])
+    return s
+
+
+def order_key(s):
+    """
+    拓扑序：每次决策后的状态 key 都严格变小
+    营业中 (2*剩余事件 + 是否有事件, 倒计时, 还差几次行动)；事件全部结束后 (心, 钱) 只减不增
+    """
+    major = 2 * _popcount(s['remaining']) + (s['pending'] >= 0) + 2 * (s['pending'] == PREP)
+    key = ((major * 256 + s['countdown']) * 8 + (FIRST_EVENT_ACTIONS - s['actions_done'])) << 24
+    tail = (s['remaining'] == 0) & (s['pending'] == -1)
+    return key + np.where(tail, (s['hearts'] << 20) + s['money'] + (1 << 19), 0)
+
+
+def state_from_sim(sim):
+    """从 CanteenSim (frame_ms=think_time) 的当前状态构造 SolverState"""
+    h = sim.history
+    flags = 0
+    if h.get('had_grey'):
+        flags |= HAD_GREY
+    if h.get('ended_black'):
+        flags |= ENDED_BLACK
+    if h.get('chose_positive_event'):
+        flags |= CHOSE_POSITIVE
+    if h.get('last_negative_choice_money', 0) > SPIRAL_MONEY:
+        flags |= RICH_NEGATIVE
+    remaining = 0
+    for key in sim.events.remaining():
+        remaining |= 1 << EVENT_KEYS.index(key)
+    if sim.phase == 'prep':
+        pending = PREP
+    else:
+        pending = EVENT_KEYS.index(sim.current_event) if sim.current_event else -1
+    if sim.now > sim.events.draw_due:
+        countdown = 0
+    else:
+        countdown = (sim.events.draw_due - sim.now) // sim.think_time + 1
+    return SolverState(
+        sim.hearts, sim.money,
+        min(h.get('grey_choice_count', 0), APATHY_GREY_CHOICES), flags,
+        min(h.get('post_black_negative_consec', 0), SPIRAL_CONSEC),
+        remaining, pending, min(sim.events.actions, FIRST_EVENT_ACTIONS), countdown,
+    )
+
+
+def uniform_policy(event_b=0.5):
+    """均匀随机策略 (事件阶段以 event_b 的概率选 B)"""
+    def policy(s, phase, n):
+        if phase == 'event':
+            return np.array([1 - event_b, event_b])
+        return np.full(n, 1.0 / n)
+    return policy
+
+
+class _Rows:
+    """一批展开中的分支：parent 为出发状态的行号，prob 为分支概率，end 为已到达的结局"""
+    def __init__(self, s, parent, prob):
+        self.s = s
+        self.parent = parent
+        self.prob = prob
+        self.end = np.full(len(parent), NO_ENDING, dtype=np.int64)
+
+    def take(self, idx):
+        rows = _Rows({k: v[idx] for k, v in self.s.items()}, self.parent[idx], self.prob[idx])
+        rows.end = self.end[idx]
+        return rows
+
+    def concat(self, other):
+        rows = _Rows({k: np.concatenate([v, other.s[k]]) for k, v in self.s.items()},
+                     np.concatenate([self.parent, other.parent]),
+                     np.concatenate([self.prob, other.prob]))
+        rows.end = np.concatenate([self.end, other.end])
+        return rows
+
+
+class EndingSolver:
+    """
+    一天的状态图：第一次查询时从初始状态展开全部可达状态并按拓扑序做 DP
+    结果按 (think_time, effect_multiplier, 事件表规则的哈希) 存成 .npz，之后的查询直接查表
+    """
+    def __init__(self, think_time=1500, effect_multiplier=EFFECT_MULTIPLIER, cache_dir=CACHE_DIR):
+        if think_time <= 0:
+            raise ValueError("think_time must be positive")
+        if not EVENT_TABLE.plain:
+            raise ValueError("the solver only models plain event tables (each event once a day, equal weights, "
+                             "no preconditions or chains); use CanteenSim / montecarlo.py instead")
+        self.think_time = think_time
+        self.effect_multiplier = effect_multiplier
+        self.cache_dir = cache_dir
+        self.codes = None
+        self.tables = {}
+        self._build_rules()
+        self._load_cache()
+
+    # ---------------- 规则 ----------------
+    def _build_rules(self):
+        mult = self.effect_multiplier
+        self.prep_h = np.array([o[1] for o in PREP_OPTIONS], dtype=np.int64)
+        self.prep_m = np.array([o[2] for o in PREP_OPTIONS], dtype=np.int64)
+        self.act_h = np.array([scale_delta(o[1], mult) for o in ACTION_OPTIONS], dtype=np.int64)
+        self.act_m = np.array([scale_delta(o[2], mult) for o in ACTION_OPTIONS], dtype=np.int64)
+        ev = [EVENT_EFFECTS[key] for key in EVENT_KEYS]
+        self.ev_h = np.array([[scale_delta(c[0], mult) for c in e] for e in ev], dtype=np.int64)
+        self.ev_m = np.array([[scale_delta(c[1], mult) for c in e] for e in ev], dtype=np.int64)
+        self.ev_neg = np.array([[c[2] for c in e] for e in ev])
+        self.ev_pos = np.array([[c[3] for c in e] for e in ev])
+        self.ev_reset = np.array([[c[4] for c in e] for e in ev])
+        # delay 在 [MIN, MAX] 上均匀；需要 k 次等待才能让计时器超过它
+        ks = np.arange(EVENT_DELAY_MIN, EVENT_DELAY_MAX + 1) // self.think_time + 1
+        if ks.max() >= 256:
+            raise ValueError("think_time too small for the countdown encoding")
+        values, counts = np.unique(ks, return_counts=True)
+        self.countdowns = values
+        self.countdown_p = counts / counts.sum()
+
+    def initial_states(self):
+        """新一局的准备阶段，按首个事件延迟分布给出 [(概率, SolverState)]"""
+        return [(float(p), SolverState(10, 0, 0, 0, 0, ALL_EVENTS, PREP, 0, int(k)))
+                for p, k in zip(self.countdown_p, self.countdowns)]
+
+    @staticmethod
+    def _hearts(s, delta):
+        hearts = np.where(delta <= -999, 0, np.clip(s['hearts'] + delta, 0, 10))
+        s['hearts'] = hearts
+        flags = s['flags'] | np.where((hearts >= GREY_MIN) & (hearts <= GREY_MAX), HAD_GREY, 0)
+        s['flags'] = flags | np.where(hearts <= BLACK_MAX, ENDED_BLACK, 0)
+
+    @staticmethod
+    def _grey(s):
+        return (s['hearts'] >= GREY_MIN) & (s['hearts'] <= GREY_MAX)
+
+    def _apathy(self, s):
+        return (s['money'] >= APATHY_MONEY) & (s['grey_choices'] >= APATHY_GREY_CHOICES) & self._grey(s)
+
+    def _ending(self, s):
+        """select_ending 的向量化版本"""
+        v = s['hearts']
+        f = s['flags']
+        spiral = (((f & HAD_GREY) > 0) & ((f & CHOSE_POSITIVE) > 0) & ((f & ENDED_BLACK) > 0) &
+                  (s['consec'] >= SPIRAL_CONSEC) & ((f & RICH_NEGATIVE) > 0))
+        key = np.where(v <= BLACK_MAX,
+                       np.where(spiral, ENDING_INDEX['spiral'], ENDING_INDEX['1A']),
+                       np.where(v >= RED_MIN,
+                                np.where(s['money'] < BEST_RED_DEBT,
+                                         ENDING_INDEX['best_red'], ENDING_INDEX['1B']),
+                                ENDING_INDEX['apathy']))
+        return np.where(self._apathy(s), ENDING_INDEX['apathy'], key)
+
+    def _count_grey(self, s):
+        s['grey_choices'] = np.minimum(APATHY_GREY_CHOICES, s['grey_choices'] + self._grey(s))
+
+    def _pop_event(self, rows, mask, draw_delay):
+        """
+        对 mask 行从剩余事件里均匀抽一个 (draw_delay 时同时抽下一次延迟)，
+        每行展开成若干分支，返回新的 rows
+        """
+        keep = rows.take(np.flatnonzero(~mask))
+        fire = rows.take(np.flatnonzero(mask))
+        if not len(fire.parent):
+            return keep
+        left = _popcount(fire.s['remaining'])
+        ks = self.countdowns if draw_delay else np.array([-1])
+        ps = self.countdown_p if draw_delay else np.array([1.0])
+        for e in range(N_EVENTS):
+            has = np.flatnonzero((fire.s['remaining'] >> e) & 1)
+            if not has.size:
+                continue
+            base = fire.take(has)
+            for k, pk in zip(ks, ps):
+                branch = base.take(np.arange(len(has)))
+                branch.s['pending'] = np.full(len(has), e)
+                branch.s['remaining'] = base.s['remaining'] & ~(1 << e)
+                if k >= 0:
+                    branch.s['countdown'] = np.full(len(has), k)
+                branch.prob = base.prob * pk / left[has]
+                keep = keep.concat(branch)
+        return keep
+
+    def _update(self, rows, waited):
+        """BusinessScene.update (只作用于还没结束的行)"""
+        s = rows.s
+        live = rows.end == NO_ENDING
+        if waited:
+            s['countdown'] = np.where(live, np.maximum(0, s['countdown'] - 1), s['countdown'])
+        fire = (live & (s['pending'] < 0) & (s['remaining'] > 0) &
+                (s['actions_done'] >= FIRST_EVENT_ACTIONS) & (s['countdown'] == 0))
+        rows = self._pop_event(rows, fire, True)
+        s = rows.s
+        live = rows.end == NO_ENDING
+        red = s['hearts'] >= RED_MIN
+        forced = red & (s['money'] < BEST_RED_DEBT)
+        end_of_day = (s['remaining'] == 0) & (s['pending'] < 0) & ~(red & (s['money'] >= BEST_RED_DEBT))
+        done = live & (forced | end_of_day)
+        rows.end = np.where(done, self._ending(s), rows.end)
+        return rows
+
+    def expand(self, s, option):
+        """
+        从一批决策点状态 s 选第 option 个选项，返回所有分支
+        (parent, prob, 下一个决策点的编码, 结局下标)，到达结局的分支编码为 -1
+        """
+        n = len(s['hearts'])
+        rows = _Rows({k: v.copy() for k, v in s.items()}, np.arange(n), np.ones(n))
+        s = rows.s
+        prep = s['pending'] == PREP
+        event = s['pending'] >= 0
+        action = ~prep & ~event
+        # prep: 不缩放，总是走 change_hearts
+        if option < len(PREP_OPTIONS):
+            h = np.where(prep, self.prep_h[option], 0)
+            m = np.where(prep, self.prep_m[option], 0)
+        else:
+            h = m = np.zeros(n, dtype=np.int64)
+        if option < len(ACTION_OPTIONS):
+            h = np.where(action, self.act_h[option], h)
+            m = np.where(action, self.act_m[option], m)
+        ev = np.clip(s['pending'], 0, N_EVENTS - 1)
+        c = min(option, 1)
+        if option < 2:
+            h = np.where(event, self.ev_h[ev, c], h)
+            m = np.where(event, self.ev_m[ev, c], m)
+        self._hearts(rows.s, h)
+        s['money'] = s['money'] + m
+        # event bookkeeping
+        if option < 2:
+            black = s['hearts'] <= BLACK_MAX
+            neg = event & self.ev_neg[ev, c] & black
+            s['consec'] = np.where(neg, np.minimum(SPIRAL_CONSEC, s['consec'] + 1), s['consec'])
+            rich = np.where(s['money'] > SPIRAL_MONEY, RICH_NEGATIVE, 0)
+            s['flags'] = np.where(neg, (s['flags'] & ~RICH_NEGATIVE) | rich, s['flags'])
+            s['flags'] = s['flags'] | np.where(event & self.ev_pos[ev, c], CHOSE_POSITIVE, 0)
+            s['consec'] = np.where(event & self.ev_reset[ev, c] & black, 0, s['consec'])
+        first = np.zeros(n, dtype=bool)
+        if option < len(ACTION_OPTIONS):
+            before = s['actions_done']
+            s['actions_done'] = np.where(action, np.minimum(FIRST_EVENT_ACTIONS, before + 1), before)
+            first = action & (before < FIRST_EVENT_ACTIONS) & (s['actions_done'] >= FIRST_EVENT_ACTIONS)
+        # 行动和事件之后的通用处理
+        business = ~prep
+        grey_before = s['grey_choices']
+        self._count_grey(s)
+        s['grey_choices'] = np.where(business, s['grey_choices'], grey_before)
+        rows.end = np.where(business & self._apathy(s), ENDING_INDEX['apathy'], NO_ENDING)
+        s['pending'] = np.where(event | prep, -1, s['pending'])
+        # the first event pops straight off the queue; the delay is not redrawn
+        rows = self._pop_event(rows, first & (rows.end == NO_ENDING) & (s['remaining'] > 0), False)
+        rows = self._update(rows, False)
+        rows = self._update(rows, True)
+        live = rows.end == NO_ENDING
+        code = np.where(live, encode(canonical(rows.s)), -1)
+        return rows.parent, rows.prob, code, rows.end
+
+    @staticmethod
+    def n_options(s):
+        return np.where(s['pending'] == PREP, len(PREP_OPTIONS),
+                        np.where(s['pending'] >= 0, 2, len(ACTION_OPTIONS)))
+
+    # ---------------- 状态图 ----------------
+    def _successors(self, codes):
+        """一批决策点的全部后继编码 (去重)，并检查拓扑序"""
+        s = decode(codes)
+        valid = self.n_options(s)
+        keys = order_key(s)
+        found = []
+        for option in range(max(len(PREP_OPTIONS), len(ACTION_OPTIONS))):
+            idx = np.flatnonzero(valid > option)
+            if not idx.size:
+                continue
+            parent, _, code, _ = self.expand({k: v[idx] for k, v in s.items()}, option)
+            live = code >= 0
+            nxt = code[live]
+            if np.any(order_key(decode(nxt)) >= keys[idx[parent[live]]]):
+                raise RuntimeError("state graph is not ordered by order_key")
+            found.append(nxt)
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+
+    def _explore(self):
+        """
+        从初始状态展开全部可达决策点，返回排好序的编码
+        按 order_key 的高位分桶从大到小处理：轮到某个桶时它的所有前驱都已展开，
+        所以桶里的状态已经收齐，不需要对全体已见状态反复查重
+        """
+        start = time.perf_counter()
+        init = [st for _, st in self.initial_states()]
+        pool = {}
+
+        def add(codes):
+            buckets = order_key(decode(codes)) >> 24
+            for b in np.unique(buckets):
+                pool.setdefault(int(b), []).append(codes[buckets == b])
+
+        add(encode({f: np.array([getattr(st, f) for st in init]) for f in SolverState._fields}))
+        done = []
+        while pool:
+            bucket = max(pool)
+            codes = np.unique(np.concatenate(pool.pop(bucket)))
+            seen = codes
+            while codes.size:
+                done.append(codes)
+                nxt = self._successors(codes)
+                buckets = order_key(decode(nxt)) >> 24
+                add(nxt[buckets != bucket])
+                # only the post-event bucket has edges inside itself (money keeps dropping)
+                codes = np.setdiff1d(nxt[buckets == bucket], seen)
+                seen = np.union1d(seen, codes)
+        codes = np.unique(np.concatenate(done))
+        print(f"[EndingSolver] explored {codes.size} states in {time.perf_counter() - start:.1f}s")
+        return codes
+
+    def _groups(self):
+        """按 order_key 从小到大分组；每组的后继都在更早的组里"""
+        keys = order_key(decode(self.codes))
+        order = np.argsort(keys, kind='stable')
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        return np.split(order, bounds)
+
+    def _lookup(self, code):
+        return np.searchsorted(self.codes, code)
+
+    def _solve(self, names, policy=None):
+        """按拓扑序一次算出 names 里的表 ('reach' / 'clicks' / ('probs', key))"""
+        if self.codes is None:
+            self.codes = self._explore()
+        start = time.perf_counter()
+        n = self.codes.size
+        n_end = len(ENDING_KEYS)
+        reach = np.zeros(n, dtype=np.uint8) if 'reach' in names else None
+        clicks = np.full((n, n_end), UNREACHED, dtype=np.int16) if 'clicks' in names else None
+        probs_name = next((x for x in names if isinstance(x, tuple)), None)
+        probs = np.zeros((n, n_end)) if probs_name else None
+        n_opts = max(len(PREP_OPTIONS), len(ACTION_OPTIONS))
+        for group in self._groups():
+            s = decode(self.codes[group])
+            valid = self.n_options(s)
+            if probs is not None:
+                weights = np.zeros((group.size, n_opts))
+                for phase, mask in (('prep', s['pending'] == PREP), ('event', s['pending'] >= 0),
+                                    ('action', s['pending'] == -1)):
+                    idx = np.flatnonzero(mask)
+                    if idx.size:
+                        sub = {k: v[idx] for k, v in s.items()}
+                        k = int(valid[idx[0]])
+                        weights[idx, :k] = np.broadcast_to(policy(sub, phase, k), (idx.size, k))
+            # accumulate into per-group arrays, then write the group back in one go
+            m = group.size
+            g_reach = np.zeros(m, dtype=np.uint8)
+            g_clicks = np.full((m, n_end), UNREACHED, dtype=np.int16)
+            g_probs = np.zeros((m, n_end))
+            for option in range(n_opts):
+                idx = np.flatnonzero(valid > option)
+                if not idx.size:
+                    continue
+                sub = {k: v[idx] for k, v in s.items()}
+                parent, prob, code, end = self.expand(sub, option)
+                rows = idx[parent]
+                live = code >= 0
+                dead = ~live
+                succ = self._lookup(np.where(live, code, self.codes[0]))
+                if reach is not None:
+                    bits = np.where(live, reach[succ], 1 << np.maximum(end, 0)).astype(np.uint8)
+                    np.bitwise_or.at(g_reach, rows, bits)
+                if clicks is not None:
+                    sub_clicks = clicks[succ]
+                    sub_clicks[dead] = UNREACHED
+                    sub_clicks[dead, end[dead]] = 0
+                    sub_clicks = np.minimum(sub_clicks.astype(np.int32) + 1, UNREACHED).astype(np.int16)
+                    for e in range(n_end):
+                        np.minimum.at(g_clicks[:, e], rows, sub_clicks[:, e])
+                if probs is not None:
+                    w = weights[rows, option] * prob
+                    sub_probs = probs[succ]
+                    sub_probs[dead] = 0.0
+                    sub_probs[dead, end[dead]] = 1.0
+                    for e in range(n_end):
+                        g_probs[:, e] += np.bincount(rows, weights=w * sub_probs[:, e], minlength=m)
+            if reach is not None:
+                reach[group] = g_reach
+            if clicks is not None:
+                clicks[group] = g_clicks
+            if probs is not None:
+                probs[group] = g_probs
+        print(f"[EndingSolver] solved {names} in {time.perf_counter() - start:.1f}s")
+        if reach is not None:
+            self.tables['reach'] = reach
+        if clicks is not None:
+            self.tables['clicks'] = clicks
+        if probs is not None:
+            self.tables[probs_name] = probs
+
+    def _table(self, name, policy=None):
+        if name not in self.tables:
+            names = [name]
+            # reachability and click counts come from the same pass
+            if name in ('reach', 'clicks'):
+                names = [x for x in ('reach', 'clicks') if x not in self.tables]
+            self._solve(names, policy)
+            self.save_cache()
+        return self.tables[name]
+
+    def _rows_for(self, state):
+        """state=None 表示新一局 -> [(概率, 行号)]"""
+        states = self.initial_states() if state is None else [(1.0, SolverState(*state))]
+        code = encode(canonical({f: np.array([getattr(st, f) for _, st in states])
+                                 for f in SolverState._fields}))
+        rows = self._lookup(code)
+        if np.any(rows >= self.codes.size) or np.any(self.codes[np.minimum(rows, self.codes.size - 1)] != code):
+            raise KeyError(f"state not reachable from a new day: {state}")
+        return [(p, int(r)) for (p, _), r in zip(states, rows)]
+
+    # ---------------- 查询 ----------------
+    def reachable(self, state=None):
+        """从 state (默认新一局) 能到达的结局集合"""
+        reach = self._table('reach')
+        bits = 0
+        for _, row in self._rows_for(state):
+            bits |= int(reach[row])
+        return {key for i, key in enumerate(ENDING_KEYS) if bits & (1 << i)}
+
+    def min_clicks(self, state=None):
+        """到达每个结局最少需要的点击次数 (随机事件也按最有利的情况算)"""
+        clicks = self._table('clicks')
+        best = {}
+        for _, row in self._rows_for(state):
+            for i, key in enumerate(ENDING_KEYS):
+                c = int(clicks[row, i])
+                if c < UNREACHED:
+                    best[key] = min(best.get(key, c), c)
+        return best
+
+    def probabilities(self, policy=None, state=None, policy_key=None):
+        """
+        policy(s, phase, n) -> 每个选项的概率，形状 (n,) 或 (批大小, n)；
+        s 是一批状态的字段数组，phase 为 'prep' / 'action' / 'event'
+        给出 policy_key 时结果会存到磁盘缓存
+        """
+        if policy is None:
+            policy, policy_key = uniform_policy(), 'uniform'
+        name = ('probs', policy_key or f'unnamed-{id(policy)}')
+        table = self._table(name, policy)
+        if not policy_key:
+            # unnamed policies are kept out of the cache
+            self.tables.pop(name, None)
+        dist = np.zeros(len(ENDING_KEYS))
+        for p, row in self._rows_for(state):
+            dist += p * table[row]
+        return {key: float(dist[i]) for i, key in enumerate(ENDING_KEYS)}
+
+    # ---------------- 磁盘缓存 ----------------
+    def cache_path(self):
+        return os.path.join(self.cache_dir, f"v{CACHE_VERSION}_t{self.think_time}_m{self.effect_multiplier:g}_{EVENT_TABLE.fingerprint()}.npz")
+
+    def _load_cache(self):
+        path = self.cache_path() if self.cache_dir else None
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with np.load(path) as data:
+                self.codes = data['codes']
+                for name in data.files:
+                    if name == 'codes':
+                        continue
+                    key = ('probs', name[len('probs:'):]) if name.startswith('probs:') else name
+                    self.tables[key] = data[name]
+        except Exception as e:
+            print(f"[EndingSolver] ignoring unreadable cache {path}: {e}")
+            self.codes = None
+            self.tables = {}
+
+    def save_cache(self):
+        if not self.cache_dir or self.codes is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        arrays = {'codes': self.codes}
+        for key, table in self.tables.items():
+            if isinstance(key, tuple):
+                if key[1].startswith('unnamed-'):
+                    continue
+                arrays['probs:' + key[1]] = table
+            else:
+                arrays[key] = table
+        path = self.cache_path()
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact ending reachability / probability solver")
+    parser.add_argument('--think-time', type=int, default=1500, help="ms before each decision")
+    parser.add_argument('--multiplier', type=float, default=EFFECT_MULTIPLIER)
+    parser.add_argument('--event-b', type=float, default=0.5,
+                        help="probability of choosing B in events for the uniform policy")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    args = parser.parse_args()
+
+    solver = EndingSolver(args.think_time, args.multiplier, cache_dir=args.cache_dir)
+    start = time.perf_counter()
+    reach = solver.reachable()
+    clicks = solver.min_clicks()
+    key = 'uniform' if args.event_b == 0.5 else f'uniform-b{args.event_b:g}'
+    probs = solver.probabilities(uniform_policy(args.event_b), policy_key=key)
+    print(f"answered in {time.perf_counter() - start:.2f}s ({solver.codes.size} states)\n")
+    print(f"{'ending':>9} {'reachable':>10} {'min clicks':>11} {'P(uniform)':>11}")
+    for ending in ENDING_KEYS:
+        c = clicks.get(ending)
+        print(f"{ending:>9} {str(ending in reach):>10} {'-' if c is None else c:>11} "
+              f"{probs[ending]:>11.4%}")
+
+
+if __name__ == '__main__':
+    main()
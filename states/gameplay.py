@@ -1,11 +1,12 @@
 import pygame
 from ui import Button
 from dialog import DialogBox
+from utils.fonts import get_font
 
 class GameplayState:
     def __init__(self, screen):
         self.screen = screen
-        self.font = pygame.font.Font("assets/fonts/m6x11.ttf", 24)
+        self.font = get_font("assets/fonts/m6x11.ttf", 24)
 
         # UI Buttons
         self.buttons = [
@@ -1,10 +1,11 @@
 import pygame, sys
 from config import *
+from utils.fonts import get_font
 
 class Menu:
     def __init__(self, screen):
         self.screen = screen
-        self.font = pygame.font.Font("assets/fonts/m6x11.ttf", 60)
+        self.font = get_font("assets/fonts/m6x11.ttf", 60)
         self.options = ["Start Game", "Quit"]
         self.selected = 0
 
@@ -1,11 +1,12 @@
 import pygame, sys
 from config import *
+from utils.fonts import get_font
 
 class Summary:
     def __init__(self, screen):
         self.screen = screen
-        self.font = pygame.font.Font("assets/fonts/m6x11.ttf", 50)
-        self.small = pygame.font.Font("assets/fonts/m6x11.ttf", 30)
+        self.font = get_font("assets/fonts/m6x11.ttf", 50)
+        self.small = get_font("assets/fonts/m6x11.ttf", 30)
         self.timer = 0
 
     def run(self):
@@ -0,0 +1,50 @@
+"""
+CanteenBoss 绘制微基准：对比逐图元绘制 (draw_immediate) 与缓存图层 (draw)
+用法: python tools/bench_boss.py [frames]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+
+def bench(draw, boss, surf, font, hearts, frames):
+    # warm up caches so the timed loop measures steady-state frames
+    for _ in range(10):
+        boss.update(16, hearts, 10)
+        draw(surf, font)
+    start = time.perf_counter()
+    for _ in range(frames):
+        boss.update(16, hearts, 10)
+        draw(surf, font)
+    return (time.perf_counter() - start) / frames * 1000.0
+
+
+def run(frames=2000):
+    pygame.init()
+    surf = pygame.display.set_mode((main.WINDOW_WIDTH, main.WINDOW_HEIGHT))
+    font = main.load_font(main.FONT_REGULAR, 20)
+    print(f"{'hearts':>6} {'immediate ms':>13} {'cached ms':>10} {'speedup':>8}")
+    for hearts in (10, 6, 2):
+        boss = main.CanteenBoss(200, main.WINDOW_HEIGHT // 2 + 50)
+        boss.set_mood("happy", "Smart choice! Save every cent!\n+$150!")
+        # keep the speech bubble and mood fixed for the whole run
+        boss.idle_chat_interval = 10 ** 9
+        boss.text_timer = 10 ** 9
+        before = bench(boss.draw_immediate, boss, surf, font, hearts, frames)
+        after = bench(boss.draw, boss, surf, font, hearts, frames)
+        print(f"{hearts:>6} {before:>13.4f} {after:>10.4f} {before / after:>7.1f}x")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
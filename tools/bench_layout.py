@@ -0,0 +1,112 @@
+"""
+换行微基准：旧的 wrap_text (每个词量一次不断变长的前缀) 对比 utils.layout 的排版引擎
+冷启动 = 新字符串第一次排版 (字形宽度已缓存)，热 = 同一字符串再次排版 (命中结果缓存)
+用法: python tools/bench_layout.py [repeats]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+from utils.layout import LayoutEngine
+
+
+class CountingFont:
+    """统计 font.size 调用次数的包装"""
+    def __init__(self, font):
+        self.font = font
+        self.calls = 0
+
+    def size(self, text):
+        self.calls += 1
+        return self.font.size(text)
+
+    def metrics(self, text):
+        self.calls += 1
+        return self.font.metrics(text)
+
+    def get_linesize(self):
+        return self.font.get_linesize()
+
+
+def legacy_wrap(text, font, max_width):
+    """改动前 main.wrap_text 的算法，作为对照"""
+    words = text.split(' ')
+    lines = []
+    cur = ''
+    for w in words:
+        test = (cur + ' ' + w).strip()
+        if font.size(test)[0] <= max_width:
+            cur = test
+        else:
+            if cur:
+                lines.append(cur)
+            if font.size(w)[0] > max_width:
+                part = ''
+                for ch in w:
+                    if font.size(part + ch)[0] <= max_width:
+                        part += ch
+                    else:
+                        if part:
+                            lines.append(part)
+                        part = ch
+                cur = part if part else ''
+            else:
+                cur = w
+    if cur:
+        lines.append(cur)
+    return lines
+
+
+def dialogue(length):
+    pool = [line.replace('\n', ' ') for lines in main.BOSS_DIALOGUES.values() for line in lines]
+    out, i = [], 0
+    while sum(len(s) + 1 for s in out) < length:
+        out.append(pool[i % len(pool)])
+        i += 1
+    return ' '.join(out)[:length]
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        fn(i)
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def run(repeats=50):
+    pygame.init()
+    pygame.display.set_mode((64, 64))
+    font = CountingFont(main.load_font(main.FONT_REGULAR, 24))
+    cases = [(dialogue(n), w) for n in (200, 1000, 5000) for w in (300, 600)]
+    cases.append(('x' * 2000 + ' tail', 300))
+    print(f"{'chars':>6} {'width':>6} {'legacy ms':>10} {'calls':>7} {'cold ms':>8} {'calls':>6} {'warm ms':>8} {'same':>5}")
+    for text, width in cases:
+        font.calls = 0
+        legacy_ms = timed(lambda i: legacy_wrap(text, font, width), repeats)
+        legacy_calls = font.calls // repeats
+        expected = legacy_wrap(text, font, width)
+
+        engine = LayoutEngine()
+        engine.layout(font, ' ', width)
+        font.calls = 0
+        # drop the layout cache (but keep glyph advances) so every call wraps from scratch
+        cold_ms = timed(lambda i: (engine.clear(advances=False), engine.layout(font, text, width)), repeats)
+        cold_calls = font.calls
+        warm_ms = timed(lambda i: engine.layout(font, text, width), repeats * 20)
+        same = [run.text for run in engine.layout(font, text, width)] == expected
+        print(f"{len(text):>6} {width:>6} {legacy_ms:>10.3f} {legacy_calls:>7} {cold_ms:>8.3f} {cold_calls:>6} "
+              f"{warm_ms:>8.4f} {str(same):>5}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,68 @@
+"""
+BGM 交叉淡化时的帧时间：营业阶段按 60 FPS 跑，诡异程度在 0 和 1 之间来回扫 (不断交叉淡化)，
+对比开着 MusicEngine 和关掉它时主线程每帧的耗时，以及音乐线程的欠载次数
+用法: python tools/bench_music.py [seconds]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+from utils.sound import percentile
+
+
+def frames(game, seconds, sweep_s=4.0):
+    """跑 seconds 秒，返回每帧主线程耗时 (ms)"""
+    clock = pygame.time.Clock()
+    scene = game.current
+    times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        t = time.perf_counter() - start
+        # triangle wave 0 -> 1 -> 0 every sweep_s seconds
+        level = 1.0 - abs((t / sweep_s) % 2.0 - 1.0)
+        frame_start = time.perf_counter()
+        pygame.event.pump()
+        scene.update(1000.0 / main.FPS)
+        game.sound.set_mood(level)
+        game.damage.full()
+        game.render_frame()
+        times.append((time.perf_counter() - frame_start) * 1000.0)
+        clock.tick(main.FPS)
+    return times
+
+
+def report(name, times):
+    print(f"{name:>10} frames {len(times):>5}  p50 {percentile(times, 0.5):6.2f}  p95 {percentile(times, 0.95):6.2f}  "
+          f"p99 {percentile(times, 0.99):6.2f}  max {max(times):6.2f} ms")
+
+
+def run(seconds=10.0):
+    game = main.Game()
+    game.wait_until_loaded()
+    if not game.sound or not game.sound.music:
+        print('music engine unavailable')
+        return
+    game.start_new_run()
+    game.change_scene('business')
+    game.current.show_instruction = False
+    # let the stem cache build and the queues fill before measuring
+    time.sleep(1.0)
+    report('music on', frames(game, seconds))
+    print(f"music stats: {game.sound.music.stats()}")
+    game.sound.stop_bgm()
+    report('music off', frames(game, seconds))
+    main.save_store.close()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0)
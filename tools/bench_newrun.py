@@ -0,0 +1,68 @@
+"""
+新一天的开销：点击 Start 到第一帧 (new_run) 和进入营业阶段到第一帧 (business)
+旧做法 = 每天重新创建 BusinessScene / EndingScene，新做法 = 复用场景只调用 reset()
+用法: python tools/bench_newrun.py [days]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+
+
+def rebuild_scenes(game):
+    """改动前 start_new_run 的做法，作为对照"""
+    game.scenes['business'] = main.BusinessScene(game)
+    game.scenes['ending'] = main.EndingScene(game)
+
+
+def play_days(game, days, legacy):
+    new_run, business = [], []
+    for _ in range(days):
+        if legacy:
+            start = time.perf_counter()
+            rebuild_scenes(game)
+            extra = (time.perf_counter() - start) * 1000.0
+        else:
+            extra = 0.0
+        game.start_new_run()
+        game.render_frame()
+        new_run.append(game.switch_ms['new_run'] + extra)
+        game.change_scene('business')
+        game.render_frame()
+        business.append(game.switch_ms['business'])
+        game.change_scene('title')
+        game.render_frame()
+    return new_run, business
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[-1]
+
+
+def run(days=50):
+    game = main.Game()
+    game.wait_until_loaded()
+    # first day builds every scene once; not part of either measurement
+    play_days(game, 1, legacy=False)
+    print(f"{'':>8} {'new_run p50':>12} {'max':>8} {'business p50':>13} {'max':>8}")
+    for name, legacy in (('rebuild', True), ('reset', False)):
+        new_run, business = play_days(game, days, legacy)
+        (nr50, nrmax), (b50, bmax) = summary(new_run), summary(business)
+        print(f"{name:>8} {nr50:>12.3f} {nrmax:>8.3f} {b50:>13.3f} {bmax:>8.3f}")
+    print(f"asset sync loads: {main.assets.stats()['sync_loads']}")
+    main.save_store.close()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
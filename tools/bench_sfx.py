@@ -0,0 +1,67 @@
+"""
+连点音效测试：模拟在营业阶段快速连点 (每次点击 = 点击音 + 收银音)，
+对比直接 Sound.play() (pygame 自己挑声道) 和 SfxEngine (预留声道 + 限流 + 抢占)
+用法: python tools/bench_sfx.py [clicks] [interval_ms]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+from utils.sound import SfxEngine
+
+
+def busy_channels():
+    return sum(1 for i in range(pygame.mixer.get_num_channels()) if pygame.mixer.Channel(i).get_busy())
+
+
+def burst(play, clicks, interval_ms):
+    """返回 (没能出声的触发次数, 最多同时发声的声道数)"""
+    silent = 0
+    peak = 0
+    for _ in range(clicks):
+        for name in ('click', 'cash'):
+            if play(name) is None:
+                silent += 1
+        peak = max(peak, busy_channels())
+        time.sleep(interval_ms / 1000.0)
+    pygame.mixer.stop()
+    return silent, peak
+
+
+def run(clicks=40, interval_ms=25):
+    pygame.mixer.pre_init(frequency=44100, buffer=main.MIXER_BUFFER)
+    pygame.init()
+    sounds = {name: pygame.mixer.Sound(os.path.join('assets', 'sounds', files[0]))
+              for name, files in main.SFX_FILES.items()}
+
+    silent, peak = burst(lambda name: sounds[name].play(), clicks, interval_ms)
+    print(f"Sound.play   triggers {clicks * 2:>4}  silent {silent:>4}  peak voices {peak:>2}")
+
+    engine = SfxEngine(main.SFX_CATEGORIES, buffer_samples=main.MIXER_BUFFER)
+    for name, sound in sounds.items():
+        engine.register(name, sound)
+
+    def play(name):
+        engine.mark_input()
+        channel = engine.play(name)
+        engine.end_input()
+        return channel
+
+    silent, peak = burst(play, clicks, interval_ms)
+    print(f"SfxEngine    triggers {clicks * 2:>4}  silent {silent:>4}  peak voices {peak:>2}")
+    print(f"engine stats: {engine.stats()}")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 40,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 25)
@@ -0,0 +1,376 @@
+"""
+无头渲染基准：用 SDL 的 dummy 视频/音频驱动启动 Game，每个场景用脚本化的鼠标输入跑固定帧数
+(标题、档案馆、准备阶段、弹出事件面板的营业阶段、打字机进行中的结局)，
+报告每个场景 update / 脏矩形渲染 / 整屏重绘的耗时 (均值、p50/p95/p99、最大) 和每帧净分配的内存块，
+每个场景跑 --repeat 次取每项的最好成绩
+结果可以存成基线 JSON；和基线比较时任何一项超过阈值就以状态码 1 退出
+
+用法:
+  python tools/benchmark.py                          # 跑一遍，打印结果
+  python tools/benchmark.py --save-baseline          # 同时写入基线 (默认 bench_baseline.json)
+  python tools/benchmark.py --compare --threshold 0.25
+  python tools/benchmark.py --scenes business ending --frames 600 --sections
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# main.py loads assets by relative path, so the benchmark runs from the repo root;
+# paths given on the command line are still relative to where the command was run
+CALLER_CWD = os.getcwd()
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+import main
+from utils.profiler import profiler
+from utils.sound import percentile
+
+BASELINE = 'bench_baseline.json'
+# 比较哪些指标；耗时很小的项噪声比例大，差值低于 FLOOR_MS 的不算退步 (尾部延迟抖得更厉害，门槛也更高)
+COMPARED = [('update_ms', 'mean'), ('render_ms', 'mean'), ('render_ms', 'p95'),
+            ('full_ms', 'mean'), ('full_ms', 'p95')]
+FLOOR_MS = {'mean': 0.05, 'p95': 0.25}
+ALLOC_FLOOR = 2.0
+
+
+class SyntheticMouse:
+    """dummy 驱动下光标不会动：基准期间用脚本给出的位置代替 pygame.mouse.get_pos"""
+    def __init__(self):
+        self.pos = (0, 0)
+        self._orig = None
+
+    def install(self):
+        self._orig = pygame.mouse.get_pos
+        pygame.mouse.get_pos = lambda: self.pos
+
+    def uninstall(self):
+        if self._orig is not None:
+            pygame.mouse.get_pos = self._orig
+
+    def move(self, pos):
+        """移到 pos，返回对应的 MOUSEMOTION 事件"""
+        rel = (pos[0] - self.pos[0], pos[1] - self.pos[1])
+        self.pos = (int(pos[0]), int(pos[1]))
+        return pygame.event.Event(pygame.MOUSEMOTION, pos=self.pos, rel=rel, buttons=(0, 0, 0))
+
+
+def sweep(rects, i, period=40):
+    """光标依次在每个矩形上停留 period 帧，中途走一段弧线 (悬停进出都会被测到)"""
+    rect = rects[(i // period) % len(rects)]
+    t = (i % period) / period
+    if t < 0.75:
+        return rect.center
+    # leave the button for the last quarter so the hover-out animation runs too
+    return rect.centerx + int(math.cos(t * 6.28) * rect.width), rect.bottom + 40
+
+
+# ---------------- 场景脚本：setup(game) 进入场景，step(game, scene, i) 返回这一帧光标的位置 ----------------
+
+def setup_title(game):
+    game.change_scene('title')
+
+
+def step_title(game, scene, i):
+    return sweep([scene.start_btn.rect, scene.campaign_btn.rect, scene.archive_btn.rect, scene.quit_btn.rect], i)
+
+
+def setup_archive(game):
+    # a few unlocked cards next to the locked ones (the temporary save starts empty)
+    for key in list(main.ALL_ENDINGS)[:3]:
+        main.unlock_ending(key)
+    game.change_scene('archive')
+
+
+def step_archive(game, scene, i):
+    return sweep([scene.back_btn.rect, pygame.Rect(200, 200, 600, 300)], i)
+
+
+def setup_prep(game):
+    game.start_new_run()
+    scene = game.current
+    scene.instruction_progress = float(len(scene.instruction_text))
+    scene.show_instruction = False
+
+
+def step_prep(game, scene, i):
+    return sweep([b.rect for b in scene.buttons], i)
+
+
+def setup_business(game):
+    game.start_new_run()
+    game.change_scene('business')
+    scene = game.current
+    scene.show_instruction = False
+    # grey hearts: creepy background, static noise and a twitchy boss behind the event panel
+    game.hearts = 5
+    scene.current_event = scene.scheduler.begin()
+
+
+def step_business(game, scene, i):
+    return sweep([b.rect for b in scene.event_buttons], i)
+
+
+def setup_ending(game):
+    game.start_new_run()
+    game.hearts = 2
+    game.history['had_grey'] = True
+    game.change_scene('ending')
+
+
+def step_ending(game, scene, i):
+    # keep the body typing for the whole run: start over when it has been fully revealed
+    if getattr(scene, 'body_progress', 0) >= len(getattr(scene, 'body_full', '')):
+        scene.body_progress = 0.0
+    return (640 + int(math.cos(i * 0.05) * 300), 500)
+
+
+SCENES = {
+    'title': (setup_title, step_title),
+    'archive': (setup_archive, step_archive),
+    'prep': (setup_prep, step_prep),
+    'business': (setup_business, step_business),
+    'ending': (setup_ending, step_ending),
+}
+
+
+def summarize(samples):
+    if not samples:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'mean': round(sum(samples) / len(samples), 4),
+        'p50': round(percentile(samples, 0.5), 4),
+        'p95': round(percentile(samples, 0.95), 4),
+        'p99': round(percentile(samples, 0.99), 4),
+        'max': round(max(samples), 4),
+    }
+
+
+def bench_scene(game, mouse, name, frames, warmup, sections=False):
+    setup, step = SCENES[name]
+    setup(game)
+    scene = game.current
+    game.render_frame()
+    dt = game.scheduler.step_ms
+    update_ms, render_ms, full_ms, blocks, pixels = [], [], [], [], []
+    gc0 = 0
+    profiler.reset()
+    for i in range(warmup + frames):
+        record = i >= warmup
+        events = [mouse.move(step(game, scene, i))]
+        if record:
+            profiler.begin_frame()
+            gen0 = gc.get_stats()[0]['collections']
+            allocated = sys.getallocatedblocks()
+        t0 = time.perf_counter()
+        scene.handle_events(events)
+        scene.update(dt)
+        game.frame_alpha = 1.0
+        t1 = time.perf_counter()
+        game.render_frame()
+        t2 = time.perf_counter()
+        if record:
+            blocks.append(sys.getallocatedblocks() - allocated)
+            gc0 += gc.get_stats()[0]['collections'] - gen0
+            pixels.append(game.pixels_updated)
+            profiler.end_frame((t2 - t0) * 1000.0)
+        # the same frame again from scratch: what a full-screen redraw of this scene costs
+        game.damage.full()
+        t3 = time.perf_counter()
+        game.render_frame()
+        t4 = time.perf_counter()
+        if record:
+            update_ms.append((t1 - t0) * 1000.0)
+            render_ms.append((t2 - t1) * 1000.0)
+            full_ms.append((t4 - t3) * 1000.0)
+        if game.current is not scene:
+            raise RuntimeError(f"{name}: the script left the scene on frame {i}")
+    result = {
+        'frames': frames,
+        'update_ms': summarize(update_ms),
+        'render_ms': summarize(render_ms),
+        'full_ms': summarize(full_ms),
+        'alloc_blocks_mean': round(sum(blocks) / len(blocks), 2),
+        'gc0': gc0,
+        'pixels_mean': int(sum(pixels) / len(pixels)),
+    }
+    if sections:
+        result['sections'] = {k: v['mean_ms'] for k, v in profiler.summary()['sections'].items()}
+    return result
+
+
+def calibrate(rounds=20):
+    """
+    一段固定的 pygame 工作 (整屏填充、半透明混合、缩放、文字) 的最好耗时
+    同一台机器负载或频率变了，这个数字会跟着变，比较基线时按它的比例修正
+    """
+    screen = pygame.Surface((main.WINDOW_WIDTH, main.WINDOW_HEIGHT))
+    layer = pygame.Surface((main.WINDOW_WIDTH, main.WINDOW_HEIGHT), pygame.SRCALPHA)
+    layer.fill((0, 0, 0, 120))
+    sprite = pygame.Surface((320, 80), pygame.SRCALPHA)
+    font = main.load_font("assets/fonts/m6x11.ttf", 24)
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        screen.fill((255, 245, 220))
+        screen.blit(layer, (0, 0))
+        for k in range(8):
+            screen.blit(pygame.transform.smoothscale(sprite, (336, 84)), (k * 100, 200))
+            screen.blit(font.render('calibration %d' % k, True, (255, 255, 255)), (k * 100, 400))
+        best = min(best, (time.perf_counter() - start) * 1000.0)
+    return round(best, 4)
+
+
+def best_of(results):
+    """几次重复里每一项取最小值：机器抖动只会让数字变大，最小值最能代表代码本身"""
+    best = dict(results[0])
+    for metric in ('update_ms', 'render_ms', 'full_ms'):
+        best[metric] = {stat: min(r[metric][stat] for r in results) for stat in results[0][metric]}
+    for key in ('alloc_blocks_mean', 'gc0'):
+        best[key] = min(r[key] for r in results)
+    if 'sections' in best:
+        best['sections'] = {k: min(r['sections'].get(k, 0.0) for r in results) for k in best['sections']}
+    best['repeat'] = len(results)
+    return best
+
+
+def run(names, frames, warmup, sections=False, repeat=3):
+    # ending unlocks go to a throwaway save, never the player's
+    tmp = tempfile.mkdtemp(prefix='ecs_bench_')
+    main.save_store.path = os.path.join(tmp, 'save_data.json')
+    mouse = SyntheticMouse()
+    mouse.install()
+    game = main.Game()
+    game.wait_until_loaded()
+    profiler.overlay = False
+    profiler.enable(sections)
+    try:
+        calib = calibrate()
+        # round-robin over the scenes, so a burst of machine noise does not hit every run of one scene
+        runs = {name: [] for name in names}
+        for _ in range(repeat):
+            calib = min(calib, calibrate())
+            for name in names:
+                runs[name].append(bench_scene(game, mouse, name, frames, warmup, sections))
+        results = {name: best_of(runs[name]) for name in names}
+    finally:
+        mouse.uninstall()
+        profiler.enable(False)
+        if getattr(game, 'sound', None):
+            game.sound.stop_bgm()
+        main.assets.stop()
+        main.save_store.close()
+        pygame.quit()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'machine': platform.machine(),
+            'frames': frames,
+            'warmup': warmup,
+            'repeat': repeat,
+            'calib_ms': calib,
+        },
+        'scenes': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    返回退步列表 [(场景, 指标, 基线, 现在)]；基线里没有的场景跳过
+    基线的耗时先按两次校准耗时的比例换算到这台机器现在的速度
+    """
+    regressions = []
+    base_calib = baseline.get('meta', {}).get('calib_ms')
+    speed = report['meta']['calib_ms'] / base_calib if base_calib else 1.0
+    for name, cur in report['scenes'].items():
+        base = baseline.get('scenes', {}).get(name)
+        if base is None:
+            continue
+        for metric, stat in COMPARED:
+            old, new = base[metric][stat] * speed, cur[metric][stat]
+            if new > old * (1 + threshold) and new - old > FLOOR_MS[stat]:
+                regressions.append((name, f'{metric}.{stat}', old, new))
+        old, new = base['alloc_blocks_mean'], cur['alloc_blocks_mean']
+        if new > old * (1 + threshold) and new - old > ALLOC_FLOOR:
+            regressions.append((name, 'alloc_blocks_mean', old, new))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    print(f"{'scene':<10} {'update':>8} {'render':>8} {'p95':>8} {'p99':>8} {'full':>8} {'p95':>8} {'blocks':>8} {'gc0':>5}")
+    for name, r in report['scenes'].items():
+        print(f"{name:<10} {r['update_ms']['mean']:>8.3f} {r['render_ms']['mean']:>8.3f} {r['render_ms']['p95']:>8.3f} "
+              f"{r['render_ms']['p99']:>8.3f} {r['full_ms']['mean']:>8.3f} {r['full_ms']['p95']:>8.3f} "
+              f"{r['alloc_blocks_mean']:>8.1f} {r['gc0']:>5}")
+        base = (baseline or {}).get('scenes', {}).get(name)
+        if base:
+            print(f"{'  base':<10} {base['update_ms']['mean']:>8.3f} {base['render_ms']['mean']:>8.3f} "
+                  f"{base['render_ms']['p95']:>8.3f} {base['render_ms']['p99']:>8.3f} {base['full_ms']['mean']:>8.3f} "
+                  f"{base['full_ms']['p95']:>8.3f} {base['alloc_blocks_mean']:>8.1f} {base['gc0']:>5}")
+        for section, ms in r.get('sections', {}).items():
+            if ms:
+                print(f"    {section:<20} {ms:>8.3f}")
+    print('(ms per frame; render = dirty-rect frame, full = full-screen redraw, blocks = net allocated blocks)')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Headless per-scene render benchmark')
+    parser.add_argument('--scenes', nargs='+', choices=list(SCENES), default=list(SCENES))
+    parser.add_argument('--frames', type=int, default=300, help='recorded frames per scene')
+    parser.add_argument('--warmup', type=int, default=60, help='unrecorded frames before each scene')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scene, the best of them is reported')
+    parser.add_argument('--baseline', help=f'baseline JSON path (default: {BASELINE} in the repo root)')
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the baseline')
+    parser.add_argument('--compare', action='store_true', help='fail if slower than the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--sections', action='store_true', help='also record the profiler breakdown')
+    parser.add_argument('--json', help='write this run to a JSON file')
+    args = parser.parse_args(argv)
+    args.baseline = os.path.join(CALLER_CWD, args.baseline) if args.baseline else os.path.join(ROOT, BASELINE)
+    if args.json:
+        args.json = os.path.join(CALLER_CWD, args.json)
+    return args
+
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    report = run(args.scenes, args.frames, args.warmup, args.sections, max(1, args.repeat))
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    for path in [p for p in (args.json, args.baseline if args.save_baseline else None) if p]:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print('Saved', path)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.threshold * 100:.0f}% "
+              f"(calibration {baseline['meta'].get('calib_ms')} -> {report['meta']['calib_ms']} ms)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
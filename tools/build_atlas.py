@@ -0,0 +1,143 @@
+"""
+图集打包：把爱心、图标和按钮贴图按它们在界面上的显示尺寸缩放好，打包进 assets/ui/atlas/
+下的几张图集，并写出子矩形索引 ui_atlas.json (运行时由 utils.atlas / utils.assets 读取)
+原图改动或界面尺寸改动后重新运行: python tools/build_atlas.py
+"""
+import json
+import os
+import sys
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from main import WINDOW_WIDTH, WINDOW_HEIGHT
+from utils.surface_cache import quantize_scale
+
+OUTPUT_DIR = os.path.join('assets', 'ui', 'atlas')
+INDEX_NAME = 'ui_atlas.json'
+SHEET_SIZE = 1024
+PADDING = 1
+
+# AnimatedButton 悬停时缩放到的所有尺寸 (animate 里步长 0.04、上限 1.05，再量化到 0.01)
+BUTTON_SCALES = [quantize_scale(1.0 + 0.01 * k) for k in range(1, 6)]
+
+
+def button_sizes(w, h):
+    return [(int(w * s), int(h * s)) for s in BUTTON_SCALES]
+
+
+def panel_size(w, h):
+    """BusinessScene 绘制事件面板时的缩放 (保持比例，放进 90% 窗口)"""
+    scale = min(int(WINDOW_WIDTH * 0.9) / w, int(WINDOW_HEIGHT * 0.9) / h)
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+def choice_size(panel):
+    """事件面板里选项按钮的尺寸 (button_cA / button_cB)"""
+    ew, eh = panel
+    return ew - int(ew * 0.12) * 2, max(48, int(eh * 0.17))
+
+
+def sprites():
+    """(源图片, 主图尺寸, 其他显示尺寸)；主图就是 load_image(path) 不带尺寸时拿到的那张"""
+    ui = os.path.join('assets', 'ui')
+    icons = os.path.join(ui, 'icons')
+    panel = panel_size(*pygame.image.load(os.path.join(ui, 'PICTURE_event_panel.png')).get_size())
+    specs = []
+    # HeartBar: 状态面板里 20px，右上角独立爱心 16px
+    for name in ('heart_red', 'heart_grey', 'heart_black', 'heart_empty'):
+        specs.append((os.path.join(ui, name + '.png'), (20, 20), [(16, 16)]))
+    # 选项按钮图标 min(按钮高 - 8, 48)，事件图标 80px
+    for name in sorted(os.listdir(icons)):
+        if name.startswith('opt_') and name.endswith('.png'):
+            specs.append((os.path.join(icons, name), (48, 48), []))
+        elif name.startswith('event_') and name.endswith('.png'):
+            specs.append((os.path.join(icons, name), (80, 80), []))
+    # PrepScene 320x80，BusinessScene 280x70 和最后一个跨两列的 575x70
+    specs.append((os.path.join(ui, 'PICTURE_button1.png'), (320, 80), button_sizes(320, 80)))
+    specs.append((os.path.join(ui, 'PICTURE_button2.png'), (280, 70), button_sizes(280, 70)))
+    specs.append((os.path.join(ui, 'PICTURE_button3.png'), (575, 70), button_sizes(575, 70)))
+    # 事件选项按钮，标题画面按原尺寸 320x60 加载
+    for name in ('button_cA', 'button_cB'):
+        specs.append((os.path.join(ui, name + '.png'), choice_size(panel), [(320, 60)]))
+    specs.append((os.path.join(ui, 'PICTURE_event_panel.png'), panel, []))
+    return specs
+
+
+def pack(rects, sheet_size=SHEET_SIZE, padding=PADDING):
+    """
+    按高度排序的货架打包：放不下就换行，整张放不下就开新的一张
+    rects: [(key, w, h)]，返回 ({key: (sheet, x, y)}, 每张图集实际用到的尺寸)
+    """
+    placed = {}
+    sheets = []
+    x = y = shelf_h = 0
+    for key, w, h in sorted(rects, key=lambda r: (-r[2], -r[1])):
+        if w > sheet_size or h > sheet_size:
+            raise ValueError(f"{key} ({w}x{h}) does not fit in a {sheet_size}px sheet")
+        if not sheets or x + w > sheet_size:
+            x, y, shelf_h = 0, y + shelf_h + padding, 0
+        if not sheets or y + h > sheet_size:
+            sheets.append([0, 0])
+            x = y = shelf_h = 0
+        placed[key] = (len(sheets) - 1, x, y)
+        sheets[-1][0] = max(sheets[-1][0], x + w)
+        sheets[-1][1] = max(sheets[-1][1], y + h)
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+    return placed, sheets
+
+
+def build():
+    pygame.init()
+    # convert_alpha needs a display; sprites are scaled exactly as load_image + cached_smoothscale would
+    pygame.display.set_mode((1, 1))
+    specs = sprites()
+    scaled = {}
+    for path, main_size, sizes in specs:
+        src = pygame.image.load(path).convert_alpha()
+        for size in [main_size] + sizes:
+            scaled[(path, size)] = pygame.transform.smoothscale(src, size)
+
+    placed, sheet_sizes = pack([(key, *surf.get_size()) for key, surf in scaled.items()])
+    sheets = []
+    for w, h in sheet_sizes:
+        sheet = pygame.Surface((w, h), pygame.SRCALPHA)
+        sheet.fill((0, 0, 0, 0))
+        sheets.append(sheet)
+
+    main_sizes = {path: main_size for path, main_size, _ in specs}
+    index = {'sheets': [], 'sprites': []}
+    for (path, size), surf in scaled.items():
+        sheet, x, y = placed[(path, size)]
+        # BLEND_RGBA_MAX onto a transparent sheet copies the pixels (alpha included) unchanged
+        sheets[sheet].blit(surf, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        index['sprites'].append({
+            'path': path.replace(os.sep, '/'),
+            'size': None if size == main_sizes[path] else list(size),
+            'sheet': sheet,
+            'rect': [x, y, surf.get_width(), surf.get_height()],
+        })
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for i, sheet in enumerate(sheets):
+        name = f'ui_atlas_{i}.png'
+        pygame.image.save(sheet, os.path.join(OUTPUT_DIR, name))
+        index['sheets'].append(name)
+        print('Saved', os.path.join(OUTPUT_DIR, name), sheet.get_size())
+    # one sprite per line keeps the index diffable
+    with open(os.path.join(OUTPUT_DIR, INDEX_NAME), 'w', encoding='utf-8') as f:
+        f.write('{\n  "sheets": %s,\n  "sprites": [\n' % json.dumps(index['sheets']))
+        f.write(',\n'.join('    ' + json.dumps(sprite) for sprite in index['sprites']))
+        f.write('\n  ]\n}\n')
+    print(f"{len(index['sprites'])} sprites from {len(main_sizes)} images in {len(sheets)} sheet(s)")
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    build()
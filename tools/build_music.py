@@ -0,0 +1,38 @@
+"""
+音乐缓存预生成：把 MUSIC_STEMS 里的每一层按游戏的混音器格式转成 WAV 写进 music_cache/
+(MusicEngine 第一次播放时也会自己转换，但那要把压缩的源文件完整解码进内存；发布前跑一遍，运行时就只按块读 WAV)
+换了配乐或 MIXER_BUFFER/采样率之后重新运行: python tools/build_music.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import pygame
+from main import MUSIC_STEMS, MUSIC_CACHE_DIR, MIXER_BUFFER
+from utils.music import cached_wave
+
+
+def main():
+    # same mixer format as SoundManager, so the cache file names match what the game looks up
+    pygame.mixer.init(frequency=44100, buffer=MIXER_BUFFER)
+    print(f"mixer {pygame.mixer.get_init()}")
+    for name, path, slowdown in MUSIC_STEMS:
+        if not os.path.exists(path):
+            print(f"  {name:<8} missing {path}")
+            continue
+        start = time.perf_counter()
+        out = cached_wave(path, slowdown, MUSIC_CACHE_DIR)
+        print(f"  {name:<8} {path} x{slowdown} -> {out} ({os.path.getsize(out) / 1e6:.1f} MB, "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms)")
+    pygame.mixer.quit()
+
+
+if __name__ == '__main__':
+    main()
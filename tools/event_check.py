@@ -0,0 +1,251 @@
+"""
+事件调度检查：用 simulation.CanteenSim 无头跑很多天，核对 EventScheduler 的行为和 events.json 的说明一致
+assets/events.json 本身只有等权重、每天一次的事件，这里在它上面加几条测试事件：
+  rush      权重 4，一天最多 3 次，两次之间至少隔 20 秒
+  audit     只在 hearts <= 6 时出现
+  followup  权重 0，只由 complaint1 选 B 连锁出来 (2-4 秒后)
+  ghost_*   500 个永远满足不了前提 (hearts >= 11) 的事件
+检查项：抽取概率和权重成正比 (z 检验)、前提、冷却和次数、连锁、连续 dry_draws 次抽空才结束一天、
+挂起的事件不增加每次抽取的开销；任何一项不通过时以状态码 1 退出
+用法: python tools/event_check.py [--days 3000] [--seed 1]
+"""
+import argparse
+import copy
+import json
+import math
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from simulation import CanteenSim
+from utils.event_scheduler import EventScheduler
+from utils.events import EVENT_DATA, EventTable
+
+GHOSTS = 500
+RUSH_WEIGHT = 4
+RUSH_REPEAT = 3
+RUSH_COOLDOWN = 20000
+AUDIT_MAX_HEARTS = 6
+CHAIN_DELAY = [2000, 4000]
+# |z| above this fails a frequency check
+Z_LIMIT = 4.0
+# parked events may not make a tick this many times slower (it is O(1) in them, the slack is timer noise)
+TICK_SLOWDOWN_LIMIT = 3.0
+TICKS_PER_DAY = 50
+
+
+def _event(key, text, **extra):
+    choices = {
+        'A': {'label': 'Ignore', 'hearts': -1, 'log': 'Ignored. (hearts {hearts:+d})', 'history': ['negative']},
+        'B': {'label': 'Handle', 'money': -20, 'log': 'Handled. (money {money:+d})', 'history': ['positive']},
+    }
+    event = {'key': key, 'text': text, 'icon': 'event_complaint.png', 'boss': 'complaint', 'choices': choices}
+    event.update(extra)
+    return event
+
+
+def fixture_tables():
+    """(带测试事件的表, 加了 500 个挂起事件的表)"""
+    with open(EVENT_DATA, 'r', encoding='utf-8') as f:
+        shipped = json.load(f)
+    data = copy.deepcopy(shipped)
+    data['events'].append(_event('rush', 'Lunch rush.', weight=RUSH_WEIGHT, repeat=RUSH_REPEAT,
+                                 cooldown_ms=RUSH_COOLDOWN))
+    data['events'].append(_event('audit', 'A surprise audit.', when={'hearts': [None, AUDIT_MAX_HEARTS]}))
+    data['events'].append(_event('followup', 'The student comes back.', weight=0))
+    for event in data['events']:
+        if event['key'] == 'complaint1':
+            event['choices']['B']['chain'] = {'event': 'followup', 'delay_ms': CHAIN_DELAY}
+    ghosts = copy.deepcopy(shipped)
+    for i in range(GHOSTS):
+        ghosts['events'].append(_event(f'ghost_{i}', 'Never happens.', when={'hearts': [11, None]}))
+    return EventTable(data, source='event_check fixture'), EventTable(ghosts, source='event_check ghosts')
+
+
+def play_day(table, rng, on_fire, on_choice, max_decisions=400):
+    """随机策略跑一天；每出现一个事件调用 on_fire(sim, at, key)，每次事件选择调用 on_choice(sim, key, choice)"""
+    sim = CanteenSim(rng=random.Random(rng.getrandbits(64)), think_time=1500, table=table)
+    sched = sim.events
+
+    def observe(before):
+        for at, key in sched.log[before:]:
+            on_fire(sim, at, key)
+
+    sim.choose_prep(rng.randrange(len(table.prep)))
+    for _ in range(max_decisions):
+        if sim.phase != 'business':
+            break
+        before = len(sched.log)
+        sim.wait(sim._think())
+        observe(before)
+        if sim.phase != 'business':
+            break
+        before = len(sched.log)
+        if sim.current_event:
+            choice = 'A' if rng.random() < 0.5 else 'B'
+            on_choice(sim, sim.current_event, choice)
+            sim.choose_event(choice)
+        else:
+            sim.choose_action(rng.randrange(len(table.actions)))
+        observe(before)
+    return sim
+
+
+class Check:
+    def __init__(self):
+        self.failures = 0
+
+    def report(self, name, ok, detail):
+        print(f"{'OK' if ok else 'FAIL':<8} {name:<10} {detail}")
+        if not ok:
+            self.failures += 1
+
+    def frequency(self, name, observed, expected, variance, detail=''):
+        z = (observed - expected) / math.sqrt(variance) if variance else 0.0
+        self.report(name, abs(z) <= Z_LIMIT and expected > 0,
+                    f"{observed} observed vs {expected:.1f} expected (z={z:+.2f}){detail}")
+
+
+def check_fixture(table, days, seed, check):
+    rng = random.Random(seed)
+    weights = {key: ev.weight for key, ev in table.events.items()}
+    # per-draw expected wins for rush and audit: weight / total weight of the events that could win
+    wins = {'rush': [0, 0.0, 0.0], 'audit': [0, 0.0, 0.0]}
+    gate_violations = 0
+    audit_fires = 0
+    cooldown_violations = 0
+    repeat_violations = 0
+    rush_days = 0
+    chain_open = []
+    chain_fires = 0
+    chain_choices = 0
+    chain_violations = 0
+    recovered = 0
+    early_end = 0
+    day = {}
+
+    def on_fire(sim, at, key):
+        nonlocal gate_violations, audit_fires, cooldown_violations, chain_fires, chain_violations, recovered
+        sched = sim.events
+        if key != 'followup':
+            # every draw either fires an event or comes up empty; more than one since the last one means
+            # the day went on after an empty draw
+            recovered += sched.draws - day['draws'] > 1
+            day['draws'] = sched.draws
+        if key == 'followup':
+            chain_fires += 1
+            if not chain_open or at - chain_open.pop(0) < CHAIN_DELAY[0]:
+                chain_violations += 1
+            return
+        if key == 'audit':
+            audit_fires += 1
+            if sim.hearts > AUDIT_MAX_HEARTS:
+                gate_violations += 1
+        if key == 'rush':
+            if day['rush'] and at - day['rush'][-1] < RUSH_COOLDOWN:
+                cooldown_violations += 1
+            day['rush'].append(at)
+        # a rush that is cooling down cannot win; only score draws where it is not
+        if 0 < len(day['rush']) - (key == 'rush') < RUSH_REPEAT:
+            return
+        fired = dict(sched.fired)
+        fired[key] -= 1
+        pool = [k for k, w in weights.items()
+                if w > 0 and fired.get(k, 0) < table.events[k].repeat and sched.eligible(k)]
+        total = sum(weights[k] for k in pool)
+        for name, tally in wins.items():
+            p = weights[name] / total if name in pool else 0.0
+            tally[0] += key == name
+            tally[1] += p
+            tally[2] += p * (1 - p)
+
+    def on_choice(sim, key, choice):
+        nonlocal chain_choices
+        if key == 'complaint1' and choice == 'B':
+            chain_choices += 1
+            chain_open.append(sim.now)
+
+    for _ in range(days):
+        day = {'rush': [], 'draws': 0}
+        chain_open.clear()
+        sim = play_day(table, rng, on_fire, on_choice)
+        sched = sim.events
+        if len(day['rush']) > RUSH_REPEAT:
+            repeat_violations += 1
+        rush_days += len(day['rush']) >= 2
+        # the day may only end on the events running out or on dry_draws empty draws in a row
+        if sim.ending and sched.finished() and sched.remaining() and sched.dry < table.schedule.dry_draws:
+            early_end += 1
+
+    for name, (observed, expected, variance) in wins.items():
+        check.frequency(f'weight:{name}', observed, expected, variance,
+                        f"  (weight {weights[name]}, over draws where it could win)")
+    check.report('gate', gate_violations == 0 and audit_fires > 0,
+                 f"audit fired {audit_fires} times, {gate_violations} with hearts > {AUDIT_MAX_HEARTS}")
+    check.report('cooldown', cooldown_violations == 0 and repeat_violations == 0 and rush_days > 0,
+                 f"{cooldown_violations} rush gaps under {RUSH_COOLDOWN} ms, {repeat_violations} days over "
+                 f"{RUSH_REPEAT} rushes, {rush_days} days with 2+ rushes")
+    check.report('chain', chain_violations == 0 and 0 < chain_fires <= chain_choices,
+                 f"followup fired {chain_fires} times after {chain_choices} complaint1/B choices, "
+                 f"{chain_violations} early or unprompted")
+    check.report('dry-end', early_end == 0 and recovered > 0,
+                 f"{recovered} events came after an empty draw, {early_end} days ended before "
+                 f"{table.schedule.dry_draws} empty draws in a row")
+
+
+def tick_us(table, days, seed):
+    """每次 tick 的平均耗时 (us)：时钟每次都到期，所以每次 tick 都做一次抽取；不计每天一次的 reset"""
+    state = CanteenSim(seed=seed, table=table)
+    sched = EventScheduler(table, random.Random(seed), state)
+    step = table.schedule.delay_max + 1
+    elapsed = 0.0
+    for _ in range(days):
+        sched.reset()
+        sched.begin()
+        sched.resolve(None)
+        now = 0
+        start = time.perf_counter()
+        for _ in range(TICKS_PER_DAY):
+            now += step
+            if sched.tick(now):
+                sched.resolve(None)
+        elapsed += time.perf_counter() - start
+    return elapsed * 1e6 / (days * TICKS_PER_DAY)
+
+
+def check_ghosts(table, shipped, days, seed, check):
+    rng = random.Random(seed)
+    skipped = woken = blocked = 0
+    for _ in range(days):
+        stats = play_day(table, rng, lambda *a: None, lambda *a: None).events.stats()
+        skipped += stats['skipped']
+        woken += stats['woken']
+        blocked = max(blocked, stats['blocked'])
+    check.report('parked', skipped == 0 and woken == 0 and blocked == GHOSTS,
+                 f"{GHOSTS} events that can never fire: {skipped} popped off the deck, {woken} re-checked")
+    base = min(tick_us(shipped, days, seed) for _ in range(3))
+    ghosts = min(tick_us(table, days, seed) for _ in range(3))
+    check.report('scale', ghosts <= base * TICK_SLOWDOWN_LIMIT,
+                 f"{ghosts:.2f} us per tick with {GHOSTS} parked events vs {base:.2f} us without them")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless EventScheduler behaviour check")
+    parser.add_argument('--days', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    table, ghosts = fixture_tables()
+    with open(EVENT_DATA, 'r', encoding='utf-8') as f:
+        shipped = EventTable(json.load(f), source=EVENT_DATA)
+    check = Check()
+    check_fixture(table, args.days, args.seed, check)
+    check_ghosts(ghosts, shipped, max(1, args.days // 10), args.seed, check)
+    return 1 if check.failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
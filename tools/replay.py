@@ -0,0 +1,186 @@
+"""
+录像重放：无头 (SDL dummy 驱动) 按录像里的种子和输入把一局重新跑一遍，只跑模拟不渲染，
+核对每次到达的结局、数值和 history 是否和录制时完全一致；有不一致时以状态码 1 退出
+录制: ECS_RECORD=1 python main.py   (写到 replays/session_*.jsonl，ECS_SEED 可以固定种子)
+用法: python tools/replay.py replays/*.jsonl
+      python tools/replay.py --resume-check   (录一局继续上次战役的会话，再对着空的战役存档重放它)
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from utils.replay import Replay, ReplayCursor, ReplayRecorder
+
+# 战役继续检查里一次会话最多跑多少模拟步 (60 步 = 1 秒)
+RESUME_CHECK_STEPS = 60 * 60 * 60
+
+
+def diff(expected, actual, path=''):
+    """两份结局记录第一处不同的地方"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            found = diff(expected.get(key), actual.get(key), f'{path}.{key}' if path else key)
+            if found:
+                return found
+        return None
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            found = diff(a, b, f'{path}[{i}]')
+            if found:
+                return found
+        return None
+    return None if expected == actual else f'{path}: {expected!r} != {actual!r}'
+
+
+def _click_target(scene, rng):
+    """脚本化玩家下一次点哪里：标题点 Campaign，说明弹窗和结局点下方，其余随机点一个按钮"""
+    name = type(scene).__name__
+    if name == 'TitleScene':
+        return scene.campaign_btn.rect.center
+    if getattr(scene, 'show_instruction', False) or name == 'EndingScene':
+        return (640, 650)
+    if name == 'BusinessScene' and scene.current_event:
+        return rng.choice(scene.event_buttons).rect.center
+    buttons = getattr(scene, 'buttons', None)
+    return rng.choice(buttons).rect.center if buttons else None
+
+
+def _drive(game, rng, cursor, stop, recorder=None):
+    """随机点击 (和真人一样经过 handle_events，录制时一样写进录像)，直到 stop(game) 或跑满 RESUME_CHECK_STEPS 步"""
+    import pygame
+    end = game.sim_steps + RESUME_CHECK_STEPS
+    step_ms = game.scheduler.step_ms
+    while game.sim_steps < end and not stop(game):
+        pos = _click_target(game.current, rng)
+        if pos is not None:
+            events = [pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos)]
+            if recorder is not None:
+                recorder.record(game.sim_steps, events)
+            cursor.follow(events)
+            game.current.handle_events(events)
+        game._advance(game.sim_steps + rng.randint(10, 40), step_ms)
+    return stop(game)
+
+
+def record_resumed(game, tmp, seed):
+    """
+    第一次会话开一个战役，打完第 1 天就退出；第二次会话 (录像) 从 campaign.jsonl 继续，一直打到结局
+    返回第二次会话的录像路径，没打到预定的地方时返回 None
+    """
+    import main
+    main.campaign_store.close()
+    main.campaign_store.path = os.path.join(tmp, 'campaign.jsonl')
+    rng = random.Random(seed)
+    cursor = ReplayCursor()
+    cursor.install()
+    try:
+        game.start_session(seed)
+        if not _drive(game, rng, cursor, lambda g: g.campaign is not None and g.campaign['day'] >= 2):
+            print(f"ERROR    resume check: the first session never finished campaign day 1")
+            return None
+        # quit mid-campaign: the next session finds day 1 in campaign.jsonl and resumes from it
+        path = os.path.join(tmp, 'resumed_campaign.jsonl')
+        game.start_session(seed + 1)
+        game.recorder = ReplayRecorder(path, game.seed, game.scheduler.step_ms, {'cursor': list(cursor.pos)})
+        reached = _drive(game, rng, cursor, lambda g: bool(g.endings_reached), game.recorder)
+        game.recorder.close(game.sim_steps)
+        game.recorder = None
+    finally:
+        cursor.uninstall()
+        main.campaign_store.close()
+    resumed = [c for c in Replay(path).campaigns if c.get('resumed')]
+    if not reached or not resumed:
+        print(f"ERROR    resume check: the recorded session {'never resumed' if not resumed else 'reached no ending'}")
+        return None
+    return path
+
+
+def check(game, path, tmp):
+    """重放一份录像并和录制时的结局逐项比较；一致时返回 True"""
+    import main
+    # every replay starts without a campaign in progress
+    main.campaign_store.close()
+    main.campaign_store.path = os.path.join(tmp, os.path.basename(path) + '.campaign.jsonl')
+    try:
+        replay = Replay(path)
+    except (OSError, ValueError) as e:
+        print(f"ERROR    {e}")
+        return False
+    start = time.perf_counter()
+    endings = game.play_replay(replay)
+    wall = time.perf_counter() - start
+    sim = replay.end_step * replay.step_ms / 1000.0
+    problem = None
+    if len(endings) != len(replay.endings):
+        problem = f'{len(replay.endings)} ending(s) recorded, {len(endings)} reached'
+    else:
+        for i, (expected, actual) in enumerate(zip(replay.endings, endings)):
+            problem = diff(expected, actual, f'ending[{i}]')
+            if problem:
+                break
+    keys = ','.join(str(e.get('key')) for e in endings) or '-'
+    status = 'OK' if problem is None else 'MISMATCH'
+    print(f"{status:<8} {path}  seed={replay.seed} steps={replay.end_step} endings={keys}  "
+          f"{sim:.1f}s of play in {wall * 1000:.0f} ms ({sim / max(wall, 1e-6):.0f}x)")
+    if problem:
+        print(f"         first difference: {problem}")
+    return problem is None
+
+
+def run(paths, resume_seed=None):
+    """
+    paths 要么是绝对路径，要么相对于当前目录；导入 main 之前才切到仓库根目录 (main.py 按相对路径读资源)
+    resume_seed 不为 None 时先录一份继续战役的会话 (record_resumed)，和 paths 一起重放
+    """
+    paths = [os.path.abspath(path) for path in paths]
+    os.chdir(ROOT)
+    import pygame
+    import main
+    # replays unlock endings and write campaign days too; keep them out of the player's files
+    tmp = tempfile.mkdtemp(prefix='ecs_replay_')
+    main.save_store.path = os.path.join(tmp, 'save_data.json')
+    game = main.Game()
+    game.wait_until_loaded()
+    failures = 0
+    try:
+        if resume_seed is not None:
+            path = record_resumed(game, tmp, resume_seed)
+            if path is None:
+                failures += 1
+            else:
+                paths.append(path)
+        for path in paths:
+            if not check(game, path, tmp):
+                failures += 1
+    finally:
+        if getattr(game, 'sound', None):
+            game.sound.stop_bgm()
+        main.assets.stop()
+        main.save_store.close()
+        main.campaign_store.close()
+        pygame.quit()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return failures
+
+
+if __name__ == '__main__':
+    # parse before run() imports main, so --help and usage errors don't boot the game
+    parser = argparse.ArgumentParser(description="Headless bit-exact replay check")
+    parser.add_argument('paths', nargs='*', metavar='replay', help="recordings (replays/session_*.jsonl)")
+    parser.add_argument('--resume-check', action='store_true',
+                        help="also record a session that resumes a campaign and replay it from an empty campaign file")
+    parser.add_argument('--seed', type=int, default=1, help="seed for --resume-check")
+    args = parser.parse_args()
+    if not args.paths and not args.resume_check:
+        parser.error('give at least one recording, or --resume-check')
+    sys.exit(1 if run(args.paths, args.seed if args.resume_check else None) else 0)
@@ -0,0 +1,231 @@
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+import pygame
+
+from utils.atlas import TextureAtlas
+from utils.fonts import font_cache
+from utils.surface_cache import scale_cache
+
+
+def _norm(path):
+    return os.path.normpath(path)
+
+
+class AssetStore:
+    """
+    资源仓库 - 按清单在后台线程解码图片/音效、读取字体文件，主线程每帧提交一小批
+    (convert_alpha 和创建字体要在主线程做)；场景通过 image()/sound() 按需取句柄，
+    还没轮到的资源会在调用时同步加载 (插队)，所以任何时候取都是安全的
+    """
+    def __init__(self, named_sizes=None):
+        # 清单里的尺寸可以写成名字，例如 "window"
+        self.named_sizes = dict(named_sizes or {})
+        self._entries = []
+        self._images = {}
+        self._sounds = {}
+        # 图集: 每张图集图片 -> (TextureAtlas, 第几张)
+        self._sheets = {}
+        self.atlases = []
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = False
+        self.music = []
+        self.total = 0
+        self.committed = 0
+        self.current = ''
+        # 统计
+        self.sync_loads = 0
+        self.errors = 0
+        self.decode_ms = 0.0
+        self.commit_ms = 0.0
+
+    # ---------------- 清单 ----------------
+    def _size(self, size):
+        if size is None:
+            return None
+        if isinstance(size, str):
+            return tuple(self.named_sizes[size])
+        return tuple(size)
+
+    def load_manifest(self, path):
+        """清单格式见 assets/manifest.json"""
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for index_path in manifest.get('atlases', []):
+            try:
+                atlas = TextureAtlas(index_path)
+            except Exception as e:
+                # without the atlas its sprites are loaded one by one on first use
+                print(f"[AssetStore] could not read atlas {index_path}: {e}")
+                continue
+            self.atlases.append(atlas)
+            for i, sheet_path in enumerate(atlas.sheet_paths):
+                self._sheets[_norm(sheet_path)] = (atlas, i)
+                self._entries.append(('sheet', _norm(sheet_path), None))
+        for item in manifest.get('images', []):
+            for size in item.get('sizes', [None]):
+                self._entries.append(('image', _norm(item['path']), self._size(size)))
+        for item in manifest.get('fonts', []):
+            # font keys must match the paths main.py passes to get_font, so they are not normalised
+            self._entries.append(('font', item['path'], tuple(item.get('sizes', []))))
+        for path in manifest.get('sounds', []):
+            self._entries.append(('sound', _norm(path), None))
+        # music is streamed by pygame.mixer.music, so it is only listed, not decoded
+        self.music = [_norm(p) for p in manifest.get('music', [])]
+        self.total = len(self._entries)
+
+    # ---------------- 后台解码 ----------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name='AssetStore', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop = True
+
+    def _worker(self):
+        for kind, path, size in self._entries:
+            if self._stop:
+                return
+            start = time.perf_counter()
+            try:
+                payload = self._decode(kind, path, size)
+            except Exception as e:
+                payload = e
+            self.decode_ms += (time.perf_counter() - start) * 1000.0
+            self._queue.put((kind, path, size, payload))
+
+    def _decode(self, kind, path, size):
+        if kind == 'image':
+            if (path, size) in self._images:
+                return None
+            img = pygame.image.load(path)
+            # smoothscale needs 24/32-bit pixels; palette images are scaled after conversion
+            if size and img.get_bitsize() in (24, 32):
+                return pygame.transform.smoothscale(img, size), True
+            return img, False
+        if kind == 'sheet':
+            return pygame.image.load(path)
+        if kind == 'font':
+            with open(path, 'rb') as f:
+                return f.read()
+        if kind == 'sound':
+            if not pygame.mixer.get_init():
+                return None
+            return pygame.mixer.Sound(path)
+        return None
+
+    # ---------------- 主线程提交 ----------------
+    def commit(self, budget_ms=8.0, block=False):
+        """把解码好的资源提交到仓库，最多花 budget_ms；返回本次提交的数量"""
+        start = time.perf_counter()
+        n = 0
+        while self.committed < self.total:
+            try:
+                item = self._queue.get(block=block, timeout=1.0 if block else None)
+            except queue.Empty:
+                if block and self._thread is not None and self._thread.is_alive():
+                    continue
+                break
+            self._finish(*item)
+            self.committed += 1
+            n += 1
+            if (time.perf_counter() - start) * 1000.0 >= budget_ms:
+                break
+        self.commit_ms += (time.perf_counter() - start) * 1000.0
+        return n
+
+    def _finish(self, kind, path, size, payload):
+        self.current = os.path.basename(path)
+        if isinstance(payload, Exception):
+            self.errors += 1
+            print(f"[AssetStore] could not load {path}: {payload}")
+            return
+        if payload is None:
+            return
+        try:
+            if kind == 'image' and (path, size) not in self._images:
+                img, scaled = payload
+                img = img.convert_alpha()
+                if size and not scaled:
+                    img = pygame.transform.smoothscale(img, size)
+                self._images[(path, size)] = img
+            elif kind == 'sheet':
+                atlas, i = self._sheets[path]
+                atlas.set_sheet(i, payload.convert_alpha())
+                if atlas.complete:
+                    self._register_atlas(atlas)
+            elif kind == 'font':
+                for s in size:
+                    # every Font keeps its own file object, so each size gets a fresh buffer
+                    font_cache.put(path, s, pygame.font.Font(io.BytesIO(payload), s))
+            elif kind == 'sound':
+                self._sounds.setdefault(path, payload)
+        except Exception as e:
+            self.errors += 1
+            print(f"[AssetStore] could not commit {path}: {e}")
+
+    def _register_atlas(self, atlas):
+        sprites = [(_norm(path), size, sub) for path, size, sub in atlas.subsurfaces()]
+        for path, size, sub in sprites:
+            self._images.setdefault((path, size), sub)
+        # pre-scaled sizes of an image are what cached_smoothscale would make from its main sprite
+        for path, size, sub in sprites:
+            main_sprite = self._images.get((path, None))
+            if size and main_sprite is not None:
+                scale_cache.put(main_sprite, size, sub)
+
+    def wait(self):
+        """阻塞到清单里的资源全部提交 (无头运行和测试用)"""
+        self.start()
+        while self.committed < self.total:
+            if not self.commit(budget_ms=1e9, block=True):
+                break
+
+    @property
+    def done(self):
+        return self.committed >= self.total
+
+    def progress(self):
+        return self.committed / self.total if self.total else 1.0
+
+    # ---------------- 取资源 ----------------
+    def image(self, path, size=None):
+        """已提交就直接返回；否则同步加载 (失败时抛异常，由调用方决定占位图)"""
+        key = (_norm(path), tuple(size) if size else None)
+        img = self._images.get(key)
+        if img is not None:
+            return img
+        self.sync_loads += 1
+        img = pygame.image.load(path).convert_alpha()
+        if size:
+            img = pygame.transform.smoothscale(img, size)
+        self._images[key] = img
+        return img
+
+    def sound(self, path):
+        key = _norm(path)
+        snd = self._sounds.get(key)
+        if snd is None:
+            self.sync_loads += 1
+            snd = pygame.mixer.Sound(path)
+            self._sounds[key] = snd
+        return snd
+
+    def stats(self):
+        return {
+            'total': self.total,
+            'committed': self.committed,
+            'images': len(self._images),
+            'sounds': len(self._sounds),
+            'atlas_sheets': len(self._sheets),
+            'sync_loads': self.sync_loads,
+            'errors': self.errors,
+            'decode_ms': int(self.decode_ms),
+            'commit_ms': int(self.commit_ms),
+        }
@@ -0,0 +1,43 @@
+import json
+import os
+
+
+class TextureAtlas:
+    """
+    图集 - tools/build_atlas.py 把小图按显示尺寸打包成几张大图，索引记录每个精灵的子矩形
+    精灵按 (源图片路径, 尺寸) 查找；尺寸为 None 的是按原图加载时拿到的那一张 (主图)，
+    其余尺寸是同一张图在界面上会被缩放到的大小，直接从图集取，不用运行时再缩放
+    """
+    def __init__(self, index_path):
+        self.index_path = index_path
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        base = os.path.dirname(index_path)
+        self.sheet_paths = [os.path.join(base, name) for name in index.get('sheets', [])]
+        self.sprites = []
+        for sprite in index.get('sprites', []):
+            size = tuple(sprite['size']) if sprite.get('size') else None
+            self.sprites.append((sprite['path'], size, sprite['sheet'], tuple(sprite['rect'])))
+        self._sheets = [None] * len(self.sheet_paths)
+
+    def set_sheet(self, i, surf):
+        """放入已经 convert_alpha 过的第 i 张图集"""
+        self._sheets[i] = surf
+
+    @property
+    def complete(self):
+        return all(sheet is not None for sheet in self._sheets)
+
+    def subsurfaces(self):
+        """逐个返回 (源路径, 尺寸, 子图)；子图和图集共享像素，不额外占内存"""
+        for path, size, sheet, rect in self.sprites:
+            surf = self._sheets[sheet]
+            if surf is not None:
+                yield path, size, surf.subsurface(rect)
+
+    def stats(self):
+        return {
+            'sheets': len(self.sheet_paths),
+            'loaded': sum(1 for sheet in self._sheets if sheet is not None),
+            'sprites': len(self.sprites),
+        }
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import time
+
+
+CAMPAIGN_VERSION = 1
+
+
+def day_seed(seed, day):
+    """第 day 天的玩法种子：只取决于战役种子和天数，中途退出再继续也是同样的一天"""
+    digest = hashlib.sha256(f'{seed}:day:{day}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def _delta(before, after):
+    """两份 history 的差：(新增或改变的键, 删掉的键)"""
+    changed = {k: v for k, v in after.items() if k not in before or before[k] != v}
+    removed = [k for k in before if k not in after]
+    return changed, removed
+
+
+class CampaignLog:
+    """
+    多日经营的存档 - 只追加写的 JSONL，每天结束追加一行，不重写已有内容：
+      第一行是头 {"campaign": 版本, "seed": 战役种子, "days": 总天数}
+      每天一行增量 {"day", "hearts", "money", "step", "set": 变化的 history 键, "del": 删掉的键, "base": 偏移}
+      每 snapshot_every 天改写一行完整快照 {"day", "snapshot": 状态, "base": 偏移}；结束时追加 {"end": 结局, "base": 偏移}
+    每一行的 base 都是最近一个完整快照在文件里的字节偏移：读档时只读文件尾的最后一行，
+    seek 到那个快照再应用它之后不超过 snapshot_every 行增量，读第 100 天和读第 2 天一样快
+    写到一半崩溃只会损坏最后一行，读的时候跳过，下次追加前截掉
+    """
+    def __init__(self, path, snapshot_every=10):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.header = None
+        self._file = None
+        self._last = None
+        self._base = None
+        # 统计
+        self.appends = 0
+        self.bytes_written = 0
+        self.load_ms = 0.0
+        self.replayed = 0
+
+    # ---------------- 写 ----------------
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'r+b' if os.path.exists(self.path) else 'w+b')
+            self._file.seek(0, os.SEEK_END)
+            # drop a line torn by a crash so the next record starts on a fresh line
+            end = self._file.tell()
+            if end:
+                self._file.seek(max(0, end - 65536))
+                tail = self._file.read()
+                if not tail.endswith(b'\n') and b'\n' in tail:
+                    self._file.truncate(end - len(tail) + tail.rfind(b'\n') + 1)
+                self._file.seek(0, os.SEEK_END)
+        return self._file
+
+    def _append(self, record):
+        f = self._open()
+        offset = f.tell()
+        if 'snapshot' in record:
+            self._base = offset
+        record['base'] = self._base
+        data = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        self.appends += 1
+        self.bytes_written += len(data)
+        return offset
+
+    def start(self, seed, days, state):
+        """开一个新战役 (覆盖旧文件)，state 是第 0 天结束时 (开局) 的状态"""
+        self.close()
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.header = {'campaign': CAMPAIGN_VERSION, 'seed': seed, 'days': days,
+                       'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self._file = open(self.path, 'w+b')
+        data = (json.dumps(self.header, separators=(',', ':')) + '\n').encode('utf-8')
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self._append({'day': state['day'], 'snapshot': state})
+        self._last = _copy(state)
+
+    def append_day(self, state):
+        """记下一天结束时的状态：平时只写和前一天的差，每 snapshot_every 天写一次完整快照"""
+        if self._last is None:
+            raise RuntimeError('append_day() before start() or load()')
+        if state['day'] % self.snapshot_every == 0:
+            self._append({'day': state['day'], 'snapshot': state})
+        else:
+            changed, removed = _delta(self._last['history'], state['history'])
+            record = {'day': state['day'], 'hearts': state['hearts'], 'money': state['money'], 'step': state['step']}
+            if changed:
+                record['set'] = changed
+            if removed:
+                record['del'] = removed
+            self._append(record)
+        self._last = _copy(state)
+
+    def finish(self, ending):
+        """战役结束 (到达结局)；之后 load() 返回的状态带 ended"""
+        if self._last is not None:
+            self._append({'end': ending})
+            self._last['ended'] = ending
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---------------- 读 ----------------
+    def _tail_record(self, f, end):
+        """从文件尾往回找最后一条完整的记录 (跳过崩溃留下的半行)"""
+        size = 4096
+        while True:
+            start = max(0, end - size)
+            f.seek(start)
+            lines = f.read(end - start).split(b'\n')
+            # the first piece may be cut in half unless the read reached the header
+            complete = lines if start == 0 else lines[1:]
+            for line in reversed(complete):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and 'base' in record:
+                    return record
+            if start == 0:
+                return None
+            size *= 4
+
+    def load(self):
+        """
+        读出最近一天结束时的状态 {"day", "hearts", "money", "step", "history"[, "ended"]}，没有存档时返回 None
+        之后可以直接 append_day() 接着写
+        """
+        if not os.path.exists(self.path):
+            return None
+        started = time.perf_counter()
+        self.close()
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('campaign') != CAMPAIGN_VERSION:
+                    print(f"[CampaignLog] unsupported campaign version in {self.path}: {header.get('campaign')}")
+                    return None
+                f.seek(0, os.SEEK_END)
+                last = self._tail_record(f, f.tell())
+                if last is None:
+                    return None
+                f.seek(last['base'])
+                state = None
+                replayed = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if 'snapshot' in record:
+                        state = _copy(record['snapshot'])
+                    elif 'end' in record:
+                        state['ended'] = record['end']
+                    else:
+                        state['day'] = record['day']
+                        state['hearts'] = record['hearts']
+                        state['money'] = record['money']
+                        state['step'] = record['step']
+                        state['history'].update(record.get('set', {}))
+                        for key in record.get('del', []):
+                            state['history'].pop(key, None)
+                        replayed += 1
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[CampaignLog] could not read {self.path}: {e}")
+            return None
+        self.header = header
+        self._base = last['base']
+        self._last = _copy(state)
+        self.replayed = replayed
+        self.load_ms = (time.perf_counter() - started) * 1000.0
+        return state
+
+    def stats(self):
+        return {'path': self.path, 'appends': self.appends, 'bytes_written': self.bytes_written,
+                'load_ms': round(self.load_ms, 3), 'replayed': self.replayed}
+
+
+def _copy(state):
+    state = dict(state)
+    state['history'] = dict(state.get('history', {}))
+    return state
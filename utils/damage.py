@@ -0,0 +1,110 @@
+import pygame
+
+
+class DamageTracker:
+    """
+    脏矩形记录器 - 每帧收集画面上发生变化的区域，只重绘并推送这些矩形
+    track(key, rect, state) 记住每个元素上一帧的 (区域, 状态)，状态或区域变了才算脏，
+    新旧两个区域都要重绘 (旧位置需要擦掉)
+    """
+    def __init__(self, size, full_ratio=0.6, max_rects=4):
+        self.screen_rect = pygame.Rect((0, 0), size)
+        # 脏区域超过屏幕这个比例就直接整屏刷新，合并小矩形不再划算
+        self.full_ratio = full_ratio
+        # 每个矩形都要单独重绘一遍场景，太多时合并成一个外接矩形
+        self.max_rects = max_rects
+        self._rects = []
+        self._full = True
+        self._marks = {}
+        # 统计
+        self.frames = 0
+        self.idle_frames = 0
+        self.full_frames = 0
+        self.pixels_updated = 0
+        self.pixels_total = 0
+
+    def resize(self, size):
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.full()
+
+    def full(self):
+        """整屏重绘 (窗口被遮挡后恢复、整屏特效等)"""
+        self._full = True
+
+    def reset(self):
+        """切换场景：整屏重绘并丢掉旧场景元素的记录"""
+        self._marks.clear()
+        self._rects = []
+        self._full = True
+
+    def add(self, rect):
+        if rect is None or self._full:
+            return
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width > 0 and rect.height > 0:
+            self._rects.append(rect)
+
+    def track(self, key, rect, state=None):
+        """rect 为 None 表示该元素这一帧不可见"""
+        rect = pygame.Rect(rect) if rect is not None else None
+        mark = (rect, state)
+        prev = self._marks.get(key)
+        if prev == mark:
+            return
+        self._marks[key] = mark
+        if prev is not None:
+            self.add(prev[0])
+        self.add(rect)
+
+    def forget(self, key):
+        prev = self._marks.pop(key, None)
+        if prev is not None:
+            self.add(prev[0])
+
+    def _merge(self, rects):
+        """把相交的矩形合并，避免同一块像素被推送多次"""
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            i = 0
+            while i < len(merged):
+                if rect.colliderect(merged[i]):
+                    rect.union_ip(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+        return merged
+
+    def collect(self):
+        """返回本帧要重绘的矩形列表并清空；空列表表示画面没有变化"""
+        self.frames += 1
+        if self._full:
+            rects = [self.screen_rect.copy()]
+        else:
+            rects = self._merge(self._rects)
+            if len(rects) > self.max_rects:
+                rects = [rects[0].unionall(rects[1:])]
+            area = sum(r.width * r.height for r in rects)
+            if area > self.screen_rect.width * self.screen_rect.height * self.full_ratio:
+                rects = [self.screen_rect.copy()]
+        self._rects = []
+        self._full = False
+
+        if not rects:
+            self.idle_frames += 1
+        elif rects[0] == self.screen_rect:
+            self.full_frames += 1
+        self.pixels_updated = sum(r.width * r.height for r in rects)
+        self.pixels_total += self.pixels_updated
+        return rects
+
+    def stats(self):
+        frames = max(1, self.frames)
+        return {
+            'frames': self.frames,
+            'idle_frames': self.idle_frames,
+            'full_frames': self.full_frames,
+            'pixels_updated': self.pixels_updated,
+            'avg_pixels': self.pixels_total // frames,
+        }
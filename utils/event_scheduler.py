@@ -0,0 +1,245 @@
+import heapq
+
+
+# 时间线上的条目类型：周期性的抽取时钟，和选项连锁出来的定时事件
+DRAW = 0
+CHAIN = 1
+
+
+class EventScheduler:
+    """
+    营业阶段的事件调度 - 堆和索引，每次 tick 只看堆顶，注册几百个事件也是 O(log n)：
+      deck:     可抽取的事件，按指数竞速的虚拟时间排序 (权重 w 的事件排在 当前竞速时间 + Exp(w) 处)，
+                堆顶就是一次按权重的随机抽取
+      blocked:  前提不满足的事件不进 deck，按第一个不满足的条件挂起：
+                数值区间挂在 "等 x 升到 low" / "等 x 降到 high" 的阈值堆上，history 等值挂在 {期望值: 事件} 上；
+                抽取前每个被测的量只看一次堆顶/桶，越过阈值的事件重新判断，满足了才以新的竞速时间进 deck
+      cooling:  还能再出现但在冷却中的事件，按冷却结束时间排序，到点后回到 deck (或 blocked)
+      timeline: 定时条目 (抽取时钟 + 连锁事件)，按到期时间排序；事件面板是模态的，显示期间不出新事件
+    state 提供 hearts/money/history (Game 或 CanteenSim)，用来判断事件的前提
+    一天结束：没有显示中的事件、待触发的连锁和冷却中的事件，并且没有剩下可抽的事件，
+    或者连续 schedule.dry_draws 次抽取都没有满足前提的 (给玩家的行动留出打开前提的机会)
+    """
+    def __init__(self, table, rng, state):
+        self.table = table
+        self.rng = rng
+        self.state = state
+        # 每个有前提的事件编译成 [(量, 期望值或区间)]；量是 ('state', 'hearts') 或 ('history', 键)
+        self._tests = {}
+        for ev in table.events.values():
+            if ev.when is not None:
+                hearts, money, history = ev.when
+                tests = [(('state', 'hearts'), hearts)] if hearts else []
+                if money:
+                    tests.append((('state', 'money'), money))
+                tests += [(('history', name), expected) for name, expected in history]
+                self._tests[ev.key] = tests
+        # 统计
+        self.draws = 0
+        self.skipped = 0
+        self.woken = 0
+
+    def reset(self):
+        """新的一天 (每天开始前调用一次)：重新洗牌 (每个可抽事件一个竞速时间) 并排好第一次抽取"""
+        self.now = 0
+        self.current = None
+        self.started = False
+        self.actions = 0
+        self.dry = 0
+        self.fired = {}
+        # 今天出现过的事件 [(时刻 ms, key)]
+        self.log = []
+        self._seq = 0
+        self._race = 0.0
+        self._deck = []
+        self._cooling = []
+        self._timeline = []
+        self._chains = 0
+        self._blocked = set()
+        self._rising = {}
+        self._falling = {}
+        self._equal = {}
+        for ev in self.table.events.values():
+            if ev.weight > 0:
+                self._admit(ev)
+        schedule = self.table.schedule
+        self.draw_due = self.rng.randint(schedule.delay_min, schedule.delay_max)
+        self._push(self._timeline, self.draw_due, DRAW, None)
+
+    def _push(self, heap, when, *item):
+        self._seq += 1
+        heapq.heappush(heap, (when, self._seq) + item)
+
+    def _admit(self, ev):
+        """事件可以被抽了：前提满足就进 deck，否则挂起"""
+        if ev.key in self._tests and self._block(ev.key):
+            return
+        self._push(self._deck, self._race + self.rng.expovariate(ev.weight), ev.key)
+
+    # ---------------- 判断 ----------------
+    def _value(self, var):
+        kind, name = var
+        if kind == 'state':
+            return getattr(self.state, name)
+        return self.state.history.get(name)
+
+    def _failing(self, key):
+        """第一个不满足的条件 (量, 期望值)，全部满足时为 None"""
+        for var, expected in self._tests.get(key, ()):
+            value = self._value(var)
+            if isinstance(expected, tuple):
+                if not _numeric(value) or not _within(value, expected):
+                    return var, expected
+            elif value != expected:
+                return var, expected
+        return None
+
+    def eligible(self, key):
+        return self._failing(key) is None
+
+    def _block(self, key):
+        """前提不满足时按第一个不满足的条件挂起并返回 True"""
+        failing = self._failing(key)
+        if failing is None:
+            return False
+        var, expected = failing
+        if isinstance(expected, tuple):
+            low, high = expected
+            value = self._value(var)
+            if high is not None and _numeric(value) and value > high:
+                self._push(self._falling.setdefault(var, []), -high, key)
+            else:
+                # below low, or not a number yet (an unset history key): wait for it to rise past low
+                self._push(self._rising.setdefault(var, []), float('-inf') if low is None else low, key)
+        else:
+            self._equal.setdefault(var, {}).setdefault(expected, []).append(key)
+        self._blocked.add(key)
+        return True
+
+    def _wake(self):
+        """每个被测的量只看一次：越过阈值或等于期望值的挂起事件重新判断"""
+        woken = []
+        for var, heap in self._rising.items():
+            value = self._value(var)
+            if _numeric(value):
+                while heap and heap[0][0] <= value:
+                    woken.append(heapq.heappop(heap)[2])
+        for var, heap in self._falling.items():
+            value = self._value(var)
+            if _numeric(value):
+                while heap and -heap[0][0] >= value:
+                    woken.append(heapq.heappop(heap)[2])
+        for var, waiting in self._equal.items():
+            try:
+                woken += waiting.pop(self._value(var), ())
+            except TypeError:
+                pass
+        self.woken += len(woken)
+        for key in woken:
+            self._blocked.discard(key)
+            self._admit(self.table.events[key])
+
+    def remaining(self):
+        """今天还可能被抽到的事件 (不含连锁中的)"""
+        return ([entry[2] for entry in self._deck] + [entry[2] for entry in self._cooling]
+                + sorted(self._blocked))
+
+    def finished(self):
+        """这一天的事件已经结束 (规则见类说明)"""
+        if self.current is not None or self._chains or self._cooling:
+            return False
+        return not self._deck and not self._blocked or self.dry >= self.table.schedule.dry_draws
+
+    # ---------------- 推进 ----------------
+    def _draw(self, at):
+        """在 at 时刻按权重抽一个满足前提的事件；进 deck 之后前提又不满足了的，在这里挂起"""
+        self.draws += 1
+        # release cooldowns up to the draw's own time, not the end of the tick it falls in
+        while self._cooling and self._cooling[0][0] <= at:
+            self._admit(self.table.events[heapq.heappop(self._cooling)[2]])
+        self._wake()
+        found = None
+        while self._deck:
+            entry = heapq.heappop(self._deck)
+            if entry[2] in self._tests and self._block(entry[2]):
+                self.skipped += 1
+                continue
+            found = entry[2]
+            self._race = max(self._race, entry[0])
+            break
+        self.dry = 0 if found else self.dry + 1
+        return found
+
+    def _fire(self, key, at):
+        ev = self.table.events[key]
+        self.current = key
+        count = self.fired.get(key, 0) + 1
+        self.fired[key] = count
+        self.log.append((at, key))
+        if count < ev.repeat and ev.weight > 0:
+            if ev.cooldown > 0:
+                self._push(self._cooling, at + ev.cooldown, key)
+            else:
+                self._admit(ev)
+        return key
+
+    def on_action(self):
+        """玩家做了一次行动；到达 first_after_actions 次时立刻出第一个事件"""
+        self.actions += 1
+        if not self.started and self.actions >= self.table.schedule.first_after_actions:
+            return self.begin()
+        return None
+
+    def begin(self):
+        """开始出事件：马上抽第一个 (之后由抽取时钟接管)"""
+        self.started = True
+        key = self._draw(self.now)
+        return self._fire(key, self.now) if key else None
+
+    def tick(self, now, since=None):
+        """
+        推进到 now，返回这次出现的事件 key (没有则 None)
+        since: 连续时间模拟里这一段时间的起点，到期的条目按实际到期时刻 (不早于 since) 触发；
+        逐帧推进时省略，按 now 触发
+        """
+        self.now = now
+        if self.current is not None or not self.started:
+            return None
+        schedule = self.table.schedule
+        while self._timeline and self._timeline[0][0] < now:
+            due, _, kind, key = heapq.heappop(self._timeline)
+            at = now if since is None else max(due, since)
+            if kind == DRAW:
+                key = self._draw(at)
+                self.draw_due = at + self.rng.randint(schedule.delay_min, schedule.delay_max)
+                self._push(self._timeline, self.draw_due, DRAW, None)
+                if key is None:
+                    continue
+            else:
+                self._chains -= 1
+                if not self.eligible(key):
+                    continue
+            return self._fire(key, at)
+        return None
+
+    def resolve(self, effect):
+        """当前事件选完了；选项带连锁时把后续事件排到时间线上"""
+        self.current = None
+        if effect is not None and effect.chain:
+            key, low, high = effect.chain
+            self._chains += 1
+            self._push(self._timeline, self.now + self.rng.randint(low, high), CHAIN, key)
+
+    def stats(self):
+        return {'deck': len(self._deck), 'blocked': len(self._blocked), 'cooling': len(self._cooling),
+                'timeline': len(self._timeline), 'draws': self.draws, 'skipped': self.skipped,
+                'woken': self.woken, 'fired': sum(self.fired.values())}
+
+
+def _numeric(value):
+    return isinstance(value, (int, float))
+
+
+def _within(value, bounds):
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
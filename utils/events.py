@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+
+EVENT_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'events.json')
+EVENT_DATA_VERSION = 1
+CHOICES = ('A', 'B')
+# 事件选项可以声明的 history 副作用：
+#   negative:     黑心状态下累加 post_black_negative_consec 并记录当时的金钱
+#   positive:     标记 chose_positive_event (有心值变化的选项只在实际加心时标记)
+#   reset_consec: 黑心状态下清零 post_black_negative_consec
+HISTORY_OPS = ('negative', 'positive', 'reset_consec')
+BLACK_MAX = 3
+
+# (text, heart_delta, money_delta, icon_name) - 准备/营业阶段的按钮，字段顺序和原来的元组一致
+Option = namedtuple('Option', 'text hearts money icon')
+# 一个事件选项编译后的效果记录；hearts/money 未缩放，boss_* 是老板 react_to_choice 收到的值
+# chain: None 或 (后续事件key, 最短延迟ms, 最长延迟ms)
+Effect = namedtuple('Effect', 'event choice label hearts money boss_hearts boss_money log negative positive reset_consec chain')
+# weight: 抽取权重 (0 = 只能由连锁触发)；repeat: 一天最多出现几次；cooldown: 两次出现之间至少隔多少 ms
+# when: 出现的前提，见 EventTable._when
+Event = namedtuple('Event', 'key text icon boss choices weight repeat cooldown when')
+# 营业阶段第几次行动后出第一个事件，之后每隔 [delay_min, delay_max] ms 抽一次；
+# 连续 dry_draws 次抽取都没有满足前提的事件时这一天结束
+Schedule = namedtuple('Schedule', 'first_after_actions delay_min delay_max dry_draws')
+
+
+class EventTable:
+    """
+    事件表 - 读 assets/events.json，校验后编译成扁平的分发表 {(事件key, 'A'/'B'): Effect}
+    pygame 场景和无头模拟共用这一份表和 apply_effect()，结算一次选择只是一次字典查找，
+    新增事件只改数据文件，不需要写代码
+    """
+    def __init__(self, data, source='<data>'):
+        self.source = source
+        self.schedule = None
+        self.prep = []
+        self.actions = []
+        self.events = {}
+        self.keys = []
+        self.dispatch = {}
+        self._compile(data)
+
+    @classmethod
+    def load(cls, path=EVENT_DATA):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), source=path)
+
+    # ---------------- 校验 ----------------
+    def _fail(self, where, message):
+        raise ValueError(f'{self.source}: {where}: {message}')
+
+    def _int(self, item, name, where, default=0):
+        value = item.get(name, default)
+        if isinstance(value, bool) or not isinstance(value, int):
+            self._fail(where, f'{name} must be an integer, got {value!r}')
+        return value
+
+    def _range(self, item, name, where, default=None):
+        """[最小, 最大] 整数区间；null 表示这一端不设限"""
+        value = item.get(name, default)
+        if value is None:
+            return None
+        if (not isinstance(value, list) or len(value) != 2
+                or any(v is not None and (isinstance(v, bool) or not isinstance(v, int)) for v in value)):
+            self._fail(where, f'{name} must be [min, max], got {value!r}')
+        if None not in value and value[0] > value[1]:
+            self._fail(where, f'{name} is empty: {value!r}')
+        return tuple(value)
+
+    def _str(self, item, name, where):
+        value = item.get(name)
+        if not isinstance(value, str) or not value:
+            self._fail(where, f'{name} must be a non-empty string')
+        return value
+
+    def _options(self, items, section):
+        if not isinstance(items, list) or not items:
+            self._fail(section, 'expected a non-empty list of options')
+        options = []
+        for i, item in enumerate(items):
+            where = f'{section}[{i}]'
+            if not isinstance(item, dict):
+                self._fail(where, 'expected an object')
+            options.append(Option(self._str(item, 'text', where), self._int(item, 'hearts', where),
+                                  self._int(item, 'money', where), self._str(item, 'icon', where)))
+        return options
+
+    def _effect(self, key, choice, item, where):
+        if not isinstance(item, dict):
+            self._fail(where, 'expected an object')
+        hearts = self._int(item, 'hearts', where)
+        money = self._int(item, 'money', where)
+        boss = item.get('boss_reaction', [hearts, money])
+        if (not isinstance(boss, list) or len(boss) != 2
+                or any(isinstance(v, bool) or not isinstance(v, int) for v in boss)):
+            self._fail(where, f'boss_reaction must be [hearts, money], got {boss!r}')
+        log = self._str(item, 'log', where)
+        try:
+            log.format(hearts=0, money=0)
+        except (KeyError, IndexError, ValueError) as e:
+            self._fail(where, f'bad log template {log!r} ({e})')
+        ops = item.get('history', [])
+        if not isinstance(ops, list) or any(op not in HISTORY_OPS for op in ops):
+            self._fail(where, f'history must be a list drawn from {HISTORY_OPS}, got {ops!r}')
+        chain = item.get('chain')
+        if chain is not None:
+            if not isinstance(chain, dict):
+                self._fail(where, 'chain must be {"event": key, "delay_ms": [min, max]}')
+            delay = self._range(chain, 'delay_ms', where + '.chain', default=[0, 0])
+            if None in delay or delay[0] < 0:
+                self._fail(where + '.chain', f'delay_ms must be two non-negative integers, got {list(delay)!r}')
+            # the target is checked once every event is known
+            chain = (self._str(chain, 'event', where + '.chain'),) + delay
+        return Effect(key, choice, self._str(item, 'label', where), hearts, money, boss[0], boss[1], log,
+                      'negative' in ops, 'positive' in ops, 'reset_consec' in ops, chain)
+
+    def _when(self, item, where):
+        """
+        出现前提，编译成 (心区间, 钱区间, ((history 键, 期望值或区间), ...))：
+        {"hearts": [min, max], "money": [min, max], "history": {"had_grey": true, "grey_choice_count": [3, null]}}
+        """
+        when = item.get('when')
+        if when is None:
+            return None
+        if not isinstance(when, dict) or set(when) - {'hearts', 'money', 'history'}:
+            self._fail(where, f'when may only test hearts, money and history, got {when!r}')
+        history = when.get('history', {})
+        if not isinstance(history, dict):
+            self._fail(where, 'when.history must be an object')
+        tests = []
+        for name, expected in sorted(history.items()):
+            if isinstance(expected, list):
+                expected = self._range(history, name, where + '.when.history')
+            elif not isinstance(expected, (bool, int, str)):
+                self._fail(where, f'when.history.{name} must be a value or [min, max], got {expected!r}')
+            tests.append((name, expected))
+        return (self._range(when, 'hearts', where + '.when'), self._range(when, 'money', where + '.when'), tuple(tests))
+
+    # ---------------- 编译 ----------------
+    def _compile(self, data):
+        if not isinstance(data, dict):
+            self._fail('top level', 'expected an object')
+        if data.get('version') != EVENT_DATA_VERSION:
+            self._fail('version', f"unsupported event data version {data.get('version')!r}")
+        schedule = data.get('schedule', {})
+        if not isinstance(schedule, dict):
+            self._fail('schedule', 'expected an object')
+        first = self._int(schedule, 'first_after_actions', 'schedule', default=4)
+        delay = self._range(schedule, 'delay_ms', 'schedule', default=[8000, 15000])
+        if first < 0 or None in delay or delay[0] < 0:
+            self._fail('schedule', 'first_after_actions and delay_ms must be non-negative integers')
+        dry = self._int(schedule, 'dry_draws', 'schedule', default=2)
+        if dry < 1:
+            self._fail('schedule', f'dry_draws must be at least 1, got {dry}')
+        self.schedule = Schedule(first, delay[0], delay[1], dry)
+        self.prep = self._options(data.get('prep'), 'prep')
+        self.actions = self._options(data.get('actions'), 'actions')
+        events = data.get('events')
+        if not isinstance(events, list) or not events:
+            self._fail('events', 'expected a non-empty list of events')
+        for i, item in enumerate(events):
+            where = f'events[{i}]'
+            if not isinstance(item, dict):
+                self._fail(where, 'expected an object')
+            key = self._str(item, 'key', where)
+            if key in self.events:
+                self._fail(where, f'duplicate event key {key!r}')
+            choices = item.get('choices')
+            # the event panel has exactly two buttons
+            if not isinstance(choices, dict) or sorted(choices) != list(CHOICES):
+                self._fail(where, f'choices must define exactly {CHOICES}')
+            compiled = tuple(self._effect(key, c, choices[c], f'{where}.choices.{c}') for c in CHOICES)
+            weight = item.get('weight', 1)
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                self._fail(where, f'weight must be a non-negative number, got {weight!r}')
+            repeat = self._int(item, 'repeat', where, default=1)
+            cooldown = self._int(item, 'cooldown_ms', where)
+            if repeat < 1 or cooldown < 0:
+                self._fail(where, 'repeat must be at least 1 and cooldown_ms non-negative')
+            self.events[key] = Event(key, self._str(item, 'text', where), self._str(item, 'icon', where),
+                                     item.get('boss', key), compiled, weight, repeat, cooldown,
+                                     self._when(item, where))
+            self.keys.append(key)
+            for effect in compiled:
+                self.dispatch[(key, effect.choice)] = effect
+        for (key, choice), effect in self.dispatch.items():
+            if effect.chain and effect.chain[0] not in self.events:
+                self._fail(f'{key}.choices.{choice}.chain', f'unknown event {effect.chain[0]!r}')
+
+    def effect(self, key, choice):
+        return self.dispatch.get((key, choice))
+
+    @property
+    def plain(self):
+        """每个事件一天一次、等概率、没有前提和连锁 (向量化模拟和求解器只建模这种情况)"""
+        events = list(self.events.values())
+        return (all(ev.repeat == 1 and ev.when is None and ev.weight == events[0].weight > 0 for ev in events)
+                and not any(effect.chain for effect in self.dispatch.values()))
+
+    def fingerprint(self):
+        """只取决于数值规则 (不含文案和图标) 的短哈希，规则变了磁盘上的求解缓存就不再命中"""
+        rules = [list(self.schedule)] + [[o.hearts, o.money] for o in self.prep + self.actions]
+        rules += [[key, e.hearts, e.money, e.negative, e.positive, e.reset_consec, e.chain]
+                  for key in self.keys for e in self.events[key].choices]
+        rules += [[ev.key, ev.weight, ev.repeat, ev.cooldown, ev.when] for ev in self.events.values()]
+        return hashlib.sha1(json.dumps(rules).encode('utf-8')).hexdigest()[:8]
+
+    def stats(self):
+        return {'source': self.source, 'prep': len(self.prep), 'actions': len(self.actions),
+                'events': len(self.keys), 'effects': len(self.dispatch)}
+
+
+def apply_effect(effect, state, apply_heart, apply_money):
+    """
+    执行一条效果记录的数值和 history 部分，返回实际生效的 (心, 钱)
+    state 提供 hearts/money/history (Game 或 CanteenSim)，apply_* 负责按倍率缩放；日志和老板反应由调用方处理
+    """
+    ah = apply_heart(effect.hearts)
+    am = apply_money(effect.money)
+    history = state.history
+    if effect.negative and state.hearts <= BLACK_MAX:
+        history['post_black_negative_consec'] = history.get('post_black_negative_consec', 0) + 1
+        history['last_negative_choice_money'] = state.money
+    if effect.positive and (effect.hearts == 0 or ah > 0):
+        history['chose_positive_event'] = True
+    if effect.reset_consec and state.hearts <= BLACK_MAX:
+        history['post_black_negative_consec'] = 0
+    return ah, am
+
+
+# process-wide table, compiled on first use
+_table = None
+
+
+def event_table():
+    global _table
+    if _table is None:
+        _table = EventTable.load()
+    return _table
+
+
+def event_stats():
+    return event_table().stats()
@@ -0,0 +1,88 @@
+import pygame
+from collections import OrderedDict
+
+# 游戏里用到的两种像素字体
+FONT_REGULAR = "assets/fonts/m6x11.ttf"
+FONT_PLUS = "assets/fonts/m6x11plus.ttf"
+
+
+class FontCache:
+    """
+    字体注册表 - 按 (path, size) 缓存 pygame.font.Font
+    同一字体只从磁盘读取一次，超过上限时淘汰最久未使用的条目
+    """
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._fonts = OrderedDict()
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, size):
+        key = (path, size)
+        font = self._fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            self._fonts.move_to_end(key)
+            return font
+
+        self.misses += 1
+        try:
+            font = pygame.font.Font(path, size)
+        except Exception:
+            font = pygame.font.SysFont("arial", size)
+        self._fonts[key] = font
+        # LRU eviction: scenes keep their own references, so dropping an entry only
+        # means the next lookup reloads it from disk
+        while len(self._fonts) > self.max_entries:
+            self._fonts.popitem(last=False)
+            self.evictions += 1
+        return font
+
+    def put(self, path, size, font):
+        """放入一个已经创建好的字体 (资源仓库在主线程提交时用)，不计入命中统计"""
+        # an existing entry wins, so fonts already handed out (and cached by id) stay valid
+        if (path, size) in self._fonts:
+            return
+        self._fonts[(path, size)] = font
+        while len(self._fonts) > self.max_entries:
+            self._fonts.popitem(last=False)
+            self.evictions += 1
+
+    def preload(self, specs):
+        """预加载一组 (path, size)，不计入命中统计"""
+        for path, size in specs:
+            if (path, size) not in self._fonts:
+                self.get(path, size)
+                self.misses -= 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._fonts),
+            'max_entries': self.max_entries,
+            'hit_rate': (self.hits / total) if total else 0.0,
+        }
+
+    def clear(self):
+        self._fonts.clear()
+
+
+# process-wide registry shared by main.py and states/
+font_cache = FontCache()
+
+
+def get_font(path, size):
+    return font_cache.get(path, size)
+
+
+def preload_fonts(specs):
+    font_cache.preload(specs)
+
+
+def font_cache_stats():
+    return font_cache.stats()
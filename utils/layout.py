@@ -0,0 +1,139 @@
+from collections import OrderedDict, namedtuple
+
+# 一行排好版的文字：text 相对排版框左上角的位置 (x, y) 和宽度
+LineRun = namedtuple('LineRun', 'text x y width')
+
+
+class LayoutEngine:
+    """
+    文字排版引擎 - 所有自动换行都走这里
+    每个字体的字形步进宽度只量一次 (font.metrics)，换行在一次线性扫描里完成，
+    结果按 (字体, 文本, 宽度, 行高, 对齐) 缓存，超过上限时淘汰最久未使用的条目
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._layouts = OrderedDict()
+        self._advances = {}
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.measure_calls = 0
+
+    def _advance_table(self, font):
+        # the entry keeps a reference to the font, so its id() stays unique while cached
+        entry = self._advances.get(id(font))
+        if entry is None:
+            entry = (font, {})
+            self._advances[id(font)] = entry
+        return entry[1]
+
+    def _width(self, table, font, text):
+        w = 0
+        for ch in text:
+            adv = table.get(ch)
+            if adv is None:
+                self.measure_calls += 1
+                # the glyph advance (not font.size(ch), which includes overhang) sums to font.size(text)
+                metrics = font.metrics(ch)
+                adv = metrics[0][4] if metrics and metrics[0] else font.size(ch)[0]
+                table[ch] = adv
+            w += adv
+        return w
+
+    def _break_lines(self, font, text, max_width):
+        """一次线性扫描：逐词累加宽度，单词本身超宽时按字符强制断开"""
+        table = self._advance_table(font)
+        space = self._width(table, font, ' ')
+        lines = []
+        paragraphs = text.split('\n')
+        for paragraph in paragraphs:
+            cur, cur_w = '', 0
+            for word in paragraph.split():
+                word_w = self._width(table, font, word)
+                if cur and cur_w + space + word_w <= max_width:
+                    cur, cur_w = cur + ' ' + word, cur_w + space + word_w
+                    continue
+                if not cur and word_w <= max_width:
+                    cur, cur_w = word, word_w
+                    continue
+                if cur:
+                    lines.append((cur, cur_w))
+                    cur, cur_w = '', 0
+                if word_w <= max_width:
+                    cur, cur_w = word, word_w
+                    continue
+                # single word longer than max_width: break it into characters
+                part, part_w = '', 0
+                for ch in word:
+                    ch_w = table[ch]
+                    if part and part_w + ch_w > max_width:
+                        lines.append((part, part_w))
+                        part, part_w = '', 0
+                    part, part_w = part + ch, part_w + ch_w
+                cur, cur_w = part, part_w
+            # explicit blank lines are kept; an empty text has no lines
+            if cur or len(paragraphs) > 1:
+                lines.append((cur, cur_w))
+        return lines
+
+    def layout(self, font, text, max_width, line_height=None, align='left'):
+        """返回排好位置的 LineRun 元组；align 为 'left' / 'center' / 'right'"""
+        if line_height is None:
+            line_height = font.get_linesize()
+        key = (id(font), text, max_width, line_height, align)
+        entry = self._layouts.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._layouts.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        runs = []
+        for i, (line, w) in enumerate(self._break_lines(font, text, max_width)):
+            if align == 'center':
+                x = max_width // 2 - w // 2
+            elif align == 'right':
+                x = max_width - w
+            else:
+                x = 0
+            runs.append(LineRun(line, x, i * line_height, w))
+        runs = tuple(runs)
+        self._layouts[key] = (font, runs)
+        while len(self._layouts) > self.max_entries:
+            self._layouts.popitem(last=False)
+            self.evictions += 1
+        return runs
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._layouts),
+            'measure_calls': self.measure_calls,
+            'hit_rate': (self.hits / total) if total else 0.0,
+        }
+
+    def clear(self, advances=True):
+        self._layouts.clear()
+        if advances:
+            self._advances.clear()
+
+
+# process-wide engine shared by main.py, dialog.py and states/
+layout_engine = LayoutEngine()
+
+
+def layout_text(font, text, max_width, line_height=None, align='left'):
+    return layout_engine.layout(font, text, max_width, line_height, align)
+
+
+def wrap_lines(font, text, max_width):
+    """只要换行后的字符串列表"""
+    return [run.text for run in layout_engine.layout(font, text, max_width)]
+
+
+def layout_stats():
+    return layout_engine.stats()
@@ -0,0 +1,212 @@
+import math
+import os
+import threading
+import time
+import wave
+from array import array
+from collections import deque
+
+import pygame
+
+from utils.sound import reserve_channels, percentile
+
+
+# 转换缓存时每次读写的帧数 (16 位立体声约 256 KB)
+CONVERT_CHUNK_FRAMES = 65536
+
+
+def _write_wave(out, freq, width, channels, chunks):
+    """把一块块 PCM 依次写进 WAV (先写临时文件再 os.replace)"""
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    tmp = out + '.tmp'
+    with wave.open(tmp, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(freq)
+        for chunk in chunks:
+            w.writeframesraw(chunk)
+    os.replace(tmp, out)
+
+
+def _slowed(src, frame, slowdown):
+    """从 WAV 按块读出，每帧重复 slowdown 次 (降 n 倍速、低八度)"""
+    while True:
+        raw = src.readframes(CONVERT_CHUNK_FRAMES)
+        if not raw:
+            return
+        if frame == 4 and array('I').itemsize == 4:
+            frames = array('I', raw)
+            slowed = array('I', bytes(len(raw) * slowdown))
+            for k in range(slowdown):
+                slowed[k::slowdown] = frames
+            yield slowed.tobytes()
+        else:
+            yield b''.join(raw[i:i + frame] * slowdown for i in range(0, len(raw), frame))
+
+
+def cached_wave(path, slowdown, cache_dir):
+    """
+    把一层音乐转成和混音器格式一致的 WAV 放进 cache_dir，之后按块流式读取；源文件更新后重新转换
+    pygame 没有按块解码 OGG 的接口，所以 1 倍速的缓存要把源文件完整解码一次 (bgm_warm.ogg 约 6.7 MB PCM)，
+    解码结果原地按块写出，不再复制；减速的层从 1 倍速的缓存按块读出再写，不会在内存里放大
+    发布前可以用 python tools/build_music.py 预先生成，运行时就不用解码
+    """
+    freq, size, channels = pygame.mixer.get_init()
+    width = abs(size) // 8
+    source = os.path.splitext(os.path.basename(path))[0]
+    out = os.path.join(cache_dir, f"{source}_{freq}_{channels}ch_{width * 8}bit_x{slowdown}.wav")
+    if os.path.exists(out) and os.path.getmtime(out) >= os.path.getmtime(path):
+        return out
+    if slowdown > 1:
+        base = cached_wave(path, 1, cache_dir)
+        with wave.open(base, 'rb') as src:
+            _write_wave(out, freq, width, channels, _slowed(src, width * channels, slowdown))
+        return out
+    sound = pygame.mixer.Sound(path)
+    # memoryview reads the decoded samples in place; get_raw() would copy all of them first
+    view = memoryview(sound).cast('B')
+    step = CONVERT_CHUNK_FRAMES * width * channels
+    try:
+        _write_wave(out, freq, width, channels, (view[i:i + step] for i in range(0, len(view), step)))
+    finally:
+        view.release()
+    return out
+
+
+class _Stem:
+    """一层音乐：循环读取 WAV，每次交出 chunk_frames 帧做成的 Sound"""
+    def __init__(self, name, path, channel, chunk_frames):
+        self.name = name
+        self.channel = channel
+        self.chunk_frames = chunk_frames
+        self._wave = wave.open(path, 'rb')
+        self._frame_bytes = self._wave.getsampwidth() * self._wave.getnchannels()
+
+    def next_chunk(self):
+        data = self._wave.readframes(self.chunk_frames)
+        missing = self.chunk_frames * self._frame_bytes - len(data)
+        if missing > 0:
+            # loop: continue from the start of the file
+            self._wave.rewind()
+            data += self._wave.readframes(missing // self._frame_bytes)
+        return pygame.mixer.Sound(buffer=data)
+
+    def close(self):
+        self._wave.close()
+
+
+class MusicEngine:
+    """
+    分层 BGM - 每层 (stem) 占一个专用声道，后台线程把各层一小块一小块地读出来排进声道队列，
+    并按诡异程度做等功率交叉淡化 (音量设在声道上，真正的混音由 SDL 完成)，主循环只调用 set_level()
+    stems: [(名字, 源文件, slowdown)]，按顺序对应诡异程度从 0 到 1
+    """
+    def __init__(self, stems, volume=0.5, chunk_ms=250, fade_per_sec=0.5, poll_ms=20, cache_dir='music_cache'):
+        self.stem_specs = list(stems)
+        self.volume = volume
+        self.chunk_ms = chunk_ms
+        self.fade_per_sec = fade_per_sec
+        self.poll_ms = poll_ms
+        self.cache_dir = cache_dir
+        # channels are reserved on the caller's thread, before the worker starts
+        self._channels = reserve_channels(len(self.stem_specs))
+        self._stems = []
+        self.target = 0.0
+        self.level = 0.0
+        self.gains = [0.0] * len(self.stem_specs)
+        self._stop = threading.Event()
+        self._thread = None
+        self._work_ms = deque(maxlen=512)
+        # 统计
+        self.chunks = 0
+        self.underruns = 0
+        self.error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name='MusicEngine', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        for channel in self._channels:
+            try:
+                channel.stop()
+            except Exception:
+                pass
+
+    def set_level(self, level):
+        """目标诡异程度 0-1；实际音量按 fade_per_sec 平滑地跟过去"""
+        self.target = max(0.0, min(1.0, float(level)))
+
+    def _gains_at(self, level):
+        # equal-power crossfade between neighbouring stems
+        if len(self._stems) == 1:
+            return [1.0]
+        pos = level * (len(self._stems) - 1)
+        gains = []
+        for i in range(len(self._stems)):
+            d = abs(pos - i)
+            gains.append(math.cos(d * math.pi / 2) if d < 1 else 0.0)
+        return gains
+
+    def _open(self):
+        freq = pygame.mixer.get_init()[0]
+        chunk_frames = max(1, int(freq * self.chunk_ms / 1000))
+        for (name, path, slowdown), channel in zip(self.stem_specs, self._channels):
+            wav = cached_wave(path, slowdown, self.cache_dir)
+            self._stems.append(_Stem(name, wav, channel, chunk_frames))
+
+    def _worker(self):
+        try:
+            self._open()
+        except Exception as e:
+            self.error = e
+            print(f"[MusicEngine] could not prepare stems: {e}")
+            return
+        started = False
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            step = self.fade_per_sec * (now - last)
+            last = now
+            self.level += max(-step, min(step, self.target - self.level))
+            self.gains = self._gains_at(self.level)
+            try:
+                for stem, gain in zip(self._stems, self.gains):
+                    stem.channel.set_volume(gain * self.volume)
+                    if stem.channel.get_queue() is not None:
+                        continue
+                    sound = stem.next_chunk()
+                    self.chunks += 1
+                    if stem.channel.get_busy():
+                        stem.channel.queue(sound)
+                    else:
+                        if started:
+                            self.underruns += 1
+                        stem.channel.play(sound)
+            except Exception as e:
+                # the mixer went away (shutdown) or a stem became unreadable
+                self.error = e
+                break
+            started = True
+            self._work_ms.append((time.perf_counter() - now) * 1000.0)
+            self._stop.wait(self.poll_ms / 1000.0)
+        for stem in self._stems:
+            stem.close()
+
+    def stats(self):
+        work = list(self._work_ms)
+        return {
+            'stems': [stem.name for stem in self._stems],
+            'level': round(self.level, 3),
+            'gains': [round(g, 3) for g in self.gains],
+            'chunks': self.chunks,
+            'underruns': self.underruns,
+            'work_p95_ms': round(percentile(work, 0.95), 3),
+            'work_max_ms': round(max(work), 3) if work else 0.0,
+            'error': str(self.error) if self.error else None,
+        }
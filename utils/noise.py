@@ -0,0 +1,56 @@
+import random
+import pygame
+
+
+class StaticNoiseBank:
+    """
+    静态噪点帧库 - 每个透明度只生成一次一小圈噪点帧，之后循环播放
+    每帧是一组预先算好的 (小点surface, 位置)，渲染时一次 blits 完成，
+    不再分配全屏SRCALPHA surface，也不用混合整张透明图
+    """
+    def __init__(self, size, frame_count=8, dots=300, dot_size=2, rng=None):
+        self.size = size
+        # 纯表现用的随机流 (默认用全局 random)
+        self.rng = rng if rng is not None else random
+        self.frame_count = frame_count
+        self.dots = dots
+        self.dot_size = dot_size
+        self._rings = {}
+        self._dot_surfs = {}
+        self._index = 0
+
+    def _dot(self, c, alpha):
+        key = (c, alpha)
+        dot = self._dot_surfs.get(key)
+        if dot is None:
+            dot = pygame.Surface((self.dot_size, self.dot_size), pygame.SRCALPHA)
+            dot.fill((c, c, c, alpha))
+            self._dot_surfs[key] = dot
+        return dot
+
+    def _build_frame(self, alpha):
+        w, h = self.size
+        frame = []
+        for _ in range(self.dots):
+            sx = self.rng.randint(0, w)
+            sy = self.rng.randint(0, h)
+            c = self.rng.randint(0, 255)
+            frame.append((self._dot(c, alpha), (sx, sy)))
+        return frame
+
+    def frame(self, alpha):
+        """返回该透明度下的下一帧噪点 (blit序列)"""
+        ring = self._rings.get(alpha)
+        if ring is None:
+            ring = [self._build_frame(alpha) for _ in range(self.frame_count)]
+            self._rings[alpha] = ring
+        self._index = (self._index + 1) % self.frame_count
+        return ring[self._index]
+
+    def draw(self, surf, alpha):
+        surf.blits(self.frame(alpha), doreturn=False)
+
+    def resize(self, size):
+        if size != self.size:
+            self.size = size
+            self._rings.clear()
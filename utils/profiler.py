@@ -0,0 +1,213 @@
+import csv
+import gc
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from utils.sound import percentile
+
+
+class _NullSection:
+    """关闭时 section() 返回的共享空上下文，不计时也不分配"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSection()
+
+
+class _Section:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+
+class FrameProfiler:
+    """
+    帧耗时分析器 - 主循环每个阶段和场景渲染的各部分用 section(name) 包起来，按帧累计毫秒数
+    最近 window 帧用来算 p50/p95/p99 和 FPS，完整记录 (最多 max_trace 帧) 可以导出成 CSV 或 JSON
+    分配数用 sys.getallocatedblocks() 的帧间差值 (净增的内存块) 加上第 0 代 GC 次数近似
+    sources: {名字: 返回带 hits/misses 的 stats 字典的函数}，每帧记下各缓存的未命中数
+    """
+    def __init__(self, window=240, max_trace=36000):
+        self.enabled = False
+        # False: record only, the game does not draw the on-screen panel (benchmarks)
+        self.overlay = True
+        self.window = window
+        self.sources = {}
+        self._frames = deque(maxlen=window)
+        self.trace = deque(maxlen=max_trace)
+        self.section_names = []
+        self._current = {}
+        self._frame_start = None
+        self._blocks = 0
+        self._gc = 0
+        self._misses = {}
+        self._t0 = time.perf_counter()
+        self.frames = 0
+
+    def enable(self, on=True):
+        self.enabled = bool(on)
+        # a half-timed frame would skew the percentiles
+        self._frame_start = None
+        self._current = {}
+
+    def reset(self):
+        """丢掉已记录的帧 (换一段要单独统计的场景时)"""
+        self._frames.clear()
+        self.trace.clear()
+        self._current = {}
+        self._frame_start = None
+        self._misses = {}
+        self.frames = 0
+
+    def declare(self, names):
+        """预先登记阶段名，固定面板和 CSV 列的顺序"""
+        for name in names:
+            if name not in self.section_names:
+                self.section_names.append(name)
+
+    def toggle(self):
+        self.enable(not self.enabled)
+        return self.enabled
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL
+        return _Section(self, name)
+
+    def add(self, name, ms):
+        """把一段已经量好的耗时记到当前帧 (同名的多次调用累加)"""
+        if not self.enabled:
+            return
+        if name not in self._current:
+            self._current[name] = 0.0
+            if name not in self.section_names:
+                self.section_names.append(name)
+        self._current[name] += ms
+
+    def _cache_misses(self):
+        misses = {}
+        for name, fn in self.sources.items():
+            try:
+                misses[name] = fn().get('misses', 0)
+            except Exception:
+                pass
+        return misses
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self._current = {}
+        self._frame_start = time.perf_counter()
+        self._blocks = sys.getallocatedblocks()
+        self._gc = gc.get_stats()[0]['collections']
+        if not self._misses:
+            self._misses = self._cache_misses()
+
+    def end_frame(self, frame_ms):
+        """frame_ms: 和上一帧的间隔 (含等待)；work 是这一帧真正干活的时间"""
+        if not self.enabled or self._frame_start is None:
+            return
+        work_ms = (time.perf_counter() - self._frame_start) * 1000.0 + self._current.get('events', 0.0)
+        misses = self._cache_misses()
+        row = {
+            'frame': self.frames,
+            't': round(time.perf_counter() - self._t0, 4),
+            'frame_ms': round(frame_ms, 3),
+            'work_ms': round(work_ms, 3),
+            'alloc_blocks': sys.getallocatedblocks() - self._blocks,
+            'gc0': gc.get_stats()[0]['collections'] - self._gc,
+        }
+        for name, ms in self._current.items():
+            row[name] = round(ms, 3)
+        for name, count in misses.items():
+            row['miss.' + name] = count - self._misses.get(name, count)
+        self._misses = misses
+        self._frames.append(row)
+        self.trace.append(row)
+        self.frames += 1
+        self._frame_start = None
+
+    def summary(self):
+        """最近 window 帧的统计"""
+        rows = list(self._frames)
+        if not rows:
+            return {'frames': 0}
+        frame = [r['frame_ms'] for r in rows]
+        work = [r['work_ms'] for r in rows]
+        mean_frame = sum(frame) / len(frame)
+        sections = {}
+        for name in self.section_names:
+            values = [r.get(name, 0.0) for r in rows]
+            sections[name] = {
+                'mean_ms': round(sum(values) / len(values), 3),
+                'p95_ms': round(percentile(values, 0.95), 3),
+            }
+        caches = {}
+        for name, fn in self.sources.items():
+            try:
+                stats = fn()
+            except Exception:
+                continue
+            caches[name] = {
+                'hit_rate': round(stats.get('hit_rate', 0.0), 3),
+                'recent_misses': sum(r.get('miss.' + name, 0) for r in rows),
+            }
+        return {
+            'frames': len(rows),
+            'fps': round(1000.0 / mean_frame, 1) if mean_frame > 0 else 0.0,
+            'frame_p50_ms': round(percentile(frame, 0.5), 3),
+            'frame_p95_ms': round(percentile(frame, 0.95), 3),
+            'frame_p99_ms': round(percentile(frame, 0.99), 3),
+            'work_p50_ms': round(percentile(work, 0.5), 3),
+            'work_p95_ms': round(percentile(work, 0.95), 3),
+            'work_p99_ms': round(percentile(work, 0.99), 3),
+            'alloc_blocks_mean': round(sum(r['alloc_blocks'] for r in rows) / len(rows), 1),
+            'gc0_per_sec': round(sum(r['gc0'] for r in rows) * 1000.0 / max(1e-6, sum(frame)), 2),
+            'sections': sections,
+            'caches': caches,
+        }
+
+    def export(self, path):
+        """按扩展名写 CSV (每帧一行) 或 JSON (汇总 + 每帧)，返回写出的帧数"""
+        rows = list(self.trace)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if path.lower().endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'summary': self.summary(), 'frames': rows}, f, indent=1)
+        else:
+            columns = ['frame', 't', 'frame_ms', 'work_ms', 'alloc_blocks', 'gc0'] + self.section_names
+            columns += ['miss.' + name for name in self.sources]
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns, restval=0, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(rows)
+        return len(rows)
+
+
+# process-wide profiler; main.py and the scenes share it
+profiler = FrameProfiler()
+
+
+def profile_section(name):
+    return profiler.section(name)
+
+
+def profiler_stats():
+    return profiler.summary()
@@ -0,0 +1,143 @@
+import json
+import os
+import time
+
+import pygame
+
+
+# 会影响一局走向的输入；鼠标移动也要记：按钮的悬停缩放会改变点击判定的范围
+RECORDED_EVENTS = {
+    'MOUSEMOTION': ('pos',),
+    'MOUSEBUTTONDOWN': ('pos', 'button'),
+    'MOUSEBUTTONUP': ('pos', 'button'),
+    'KEYDOWN': ('key', 'mod', 'unicode'),
+    'KEYUP': ('key', 'mod'),
+}
+# 2: events are drawn by the weighted scheduler (utils/event_scheduler.py); older recordings play out differently
+# 3: the title screen gained a Campaign button and its buttons moved; recorded clicks land elsewhere
+REPLAY_VERSION = 3
+
+
+def encode_event(event):
+    """pygame 事件 -> 可写进 JSON 的字典；不需要记录的事件返回 None"""
+    for name, attrs in RECORDED_EVENTS.items():
+        if event.type == getattr(pygame, name):
+            data = {'type': name}
+            for attr in attrs:
+                value = getattr(event, attr, None)
+                data[attr] = list(value) if isinstance(value, tuple) else value
+            return data
+    return None
+
+
+def decode_event(data):
+    attrs = {k: (tuple(v) if isinstance(v, list) else v) for k, v in data.items() if k != 'type'}
+    return pygame.event.Event(getattr(pygame, data['type']), **attrs)
+
+
+def normalize(value):
+    """按 JSON 往返一次 (元组变列表)，让现场记录和重放结果可以直接比较"""
+    return json.loads(json.dumps(value))
+
+
+class ReplayRecorder:
+    """
+    录像 - 一行一条 JSON：第一行是头 (种子、模拟步长)，之后每批输入记成 {"step": 第几步之前, "events": [...]}，
+    每到一个结局记一行 {"ending": ...}；步数按固定模拟步长计，和帧率、机器快慢无关
+    开始或继续一个战役时记一行 {"campaign": ...}：继续的战役来自 campaign.jsonl，录像里要带上它当时的种子和状态
+    """
+    def __init__(self, path, seed, step_ms, meta=None):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # line buffered: a crash still leaves every input up to the last batch on disk
+        self._file = open(path, 'w', encoding='utf-8', buffering=1)
+        header = {'replay': REPLAY_VERSION, 'seed': seed, 'step_ms': step_ms,
+                  'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+        header.update(meta or {})
+        self._write(header)
+        # 统计
+        self.batches = 0
+        self.events = 0
+
+    def _write(self, record):
+        if self._file is not None:
+            self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def record(self, step, events):
+        encoded = [data for data in (encode_event(e) for e in events) if data is not None]
+        if encoded:
+            self._write({'step': step, 'events': encoded})
+            self.batches += 1
+            self.events += len(encoded)
+
+    def mark_ending(self, result):
+        self._write({'ending': normalize(result)})
+
+    def mark_campaign(self, record):
+        self._write({'campaign': normalize(record)})
+
+    def close(self, step):
+        if self._file is not None:
+            self._write({'end': step})
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        return {'path': self.path, 'batches': self.batches, 'events': self.events}
+
+
+class ReplayCursor:
+    """重放期间代替 pygame.mouse.get_pos：光标停在最近一个带位置的输入上 (和现场 pump 之后的状态一致)"""
+    def __init__(self, pos=(0, 0)):
+        self.pos = tuple(pos)
+        self._orig = None
+
+    def install(self):
+        self._orig = pygame.mouse.get_pos
+        pygame.mouse.get_pos = lambda: self.pos
+
+    def uninstall(self):
+        if self._orig is not None:
+            pygame.mouse.get_pos = self._orig
+            self._orig = None
+
+    def follow(self, events):
+        for event in events:
+            pos = getattr(event, 'pos', None)
+            if pos is not None:
+                self.pos = tuple(pos)
+
+
+class Replay:
+    """读回一份录像：seed、按步数排好的输入批次、录制时到达的结局、开始/继续的战役和总步数"""
+    def __init__(self, path):
+        self.path = path
+        self.batches = []
+        self.endings = []
+        self.campaigns = []
+        self.end_step = None
+        with open(path, 'r', encoding='utf-8') as f:
+            self.header = json.loads(f.readline())
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if 'events' in record:
+                    self.batches.append((record['step'], [decode_event(e) for e in record['events']]))
+                elif 'ending' in record:
+                    self.endings.append(record['ending'])
+                elif 'campaign' in record:
+                    self.campaigns.append(record['campaign'])
+                elif 'end' in record:
+                    self.end_step = record['end']
+        if self.header.get('replay') != REPLAY_VERSION:
+            raise ValueError(f"{path}: unsupported replay version {self.header.get('replay')}")
+        self.seed = self.header['seed']
+        self.step_ms = self.header['step_ms']
+        self.cursor = tuple(self.header.get('cursor', (0, 0)))
+        if self.end_step is None:
+            # the session did not exit cleanly: play up to the last recorded input
+            self.end_step = self.batches[-1][0] if self.batches else 0
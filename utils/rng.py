@@ -0,0 +1,53 @@
+import hashlib
+import os
+import random
+
+
+class RandomService:
+    """
+    随机数服务 - 按名字分出互相独立的 random.Random 流，每个流的种子由主种子和流名派生
+    玩法相关的随机 (事件顺序、事件间隔) 和纯表现的随机 (老板眨眼/抖动/台词、噪点) 用不同的流，
+    表现层多画一帧、少画一帧都不会影响玩法流，同一个主种子 + 同样的输入总是得到同样的一局
+    """
+    def __init__(self, seed=None):
+        self._streams = {}
+        self.master = None
+        self.seed(seed)
+
+    @staticmethod
+    def new_seed():
+        return int.from_bytes(os.urandom(4), 'big')
+
+    def _derive(self, name):
+        # hashlib rather than hash(): str hashes change between interpreter runs
+        digest = hashlib.sha256(f'{self.master}:{name}'.encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def seed(self, seed=None):
+        """设置主种子 (None 时随机取一个) 并重置所有流；已经拿到手的流对象原地重新播种，继续有效"""
+        self.master = int(seed) if seed is not None else self.new_seed()
+        for name, stream in self._streams.items():
+            stream.seed(self._derive(name))
+        return self.master
+
+    def stream(self, name):
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = random.Random(self._derive(name))
+            self._streams[name] = stream
+        return stream
+
+    def stats(self):
+        return {'seed': self.master, 'streams': sorted(self._streams)}
+
+
+# process-wide service; main.py seeds it when a session starts
+rng = RandomService()
+
+
+def stream(name):
+    return rng.stream(name)
+
+
+def rng_stats():
+    return rng.stats()
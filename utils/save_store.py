@@ -0,0 +1,214 @@
+import atexit
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SaveStore:
+    """
+    内存存档 - 启动时读一次文件，之后的读写都只碰内存
+    修改会标记为脏，由后台线程合并后写盘：先写临时文件再 os.replace，写到一半崩溃也不会损坏存档
+    退出时 (close / atexit) 把还没写的修改同步刷到磁盘
+    写盘连续失败 (只读或写满的存储卡) 时按指数退避重试，最长隔 max_backoff 秒，每一轮失败只打一行日志
+    """
+    def __init__(self, path, default_factory, schema_version=1, migrate=None, write_delay=0.25, max_backoff=30.0):
+        self.path = path
+        self.default_factory = default_factory
+        self.schema_version = schema_version
+        # migrate(data, from_version) -> data，用来升级旧版本的存档
+        self.migrate = migrate
+        # 标脏后再等这么久才写，期间的修改合并成一次写入
+        self.write_delay = write_delay
+        self.max_backoff = max_backoff
+        self._data = None
+        self._lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._dirty = False
+        # 这一批修改里第一次标脏的时间 (monotonic)；写盘时间是它 + write_delay，之后的修改不会推迟它
+        self._dirty_since = 0.0
+        self._closed = False
+        self._thread = None
+        self._io_lock = threading.Lock()
+        self._seq = 0
+        self._written_seq = 0
+        # 连续写失败的次数，决定下次重试前等多久
+        self._failures = 0
+        self._failed_at = 0.0
+        # 统计
+        self.writes = 0
+        self.errors = 0
+
+    # ---------------- 读取 ----------------
+    def load(self):
+        """读一次存档 (只在第一次调用时真正读文件)"""
+        with self._lock:
+            if self._data is None:
+                self._data = self._read()
+            return self._data
+
+    def _read(self):
+        data = None
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except Exception as e:
+            self.errors += 1
+            print(f"[SaveStore] could not read {self.path}: {e}")
+            # keep the unreadable file around instead of overwriting it on the next save
+            try:
+                os.replace(self.path, self.path + '.corrupt')
+            except Exception:
+                pass
+            data = None
+        if not isinstance(data, dict):
+            return self._stamp(self.default_factory())
+        version = data.get('schema_version', 0)
+        if version != self.schema_version and self.migrate:
+            try:
+                data = self.migrate(data, version)
+            except Exception as e:
+                self.errors += 1
+                print(f"[SaveStore] could not migrate save from v{version}: {e}")
+                data = self.default_factory()
+        merged = self.default_factory()
+        merged.update(data)
+        return self._stamp(merged)
+
+    def _stamp(self, data):
+        data['schema_version'] = self.schema_version
+        return data
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self.load().get(key, default)
+            return copy.deepcopy(value)
+
+    def snapshot(self):
+        """整份存档的拷贝"""
+        with self._lock:
+            return copy.deepcopy(self.load())
+
+    # ---------------- 修改 ----------------
+    @contextmanager
+    def edit(self):
+        """with store.edit() as data: 直接改内存里的存档，退出时标脏"""
+        with self._lock:
+            data = self.load()
+            yield data
+            self._mark_dirty()
+
+    def set(self, key, value):
+        with self.edit() as data:
+            data[key] = value
+
+    def replace(self, data):
+        with self._lock:
+            self._data = self._stamp(copy.deepcopy(data))
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        was_dirty = self._dirty
+        if not was_dirty:
+            self._dirty_since = time.monotonic()
+        self._dirty = True
+        if self._closed:
+            # after close() there is no writer thread; write straight away
+            self.flush()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name='SaveStore', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        if not was_dirty:
+            # only wake an idle writer; one that is already waiting for its deadline keeps waiting
+            self._wake.notify()
+
+    # ---------------- 写盘 ----------------
+    def _writer(self):
+        while True:
+            with self._lock:
+                while not self._dirty and not self._closed:
+                    self._wake.wait()
+                # coalesce: wait out a fixed deadline, so a burst of edits becomes one write
+                while not self._closed:
+                    remaining = self._due() - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(remaining)
+                if self._closed:
+                    return
+                payload = self._take_payload()
+            # the file I/O happens outside the lock so the game thread never waits on the disk
+            self._write(payload)
+
+    def _due(self):
+        """下一次写盘的时间：第一次标脏后 write_delay 秒；上次写失败时还要等够退避时间"""
+        due = self._dirty_since + self.write_delay
+        if self._failures:
+            due = max(due, self._failed_at + self._backoff())
+        return due
+
+    def _backoff(self):
+        """连续失败 n 次后下次重试前等 write_delay * 2^n 秒，不超过 max_backoff"""
+        return min(self.max_backoff, self.write_delay * (2 ** min(self._failures, 16)))
+
+    def _take_payload(self):
+        """在锁内序列化当前存档并清掉脏标记"""
+        self._dirty = False
+        self._seq += 1
+        return self._seq, json.dumps(self._data, ensure_ascii=False, indent=2)
+
+    def _write(self, payload):
+        seq, text = payload
+        with self._io_lock:
+            # a newer snapshot already reached the disk
+            if seq <= self._written_seq:
+                return
+            tmp = self.path + '.tmp'
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                self._written_seq = seq
+                self.writes += 1
+                if self._failures:
+                    print(f"[SaveStore] wrote {self.path} again after {self._failures} failed attempt(s)")
+                    self._failures = 0
+            except Exception as e:
+                self.errors += 1
+                # log once per failure streak; the retries back off and stay quiet
+                if not self._failures:
+                    print(f"[SaveStore] could not write {self.path}: {e} (retrying with backoff)")
+                self._failures += 1
+                with self._lock:
+                    self._failed_at = time.monotonic()
+                    if not self._dirty:
+                        self._dirty_since = self._failed_at
+                    self._dirty = True
+
+    def flush(self):
+        """把还没写的修改同步写盘"""
+        with self._lock:
+            if not self._dirty or self._data is None:
+                return
+            payload = self._take_payload()
+        self._write(payload)
+
+    def close(self):
+        """停止后台线程并刷盘 (可重复调用)"""
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self.flush()
+
+    def stats(self):
+        return {'writes': self.writes, 'errors': self.errors, 'dirty': self._dirty,
+                'failing': self._failures, 'retry_in': round(self._backoff(), 2) if self._failures else 0.0}
@@ -0,0 +1,89 @@
+import time
+import pygame
+
+
+class FrameScheduler:
+    """
+    帧调度器 - 模拟按固定步长推进，和渲染帧率脱钩
+    有输入或画面在变时按 fps 跑；连续 idle_after_ms 没有动静后降到 idle_fps，
+    静态画面 (没有任何动画和计时器) 直接 pygame.event.wait 阻塞，最多 static_wait_ms
+    """
+    def __init__(self, fps=60, step_ms=None, idle_fps=10, idle_after_ms=1000, static_wait_ms=1000, max_steps=15):
+        self.fps = fps
+        # 固定模拟步长 (毫秒)，默认与原来的 60 FPS 一帧相同，动画速度不变
+        self.step_ms = step_ms or 1000.0 / fps
+        self.idle_fps = idle_fps
+        self.idle_after_ms = idle_after_ms
+        self.static_wait_ms = static_wait_ms
+        # 一帧最多追赶这么多步，卡顿太久时丢掉多余的时间，避免越追越慢
+        self.max_steps = max_steps
+        self.clock = pygame.time.Clock()
+        self._acc = 0.0
+        self._last = time.perf_counter()
+        self._quiet_ms = 0.0
+        self.frame_ms = 0.0
+        # 这一帧取事件本身花的时间 (不含等待)，给分析器用
+        self.pump_ms = 0.0
+        # 剩余不足一步的时间占步长的比例，渲染时用来插值
+        self.alpha = 0.0
+        # 统计
+        self.frames = 0
+        self.steps_run = 0
+        self.idle_frames = 0
+        self.waited_ms = 0.0
+        self.dropped_ms = 0.0
+
+    @property
+    def idle(self):
+        return self._quiet_ms >= self.idle_after_ms
+
+    def wait_events(self, static=False):
+        """等到下一帧并返回这段时间的事件；空闲时阻塞在 pygame.event.wait 上，不占CPU"""
+        if not self.idle:
+            self.clock.tick(self.fps)
+            start = time.perf_counter()
+            events = pygame.event.get()
+        else:
+            timeout = self.static_wait_ms if static else int(1000 / self.idle_fps)
+            start = time.perf_counter()
+            first = pygame.event.wait(timeout)
+            self.waited_ms += (time.perf_counter() - start) * 1000.0
+            self.idle_frames += 1
+            events = [] if first.type == pygame.NOEVENT else [first]
+            start = time.perf_counter()
+            events += pygame.event.get()
+        now = time.perf_counter()
+        self.pump_ms = (now - start) * 1000.0
+        self.frame_ms = (now - self._last) * 1000.0
+        self._last = now
+        self._acc += self.frame_ms
+        self.frames += 1
+        return events
+
+    def steps(self):
+        """按固定步长消耗累积的时间，逐步产出 dt"""
+        n = int(self._acc // self.step_ms)
+        if n > self.max_steps:
+            self.dropped_ms += (n - self.max_steps) * self.step_ms
+            n = self.max_steps
+        self._acc -= int(self._acc // self.step_ms) * self.step_ms
+        self.alpha = self._acc / self.step_ms
+        for _ in range(n):
+            self.steps_run += 1
+            yield self.step_ms
+
+    def frame_done(self, active):
+        """active: 这一帧有输入或画面有变化"""
+        if active:
+            self._quiet_ms = 0.0
+        else:
+            self._quiet_ms += self.frame_ms
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'steps': self.steps_run,
+            'idle_frames': self.idle_frames,
+            'waited_ms': int(self.waited_ms),
+            'dropped_ms': int(self.dropped_ms),
+        }
@@ -0,0 +1,137 @@
+import time
+from collections import deque
+
+import pygame
+
+
+# channels 0.._reserved-1 are taken by the engines and never picked by Sound.play()
+_reserved = 0
+
+
+def reserve_channels(n):
+    """从 pygame 的自动分配里划出 n 个专用声道 (音效引擎和音乐引擎共用)"""
+    global _reserved
+    first = _reserved
+    _reserved += n
+    # keep a few unreserved channels for anything that still calls Sound.play() directly
+    if pygame.mixer.get_num_channels() < _reserved + 4:
+        pygame.mixer.set_num_channels(_reserved + 4)
+    pygame.mixer.set_reserved(_reserved)
+    return [pygame.mixer.Channel(i) for i in range(first, first + n)]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class SfxEngine:
+    """
+    音效引擎 - 每类音效 (点击/选择/收银) 有自己预留的声道，pygame 自己挑声道时不会用到它们
+    声道都忙时：先借优先级更低的类别的空闲声道，再抢占本类最早开始的那个声音；
+    同一类在 min_interval_ms 内的重复触发直接丢弃，连点时不会叠成一团
+    mark_input() 记下输入到达的时刻，下一次播放时记录输入到开始播放的耗时
+    """
+    def __init__(self, categories, buffer_samples=None, history=256):
+        # categories: {name: {'channels': n, 'priority': p, 'min_interval_ms': ms, 'volume': v}}
+        self.categories = {}
+        for name, spec in categories.items():
+            self.categories[name] = {
+                'channels': reserve_channels(spec.get('channels', 1)),
+                'priority': spec.get('priority', 0),
+                'min_interval': spec.get('min_interval_ms', 0) / 1000.0,
+                'volume': spec.get('volume', 1.0),
+            }
+        self._sounds = {}
+        self._last = {}
+        # channel -> (priority, started) of the voice it is playing
+        self._voices = {}
+        init = pygame.mixer.get_init()
+        self.buffer_ms = (buffer_samples / init[0] * 1000.0) if (init and buffer_samples) else 0.0
+        self.input_at = None
+        self._latency = deque(maxlen=history)
+        # 统计
+        self.played = 0
+        self.dropped = 0
+        self.borrowed = 0
+        self.stolen = 0
+
+    def register(self, name, sound):
+        """sound 是已经解码好的 pygame.mixer.Sound"""
+        if name in self.categories and sound is not None:
+            self._sounds[name] = sound
+
+    def has(self, name):
+        return name in self._sounds
+
+    def mark_input(self):
+        # several clicks in one batch: measure from the earliest
+        if self.input_at is None:
+            self.input_at = time.perf_counter()
+
+    def end_input(self):
+        """这一批输入处理完了；没有触发音效的点击不计入延迟"""
+        self.input_at = None
+
+    def _pick_channel(self, cat):
+        for channel in cat['channels']:
+            if not channel.get_busy():
+                return channel
+        for other in self.categories.values():
+            if other['priority'] < cat['priority']:
+                for channel in other['channels']:
+                    if not channel.get_busy():
+                        self.borrowed += 1
+                        return channel
+        # voice stealing: cut the oldest voice on our own channels, never one of higher priority
+        def age(channel):
+            priority, started = self._voices.get(channel, (0, 0.0))
+            return priority > cat['priority'], started
+        self.stolen += 1
+        return min(cat['channels'], key=age)
+
+    def play(self, name):
+        """播放一类音效；被限流丢弃或没有这个音效时返回 None"""
+        cat = self.categories.get(name)
+        sound = self._sounds.get(name)
+        if cat is None or sound is None:
+            return None
+        now = time.perf_counter()
+        last = self._last.get(name)
+        if last is not None and now - last < cat['min_interval']:
+            self.dropped += 1
+            return None
+        self._last[name] = now
+        channel = self._pick_channel(cat)
+        channel.play(sound)
+        channel.set_volume(cat['volume'])
+        self._voices[channel] = (cat['priority'], now)
+        self.played += 1
+        if self.input_at is not None:
+            self._latency.append((time.perf_counter() - self.input_at) * 1000.0)
+            self.input_at = None
+        return channel
+
+    def latency(self):
+        """输入到 Channel.play 的耗时 (ms)，加上混音缓冲区的时长就是大致的点击到出声延迟"""
+        samples = list(self._latency)
+        p95 = percentile(samples, 0.95)
+        return {
+            'samples': len(samples),
+            'dispatch_p50_ms': round(percentile(samples, 0.5), 3),
+            'dispatch_p95_ms': round(p95, 3),
+            'dispatch_max_ms': round(max(samples), 3) if samples else 0.0,
+            'buffer_ms': round(self.buffer_ms, 1),
+            'est_p95_ms': round(p95 + self.buffer_ms, 1),
+        }
+
+    def stats(self):
+        return {
+            'played': self.played,
+            'dropped': self.dropped,
+            'borrowed': self.borrowed,
+            'stolen': self.stolen,
+            'latency': self.latency(),
+        }
@@ -0,0 +1,82 @@
+import pygame
+from collections import OrderedDict
+
+
+class ScaledSurfaceCache:
+    """
+    smoothscale 结果缓存 - 按 (源surface, 目标尺寸) 缓存缩放后的图像
+    按字节预算做 LRU 淘汰，避免每帧重复重采样同一张贴图
+    """
+    def __init__(self, max_bytes=24 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._entries = OrderedDict()
+        # 统计
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, surf, size):
+        w, h = max(1, int(size[0])), max(1, int(size[1]))
+        if surf.get_size() == (w, h):
+            return surf
+        # the entry keeps a reference to the source surface, so its id() cannot be
+        # reused by another surface while the cached copy is alive
+        key = (id(surf), w, h)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        scaled = pygame.transform.smoothscale(surf, (w, h))
+        nbytes = w * h * scaled.get_bytesize()
+        self._entries[key] = (surf, scaled, nbytes)
+        self.used_bytes += nbytes
+        while self.used_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, freed) = self._entries.popitem(last=False)
+            self.used_bytes -= freed
+            self.evictions += 1
+        return scaled
+
+    def put(self, surf, size, scaled):
+        """放入一个现成的缩放结果 (例如图集里预先缩放好的子图)，不计入命中统计"""
+        key = (id(surf), int(size[0]), int(size[1]))
+        if key in self._entries or surf.get_size() == tuple(size):
+            return
+        # atlas subsurfaces share the sheet's pixels, so they do not count against the budget
+        self._entries[key] = (surf, scaled, 0)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'used_bytes': self.used_bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': (self.hits / total) if total else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.used_bytes = 0
+
+
+def quantize_scale(scale, step=0.01):
+    """把动画缩放系数量化到固定步长，限制缓存中出现的尺寸种类"""
+    return round(scale / step) * step
+
+
+# process-wide cache shared by buttons, hearts and panels
+scale_cache = ScaledSurfaceCache()
+
+
+def cached_smoothscale(surf, size):
+    return scale_cache.get(surf, size)
+
+
+def scale_cache_stats():
+    return scale_cache.stats()
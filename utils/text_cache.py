@@ -0,0 +1,126 @@
+import pygame
+from collections import OrderedDict
+
+
+class TextCache:
+    """
+    文字渲染缓存 - 按 (字体, 文本, 抗锯齿, 颜色) 缓存 font.render 的结果
+    按字节预算做 LRU 淘汰；同样的字符串每帧只是一次字典查找
+    """
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._entries = OrderedDict()
+        # 统计 (misses 就是真正调用 font.render 的次数)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color):
+        # the entry keeps a reference to the font, so its id() stays unique while cached
+        key = (id(font), text, bool(antialias), tuple(color))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        nbytes = surf.get_width() * surf.get_height() * surf.get_bytesize()
+        self._entries[key] = (font, surf, nbytes)
+        self.used_bytes += nbytes
+        while self.used_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, freed) = self._entries.popitem(last=False)
+            self.used_bytes -= freed
+            self.evictions += 1
+        return surf
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'used_bytes': self.used_bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': (self.hits / total) if total else 0.0,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.used_bytes = 0
+
+
+class TypewriterText:
+    """
+    打字机文本 - 逐字显示时只渲染新露出的字符 (单个字形也走缓存)，
+    拼到每行自己的图层上；整行显示完后换成整行渲染的缓存结果，和一次性渲染完全一致
+    """
+    def __init__(self, font, text, color, antialias=True, cache=None):
+        self.font = font
+        self.text = text
+        self.color = tuple(color)
+        self.antialias = antialias
+        self.cache = cache or text_cache
+        self._lines = text.split('\n')
+        self._layers = [None] * len(self._lines)
+        self._shown = [0] * len(self._lines)
+        self._sizes = [[(0, 0)] for _ in self._lines]
+
+    def _size(self, i, n):
+        # prefix sizes are measured once and kept (font.size does not render)
+        sizes = self._sizes[i]
+        line = self._lines[i]
+        while len(sizes) <= n:
+            sizes.append(self.font.size(line[:len(sizes)]))
+        return sizes[n]
+
+    def _partial(self, i, n):
+        line = self._lines[i]
+        layer = self._layers[i]
+        if layer is None:
+            w, h = self.font.size(line)
+            layer = pygame.Surface((max(1, w), max(1, h)), pygame.SRCALPHA)
+            self._layers[i] = layer
+        for k in range(self._shown[i], n):
+            glyph = self.cache.render(self.font, line[k], self.antialias, self.color)
+            layer.blit(glyph, (self._size(i, k)[0], 0))
+        self._shown[i] = max(self._shown[i], n)
+        # same size font.render would give for the prefix, so centred layouts line up exactly
+        w, h = self._size(i, n)
+        return layer.subsurface((0, 0, max(1, min(w, layer.get_width())), max(1, min(h, layer.get_height()))))
+
+    def lines(self, count):
+        """
+        显示前 count 个字符时每一行的 surface，与 text[:count].split('\\n') 一一对应
+        还没有字符的行返回 None
+        """
+        result = []
+        remaining = max(0, int(count))
+        for i, line in enumerate(self._lines):
+            n = min(len(line), remaining)
+            if n <= 0:
+                result.append(None)
+            elif n == len(line):
+                result.append(self.cache.render(self.font, line, self.antialias, self.color))
+            else:
+                result.append(self._partial(i, n))
+            remaining -= len(line) + 1
+            if remaining < 0:
+                break
+        return result
+
+
+# process-wide cache shared by dialogue, logs, buttons and panels
+text_cache = TextCache()
+
+
+def render_text(font, text, antialias, color):
+    """font.render(text, antialias, color) 的缓存版本"""
+    return text_cache.render(font, text, antialias, color)
+
+
+def text_cache_stats():
+    return text_cache.stats()